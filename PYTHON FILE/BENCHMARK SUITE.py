@@ -0,0 +1,38 @@
+import os
+import time
+from benchmark_suite import run_benchmarks, write_results, read_results, compare_results
+
+# === CONFIGURATION ===
+SCALES = ["small", "medium", "full"]   # add "large" (12 designs / 100 chips / 1024 challenges)
+CASES = None                           # None = every case, e.g. ["uniqueness", "majority"]
+
+OUTPUT_PATH = r"C:\ROPUF\BENCHMARKS\benchmark.json"
+# Previous results to compare against; slower by more than TOLERANCE is reported
+BASELINE_PATH = None  # e.g. r"C:\ROPUF\BENCHMARKS\benchmark_baseline.json"
+TOLERANCE = 0.25
+
+# === MAIN ===
+def print_result(rec):
+    sampled = f"  (extrapolated from {rec['sampled_items']})" if "sampled_items" in rec else ""
+    print(f"  {rec['scale']:<8}{rec['case']:<20}{rec['impl']:<26}{rec['seconds']:>12.4f} s"
+          f"{rec['items']:>8} items{sampled}", flush=True)
+
+if __name__ == "__main__":
+    start = time.time()
+    print("=" * 96)
+    print(f"  {'Scale':<8}{'Case':<20}{'Implementation':<26}{'Time':>14}")
+    print("=" * 96)
+    report = run_benchmarks(SCALES, CASES, on_result=print_result)
+    print("=" * 96)
+
+    if os.path.dirname(OUTPUT_PATH):
+        os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    write_results(OUTPUT_PATH, report)
+    print(f"\n✅ Benchmark results saved to: {OUTPUT_PATH} ({time.time() - start:.1f} seconds)")
+
+    if BASELINE_PATH and os.path.exists(BASELINE_PATH):
+        regressions = compare_results(read_results(BASELINE_PATH), report, TOLERANCE)
+        if not regressions:
+            print(f"✅ No regressions against {BASELINE_PATH}")
+        for case, impl, scale, before, after, ratio in regressions:
+            print(f"⚠ {scale} {case} / {impl}: {before:.4f} s -> {after:.4f} s ({ratio:.2f}x)")
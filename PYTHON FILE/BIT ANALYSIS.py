@@ -0,0 +1,47 @@
+import os
+import time
+from bit_analysis import aliasing_from_files, aliasing_from_store, analyze_capture, write_bit_report
+from response_store import open_store
+
+# === CONFIGURATION ===
+RESULT_FILES = [rf"C:\ROPUF\FINAL RESULTS\RESULTS {letter}.xlsx" for letter in "ABCDEFGHIJKL"]
+START_ROW = 2
+END_ROW = 257
+
+# Read majority responses from a response store instead of RESULT_FILES
+RESPONSE_STORE = None  # e.g. r'C:\ROPUF\FINAL RESULTS\RESPONSE STORE'
+
+# Raw captures (see raw_capture.py) for per-bit flip rates within each batch
+RAW_CAPTURES = []  # e.g. [r'C:\ROPUF\FINAL RESULTS\RESULTS A.raw']
+BATCH_SIZE = None  # None = batch size recorded in the capture
+
+OUTPUT_PATH = r"C:\ROPUF\FINAL RESULTS\BIT ANALYSIS.xlsx"
+
+# === MAIN ===
+if __name__ == "__main__":
+    start = time.time()
+    if RESPONSE_STORE:
+        labels, aliasing = aliasing_from_store(open_store(RESPONSE_STORE))
+    else:
+        paths, aliasing = aliasing_from_files(RESULT_FILES, START_ROW, END_ROW)
+        labels = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+
+    stability = {}
+    for capture in RAW_CAPTURES:
+        name = os.path.splitext(os.path.basename(capture))[0]
+        for device, result in analyze_capture(capture, BATCH_SIZE).items():
+            stability[f"{name} / {device}"] = result
+
+    print("\n" + "=" * 72)
+    print(f"  {'Design':<20}{'Mean aliasing':>16}{'Mean entropy':>16}{'Biased bits':>16}")
+    print("=" * 72)
+    for i, label in enumerate(labels):
+        print(f"  {label:<20}{aliasing['aliasing_by_bit'][i].mean():>15.2f}%"
+              f"{aliasing['entropy_by_bit'][i].mean():>16.4f}{int(aliasing['biased_mask'][i].sum()):>16}")
+    print("=" * 72)
+    for device, result in stability.items():
+        print(f"  {device}: mean flip rate {result['flip_rate'].mean() * 100:.2f}%, "
+              f"{int(result['unreliable_mask'].sum())} unreliable bits")
+
+    write_bit_report(OUTPUT_PATH, labels, aliasing, stability)
+    print(f"\n✅ Bit analysis saved to: {OUTPUT_PATH} ({time.time() - start:.2f} seconds)")
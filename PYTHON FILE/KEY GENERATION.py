@@ -0,0 +1,101 @@
+import os
+import time
+import numpy as np
+from openpyxl import Workbook
+from response_store import open_store
+from enrollment import EnrollmentDB
+from fuzzy_extractor import (
+    ConcatenatedCode, FuzzyExtractor, key_material, simulate_key_failures, decoder_throughput,
+    KEY_CHALLENGES, TRIALS,
+)
+
+# === CONFIGURATION ===
+RESULT_FILES = [rf"C:\ROPUF\FINAL RESULTS\RESULTS {chr(ord('A') + i)}.xlsx" for i in range(12)]
+# Read the majority responses from a response store or a saved enrollment
+# database (RO-PUF AUTHENTICATION SERVER.py enroll) instead
+RESPONSE_STORE = None   # e.g. r"C:\ROPUF\FINAL RESULTS\RESPONSE STORE"
+ENROLLMENT_PATH = None  # e.g. r"C:\ROPUF\ENROLLMENT\enrollment.npz"
+
+FIRST_CHALLENGE = 0     # keys use challenges FIRST_CHALLENGE .. FIRST_CHALLENGE + KEY_CHALLENGES - 1
+# (repetition, m) of the codes to compare; the first one produces the helper data
+CODES = [(5, 5), (3, 5), (7, 0), (1, 5), (3, 4)]
+SEED = 0
+
+OUTPUT_PATH = r"C:\ROPUF\FINAL RESULTS\KEY GENERATION.xlsx"
+HELPER_PATH = r"C:\ROPUF\FINAL RESULTS\KEY HELPER DATA.npz"
+
+# === LOAD ENROLLMENT ===
+start = time.time()
+if ENROLLMENT_PATH:
+    db = EnrollmentDB.load(ENROLLMENT_PATH)
+elif RESPONSE_STORE:
+    db = EnrollmentDB.from_store(open_store(RESPONSE_STORE))
+else:
+    labels = [os.path.splitext(os.path.basename(p))[0] for p in RESULT_FILES]
+    db = EnrollmentDB.from_files(RESULT_FILES, labels)
+
+challenges = range(FIRST_CHALLENGE, min(FIRST_CHALLENGE + KEY_CHALLENGES, db.n_challenges))
+devices, references, flip_p = key_material(db, challenges)
+if not len(devices):
+    raise ValueError(f"No device has responses for all challenges {challenges.start}..{challenges.stop - 1}")
+intra = flip_p.mean(axis=1) * 100
+print(f"Loaded {len(devices)} devices x {references.shape[1]} response bits "
+      f"(mean intra-chip HD {intra.mean():.2f}%) in {time.time() - start:.1f} seconds\n")
+
+# === SIMULATE EVERY CODE ===
+print("=" * 104)
+print(f"  {'Code':<22}{'Key bits':>9}{'Helper':>8}{'Bound':>12}{'Simulated':>12}"
+      f"{'Keys/s':>10}{'Blocks/s':>12}{'Mbit/s':>9}")
+print("=" * 104)
+rows = []
+for repetition, m in CODES:
+    extractor = FuzzyExtractor(references.shape[1], ConcatenatedCode(repetition, m))
+    bound = extractor.key_failure_bound(flip_p)
+    failures, seconds, reproductions = simulate_key_failures(extractor, references, flip_p, TRIALS, SEED)
+    throughput = decoder_throughput(extractor.code, seed=SEED)
+    row = {
+        "code": repr(extractor.code), "extractor": extractor, "bound": bound, "failures": failures,
+        "key_bits": extractor.message_bits, "helper_bits": extractor.used_bits,
+        "mean_bound": float(bound.mean()), "simulated": failures.sum() / reproductions,
+        "keys_per_sec": reproductions / seconds if seconds else 0.0, **throughput,
+    }
+    rows.append(row)
+    print(f"  {row['code']:<22}{row['key_bits']:>9}{row['helper_bits']:>8}{row['mean_bound']:>12.3e}"
+          f"{row['simulated']:>12.3e}{row['keys_per_sec']:>10.0f}{row['blocks_per_sec']:>12.0f}"
+          f"{row['mbit_per_sec']:>9.1f}")
+print("=" * 104)
+print("Key bits = message bits carried by the code (upper limit on key entropy); "
+      f"simulated over {TRIALS} reproductions per device")
+
+# === HELPER DATA ===
+chosen = rows[0]["extractor"]
+helper, keys = chosen.generate(references, np.random.default_rng(SEED))
+if HELPER_PATH:
+    # the keys themselves are not stored, only a digest to check a reproduction against
+    key_check = FuzzyExtractor.keys(np.unpackbits(keys, axis=1))
+    np.savez(HELPER_PATH, devices=np.array([db.devices[d] for d in devices]), challenges=np.array(list(challenges)),
+             repetition=chosen.code.repetition, m=chosen.code.m,
+             helper=np.packbits(helper, axis=1), key_check=key_check)
+    print(f"\n✅ Helper data for {rows[0]['code']} saved to: {HELPER_PATH}")
+
+# === WRITE TO EXCEL ===
+out_wb = Workbook()
+
+sum_ws = out_wb.active
+sum_ws.title = "Summary"
+sum_ws.append(["Code", "Key bits", "Helper bits", "Mean key failure bound", "Simulated key failure rate",
+               "Failed keys", "Reproductions", "Keys/s", "Decoded blocks/s", "Decoder Mbit/s"])
+for row in rows:
+    sum_ws.append([row["code"], row["key_bits"], row["helper_bits"], row["mean_bound"], row["simulated"],
+                   int(row["failures"].sum()), TRIALS * len(devices), round(row["keys_per_sec"]),
+                   round(row["blocks_per_sec"]), round(row["mbit_per_sec"], 2)])
+
+dev_ws = out_wb.create_sheet("Devices")
+dev_ws.append(["Device", "Intra-chip HD (%)"] + [f"{row['code']} bound" for row in rows]
+              + [f"{row['code']} failures / {TRIALS}" for row in rows])
+for i, d in enumerate(devices):
+    dev_ws.append([db.devices[d], round(float(intra[i]), 2)] + [float(row["bound"][i]) for row in rows]
+                  + [int(row["failures"][i]) for row in rows])
+
+out_wb.save(OUTPUT_PATH)
+print(f"\n✅ All results saved to: {OUTPUT_PATH}")
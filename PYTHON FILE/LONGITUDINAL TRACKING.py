@@ -0,0 +1,80 @@
+import time
+import numpy as np
+from openpyxl import Workbook
+from longitudinal_store import LongitudinalStore
+
+# === CONFIGURATION ===
+# One store per design: every run compares against the device's first run
+STORE_PATH = r"C:\ROPUF\LONGITUDINAL\RESULTS A"
+# Workbooks of that design to record; columns already in the store are skipped,
+# so the same list can be re-run as new runs are appended to a workbook
+RESULT_FILES = [r"C:\ROPUF\FINAL RESULTS\RESULTS A.xlsx"]
+CONDITIONS = {"temperature_c": 25, "vccint_v": 1.0, "age_hours": 0}  # tags of the newly recorded runs
+TIMESTAMP = None        # None = now, or "YYYY-MM-DD HH:MM:SS" of the acquisition
+START_ROW = 2
+END_ROW = 257
+
+DRIFT_DEVICE = "F7"     # device whose reliability / drift trend is printed
+UNSTABLE_THRESHOLD = 0.1  # report bits flipping more often than this
+OUTPUT_PATH = r"C:\ROPUF\LONGITUDINAL\LONGITUDINAL TRACKING.xlsx"  # None = print only
+
+def fmt(value, digits=2):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+# === RECORD NEW RUNS ===
+start = time.time()
+store = LongitudinalStore(STORE_PATH)
+new_runs = []
+for path in RESULT_FILES:
+    new_runs += store.ingest_workbook(path, CONDITIONS, TIMESTAMP, START_ROW, END_ROW)
+print(f"Recorded {len(new_runs)} new run(s); {len(store.records)} run(s) of {len(store.devices)} device(s) "
+      f"in {STORE_PATH} ({time.time() - start:.2f} seconds)\n")
+
+# === DRIFT OF ONE DEVICE ===
+if DRIFT_DEVICE in store.devices:
+    print("=" * 92)
+    print(f"  {DRIFT_DEVICE}: {'Run':>4}  {'Timestamp':<20}{'Reliability (%)':>16}{'Drift HD (%)':>14}  Conditions")
+    print("=" * 92)
+    for r in store.runs(DRIFT_DEVICE):
+        print(f"  {'':<{len(DRIFT_DEVICE) + 1}} {r['device_run']:>4}  {r['timestamp']:<20}"
+              f"{fmt(r['reliability_mean']):>16}{fmt(r['drift_hd_percent']):>14}  {r['conditions']}")
+    print("=" * 92)
+    for _, conditions, count, mean, std in store.condition_summary(DRIFT_DEVICE):
+        print(f"  {conditions}: {count} run(s), reliability {fmt(mean)} ± {fmt(std)}%")
+    unstable = store.unstable_bits(DRIFT_DEVICE, UNSTABLE_THRESHOLD, drift=True)
+    print(f"  {len(unstable)} bit(s) moved away from the first run in more than "
+          f"{UNSTABLE_THRESHOLD:.0%} of later runs")
+else:
+    print(f"⚠ No runs of {DRIFT_DEVICE} in the store")
+
+# === WRITE TO EXCEL ===
+if OUTPUT_PATH:
+    out_wb = Workbook()
+    runs_ws = out_wb.active
+    runs_ws.title = "Runs"
+    keys = sorted({k for r in store.records for k in r["conditions"]})
+    runs_ws.append(["Run", "Device", "Device run", "Timestamp", "Challenges", "Reliability (%)",
+                    "Reliability std (%)", "Drift HD (%)", "Batch bit flips (%)", "Source"] + keys)
+    for r in store.records:
+        runs_ws.append([r["run"], r["device"], r["device_run"], r["timestamp"], r["challenges"],
+                        r["reliability_mean"], r["reliability_std"], r["drift_hd_percent"],
+                        r["noise_flip_percent"], r["source"]] + [r["conditions"].get(k) for k in keys])
+
+    cond_ws = out_wb.create_sheet("Conditions")
+    cond_ws.append(["Device", "Conditions", "Runs", "Mean reliability (%)", "Std (%)"])
+    for device, conditions, count, mean, std in store.condition_summary():
+        cond_ws.append([device, str(conditions), count, mean, std])
+
+    chal_ws = out_wb.create_sheet("Challenges")
+    chal_ws.append(["Device", "Challenge", "Runs", "Mean reliability (%)", "Reliability variance",
+                    "Drifting bits"])
+    for device in store.devices:
+        history = store.history(device)
+        variance = history.variance()
+        drifting = (history.drift_flips > 0).sum(axis=1)
+        for c in range(store.n_challenges):
+            if history.count[c]:
+                chal_ws.append([device, c + START_ROW - 1, int(history.count[c]), float(history.mean[c]),
+                                None if np.isnan(variance[c]) else float(variance[c]), int(drifting[c])])
+    out_wb.save(OUTPUT_PATH)
+    print(f"\n✅ All results saved to: {OUTPUT_PATH}")
@@ -0,0 +1,59 @@
+import os
+import time
+from nist_tests import run_suite, summary_rows, write_suite_report, store_sequences, result_file_sequences, TESTS, ALPHA
+from response_store import open_store
+
+# === CONFIGURATION ===
+RESULT_FILES = [rf"C:\ROPUF\FINAL RESULTS\RESULTS {letter}.xlsx" for letter in "ABCDEFGHIJKL"]
+START_ROW = 2
+END_ROW = 257
+
+# Read responses from a response store (see response_store.py) instead of RESULT_FILES
+RESPONSE_STORE = None  # e.g. r'C:\ROPUF\FINAL RESULTS\RESPONSE STORE'
+
+# False: test every majority response on its own (256-bit sequences)
+# True: test one concatenated bitstream per design
+CONCATENATE = False
+
+# Run tests even where the sequence is shorter than the NIST recommended length
+ENFORCE_MIN_LENGTH = True
+
+SELECTED_TESTS = list(TESTS)
+WORKERS = None  # None = one process per CPU
+OUTPUT_PATH = r"C:\ROPUF\FINAL RESULTS\NIST TEST RESULTS.xlsx"
+
+# === MAIN ===
+def main():
+    print("\n⏳ Loading responses...")
+    if RESPONSE_STORE:
+        labels, sequences = store_sequences(open_store(RESPONSE_STORE), concatenate=CONCATENATE)
+    else:
+        labels, sequences = result_file_sequences(
+            [p for p in RESULT_FILES if os.path.exists(p)], start_row=START_ROW, end_row=END_ROW,
+            concatenate=CONCATENATE,
+        )
+    if not sequences:
+        print("❌ No responses found.")
+        return
+    print(f"🔍 {len(sequences)} sequences of {len(sequences[0])} bits")
+
+    start = time.time()
+    result = run_suite(
+        sequences, labels, tests=SELECTED_TESTS, alpha=ALPHA, workers=WORKERS,
+        enforce_min_length=ENFORCE_MIN_LENGTH,
+    )
+    print(f"✅ Tests finished in {time.time() - start:.2f} seconds\n")
+
+    print("=" * 72)
+    print(f"  {'Test':<30}{'Applicable':<14}{'Passed':<12}{'Pass Rate'}")
+    print("=" * 72)
+    for name, applicable, passed, rate in summary_rows(result):
+        rate = f"{rate:.2f}%" if rate is not None else "N/A"
+        print(f"  {name:<30}{applicable:<14}{passed:<12}{rate}")
+    print("=" * 72)
+
+    write_suite_report(result, OUTPUT_PATH)
+    print(f"\n✅ Pass/fail matrix saved to: {OUTPUT_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import time
+from parameter_calculation import run_parameter_calculations, write_consolidated_report
+
+# === CONFIGURATION ===
+# Workbooks to analyze: paths and/or glob patterns (every design and every combination)
+INPUTS = [
+    r'C:\ROPUF\FINAL RESULTS\RESULTS *.xlsx',
+    r'C:\ROPUF\FINAL RESULTS\COMBINED_RESULTS1\Combination *.xlsx',
+]
+START_ROW = 2
+END_ROW = 257
+OUTPUT_PATH = r'C:\ROPUF\FINAL RESULTS\FINAL RESULTS ANALYSIS (ALL).xlsx'
+
+WORKERS = None               # process pool size (None = all cores, 1 = serial)
+UNIQUENESS_MODE = "pairwise" # or "popcount", see PARAMETER CALCULATION.py
+HD_HISTOGRAM = False         # add one HD Histogram column per input
+
+# === MAIN ===
+def show_progress(done, total, result, bar_length=30):
+    fraction = done / total
+    filled_length = int(bar_length * fraction)
+    bar = '█' * filled_length + '▒' * (bar_length - filled_length)
+    status = f"❌ {result['error']}" if "error" in result else f"{result['summary']['uniqueness']:.2f}% uniqueness"
+    print(f"[{bar}] {done}/{total}  {result['label']}: {status}", flush=True)
+
+if __name__ == "__main__":
+    start = time.time()
+    results = run_parameter_calculations(
+        INPUTS, workers=WORKERS, on_result=show_progress,
+        start_row=START_ROW, end_row=END_ROW, method=UNIQUENESS_MODE, histogram=HD_HISTOGRAM,
+    )
+    if not results:
+        raise FileNotFoundError(f"No workbooks match {INPUTS}")
+
+    failed = [r for r in results if "error" in r]
+    write_consolidated_report(results, OUTPUT_PATH)
+    print(f"\nAnalyzed {len(results) - len(failed)} of {len(results)} workbooks in {time.time() - start:.1f} seconds")
+    print(f"✅ Consolidated results saved to: {OUTPUT_PATH}")
@@ -1,41 +1,8 @@
-from numpy import zeros, append, array, clip, cumsum, transpose, where
-from scipy.special import gammaincc
 from time import sleep
+from nist_tests import RandomExcursions
 
-# === Random Excursions Test ===
-class RandomExcursions:
-    @staticmethod
-    def get_pi_value(k, x):
-        if k == 0:
-            return 1 - 1.0 / (2 * abs(x))
-        elif k >= 5:
-            return (1.0 / (2 * abs(x))) * (1 - 1.0 / (2 * abs(x))) ** 4
-        else:
-            return (1.0 / (4 * x * x)) * (1 - 1.0 / (2 * abs(x))) ** (k - 1)
-
-    @staticmethod
-    def test(binary_data):
-        length = len(binary_data)
-        sequence_x = [-1.0 if bit == '0' else 1.0 for bit in binary_data]
-        cumulative_sum = cumsum(sequence_x)
-        cumulative_sum = append([0], append(cumulative_sum, [0]))
-        x_values = array([-4, -3, -2, -1, 1, 2, 3, 4])
-        position = where(cumulative_sum == 0)[0]
-
-        if len(position) <= 1:
-            print("⚠️  Not enough zero-crossings for Random Excursions Test.")
-            return [0.0] * len(x_values)
-
-        print(f"🔍 Zero-crossing cycles found: {len(position) - 1}")
-        cycles = [cumulative_sum[position[i]:position[i + 1] + 1] for i in range(len(position) - 1)]
-        num_cycles = len(cycles)
-        state_count = [[cycle.tolist().count(state) for state in x_values] for cycle in cycles]
-        state_count = transpose(clip(state_count, 0, 5))
-        su = transpose([[(sct == cycle).sum() for sct in state_count] for cycle in range(6)])
-        pi = [[RandomExcursions.get_pi_value(k, state) for k in range(6)] for state in x_values]
-        inner_term = num_cycles * array(pi)
-        xObs = ((array(su) - inner_term) ** 2 / inner_term).sum(axis=1)
-        return [gammaincc(2.5, cs / 2.0) for cs in xObs]
+# Random Excursions Test lives in nist_tests.py together with the rest of
+# the SP 800-22 suite (see NIST TEST SUITE.py for batch runs)
 
 # === User Manual Input ===
 binary_input = "1011101011010011100011000001000101111011100000010100011100001100011000100010001010000000001110000000001100011000111001111000000110111001000100100110011001111100000000000000000000000101111000100011110100000111100010010111000101000001111000111000110011010011"
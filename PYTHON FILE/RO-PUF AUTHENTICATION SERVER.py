@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from response_store import open_store
+from enrollment import (
+    EnrollmentDB, AuthServer, AuthClient, HOST, PORT,
+    stand_in_requests, benchmark_identify,
+)
+
+# === CONFIGURATION ===
+RESULT_FILES = [rf"C:\ROPUF\FINAL RESULTS\RESULTS {chr(ord('A') + i)}.xlsx" for i in range(12)]
+ENROLLMENT_PATH = r"C:\ROPUF\ENROLLMENT\enrollment.npz"
+BENCH_REQUESTS = 2000
+BENCH_CHALLENGES = 16   # stand-in devices are only enrolled on the first challenges
+
+# === COMMANDS ===
+def enroll(args):
+    if args.store:
+        db = EnrollmentDB.from_store(open_store(args.store), args.design or None)
+    else:
+        paths = args.results or RESULT_FILES
+        labels = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+        db = EnrollmentDB.from_files(paths, labels, args.start_row, args.end_row)
+    db.save(args.output)
+    print(f"✅ Enrolled {len(db.devices)} devices on {db.n_challenges} challenges "
+          f"({int(db.enrolled.sum())} references) -> {args.output}")
+    return 0
+
+def load(args):
+    start = time.time()
+    db = EnrollmentDB.load(args.db)
+    if args.synthetic:
+        db = db.head(args.challenges)
+        db = EnrollmentDB.concat([db, EnrollmentDB.synthetic(args.synthetic, db.n_challenges, db.n_bits)])
+    print(f"⏳ Indexing {len(db.devices)} devices on {db.n_challenges} challenges...")
+    db.build_indexes()
+    print(f"   done in {time.time() - start:.1f} s", flush=True)
+    return db
+
+def serve(args):
+    db = load(args)
+    server = AuthServer(db, args.host, args.port)
+    print(f"🔐 Serving {len(db.devices)} enrolled devices on {args.host}:{server.server_address[1]} (Ctrl+C to stop)",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⛔ Stopped")
+    finally:
+        server.server_close()
+    return 0
+
+def print_bench(title, stats):
+    print(f"  {title:<12}{stats['requests']:>8}{stats['correct']:>9}{stats['rejected']:>10}{stats['wrong']:>7}"
+          f"{stats['p50_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['per_sec']:>12.0f}")
+
+def bench(args):
+    db = load(args)
+    requests = stand_in_requests(db, args.requests, args.seed)
+
+    print("\n" + "=" * 78)
+    print(f"  {'Lookup':<12}{'Requests':>8}{'Correct':>9}{'Rejected':>10}{'Wrong':>7}"
+          f"{'p50 ms':>10}{'p99 ms':>10}{'Lookups/s':>12}")
+    print("=" * 78)
+    print_bench("in-process", benchmark_identify(db.identify, requests))
+
+    server = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        client = AuthClient(host or HOST, int(port))
+    else:
+        # stand-in client against a local server on a free port
+        server = AuthServer(db, HOST, 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = AuthClient(HOST, server.server_address[1])
+    try:
+        print_bench("server", benchmark_identify(client.identify, requests))
+    finally:
+        client.close()
+        if server:
+            server.shutdown()
+            server.server_close()
+    print("=" * 78)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Enroll RO-PUF devices from their majority responses and authenticate noisy responses.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("enroll", help="build the enrollment database")
+    p.add_argument("results", nargs="*", help="RESULTS workbooks (default: RESULTS A..L)")
+    p.add_argument("--store", help="enroll from a response store instead of workbooks")
+    p.add_argument("--design", action="append", default=[], help="store design to enroll (repeatable)")
+    p.add_argument("--start-row", type=int, default=2)
+    p.add_argument("--end-row", type=int, default=257)
+    p.add_argument("-o", "--output", default=ENROLLMENT_PATH)
+    p.set_defaults(func=enroll)
+
+    for name, func, help_text in (("serve", serve, "run the local authentication server"),
+                                  ("bench", bench, "benchmark lookups with a stand-in client")):
+        p = commands.add_parser(name, help=help_text)
+        p.add_argument("db", nargs="?", default=ENROLLMENT_PATH)
+        p.add_argument("--synthetic", type=int, default=0, metavar="N",
+                       help="add N random stand-in devices (load testing)")
+        p.add_argument("--challenges", type=int, default=BENCH_CHALLENGES,
+                       help="with --synthetic, keep only the first challenges")
+        p.set_defaults(func=func)
+        if name == "serve":
+            p.add_argument("--host", default=HOST)
+            p.add_argument("--port", type=int, default=PORT)
+        else:
+            p.add_argument("--requests", type=int, default=BENCH_REQUESTS)
+            p.add_argument("--seed", type=int, default=0)
+            p.add_argument("--connect", metavar="HOST:PORT", help="benchmark a running server instead")
+    return parser
+
+# === MAIN ===
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
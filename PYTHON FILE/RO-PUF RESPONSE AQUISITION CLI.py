@@ -0,0 +1,133 @@
+import sys
+import argparse
+from acquisition_engine import BAUD_RATE, TIMEOUT, BATCH_SIZE, MAX_ROWS, FRAMING
+from serial_framing import FRAMINGS
+from puf_simulator import SIM_SCHEME
+from acquisition_station import (
+    DEVICE_COM_PORT_MAP, RESULT_LETTERS, ALL_DEVICES, SAVE_DIR,
+    resolve_devices, run_queue, play_alarm,
+)
+
+# === CONFIGURATION ===
+STATUS_INTERVAL = 10.0  # seconds between status lines
+
+# === FUNCTIONS ===
+def parse_job(spec, port_map):
+    """'F1,F2:A', 'ALL:B' or just 'C' (all devices) -> ({device: port}, letter)."""
+    devices, _, letter = spec.rpartition(":")
+    letter = letter.strip().upper()
+    if letter not in RESULT_LETTERS:
+        raise argparse.ArgumentTypeError(f"Invalid result letter in '{spec}'")
+    try:
+        return resolve_devices(devices or ALL_DEVICES, port_map), letter
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_port(spec):
+    device, sep, port = spec.partition("=")
+    if not sep or not device or not port:
+        raise argparse.ArgumentTypeError(f"Expected DEVICE=PORT, got '{spec}'")
+    return device.strip(), port.strip()
+
+def parse_condition(spec):
+    """'temperature_c=85' -> ('temperature_c', 85.0); values that are not numbers stay text."""
+    key, sep, value = spec.partition("=")
+    if not sep or not key.strip():
+        raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got '{spec}'")
+    try:
+        return key.strip(), float(value)
+    except ValueError:
+        return key.strip(), value.strip()
+
+def print_start(engine):
+    print(f"▶ RESULTS {engine.result_letter}: {', '.join(engine.device_ports)}", flush=True)
+
+def print_status(engine, snapshot):
+    done = sum(engine.progress.values())
+    total = engine.max_rows * len(engine.progress)
+    malformed = sum(d["malformed"] for d in snapshot["devices"].values())
+    misaligned = sum(d["misaligned"] for d in snapshot["devices"].values())
+    lost = sum(d["lost"] for d in snapshot["devices"].values())
+    frames = f" | {misaligned} misaligned, {lost} lost frames" if misaligned or lost else ""
+    print(
+        f"   RESULTS {engine.result_letter}: {done}/{total} rows | {snapshot['elapsed']:.0f} s | "
+        f"{snapshot['lines_per_sec']:.1f} lines/s | {malformed} malformed{frames} | queue {snapshot['queue_backlog']}",
+        flush=True,
+    )
+
+def print_finish(engine):
+    for device, error in engine.errors.items():
+        print(f"   ❌ {device}: {error}")
+    if engine.complete:
+        print(f"✅ RESULTS {engine.result_letter} complete in {engine.elapsed_time:.1f} s -> {engine.xlsx_file}")
+    else:
+        print(f"⚠ RESULTS {engine.result_letter} incomplete after {engine.elapsed_time:.1f} s; "
+              f"progress kept in {engine.journal_file}")
+    print(f"   Metrics log: {engine.metrics.log_file}", flush=True)
+    for record in engine.longitudinal_records:
+        drift = record["drift_hd_percent"]
+        print(f"   📈 {record['device']} run {record['device_run']}: "
+              f"{record['reliability_mean']:.2f}% reliability"
+              + (f", {drift:.2f}% drift from first run" if drift is not None else ""), flush=True)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Collect RO-PUF responses without the GUI. Runs are queued and executed back to back.",
+    )
+    parser.add_argument("jobs", nargs="+", metavar="[DEVICES:]RESULT",
+                        help="e.g. 'F1,F7:A', 'ALL:B' or 'C' (all devices)")
+    parser.add_argument("--port", action="append", type=parse_port, default=[], metavar="DEVICE=PORT",
+                        help="add or override a device port (COM port, pty path or pyserial URL)")
+    parser.add_argument("--simulate", nargs="?", const="", metavar="PARAMS",
+                        help="use simulated boards for every device, e.g. --simulate 'noise=0.001&rate=0'")
+    parser.add_argument("--save-dir", default=SAVE_DIR)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-rows", type=int, default=MAX_ROWS)
+    parser.add_argument("--baud-rate", type=int, default=BAUD_RATE)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--framing", choices=FRAMINGS, default=FRAMING,
+                        help="hex text lines, binary frames or detect from the stream")
+    parser.add_argument("--skip-completed", action="store_true",
+                        help="boards restart from their first challenge; discard lines of completed rows")
+    parser.add_argument("--raw-capture", metavar="DIR", default=None,
+                        help="also keep the raw lines of every batch in DIR/RESULTS <letter>.capture")
+    parser.add_argument("--longitudinal", metavar="DIR", default=None,
+                        help="record complete runs in DIR/RESULTS <letter>, one longitudinal store per design")
+    parser.add_argument("--condition", action="append", type=parse_condition, default=[], metavar="KEY=VALUE",
+                        help="tag the runs, e.g. --condition temperature_c=85 --condition vccint_v=0.95")
+    parser.add_argument("--status-interval", type=float, default=STATUS_INTERVAL)
+    parser.add_argument("--alarm", action="store_true", help="beep when the queue is done")
+    return parser
+
+# === MAIN ===
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    port_map = dict(DEVICE_COM_PORT_MAP)
+    if args.simulate is not None:
+        query = f"?{args.simulate}" if args.simulate else ""
+        port_map = {device: f"{SIM_SCHEME}{device}{query}" for device in port_map}
+    port_map.update(args.port)
+    try:
+        jobs = [parse_job(spec, port_map) for spec in args.jobs]
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    print(f"🚀 {len(jobs)} run(s) queued")
+    engines = run_queue(
+        jobs, args.save_dir, args.raw_capture,
+        on_start=print_start, on_status=print_status, on_finish=print_finish,
+        status_interval=args.status_interval,
+        batch_size=args.batch_size, max_rows=args.max_rows, baud_rate=args.baud_rate,
+        timeout=args.timeout, skip_completed=args.skip_completed, framing=args.framing,
+        longitudinal_dir=args.longitudinal, conditions=dict(args.condition),
+    )
+    if len(engines) < len(jobs):
+        print(f"⛔ Interrupted, {len(jobs) - len(engines)} queued run(s) skipped")
+
+    if args.alarm and any(any(e.progress.values()) for e in engines):
+        play_alarm()
+    return 0 if len(engines) == len(jobs) and all(e.complete for e in engines) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
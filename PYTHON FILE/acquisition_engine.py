@@ -0,0 +1,443 @@
+import re
+import time
+import queue
+import threading
+import serial
+import numpy as np
+from puf_metrics import pack_hex, batch_majority
+from acquisition_journal import ResponseJournal, journal_path_for, archive_journal, journal_to_xlsx, FSYNC_EVERY
+from raw_capture import RawCaptureWriter, iter_records, list_devices
+from acquisition_metrics import AcquisitionMetrics, metrics_path_for, LOG_INTERVAL
+from puf_simulator import SimulatedSerial, SIM_SCHEME
+from serial_framing import FrameDecoder, LineSplitter, detect_framing, FRAMINGS, READ_CHUNK, BAD_FRAME, INDEX_BYTES
+from longitudinal_store import LongitudinalStore
+
+# === CONFIGURATION ===
+BAUD_RATE = 230400
+TIMEOUT = 1
+BATCH_SIZE = 128
+MAX_ROWS = 256
+RESPONSE_HEX_LEN = 64
+HEX_LINE = re.compile(r"[0-9A-Fa-f]+")
+INDEX_MODULUS = 1 << (8 * INDEX_BYTES)  # frame challenge indices wrap around
+FRAMING = "line"  # "line" (hex text, readline), "binary" (framed) or "auto" (detect from the stream)
+
+# === RESPONSE PROCESSING ===
+def process_batch(batch, bit_flips=False):
+    """
+    Majority response (hex) and reliability (%) of one batch of hex
+    responses or binary frame payloads, plus its per-bit flip counts with
+    bit_flips. Payloads are used as they are, without a hex round trip.
+    """
+    if isinstance(batch[0], str):
+        packed, n_bits = pack_hex(batch)
+    else:
+        packed = np.frombuffer(b"".join(batch), dtype=np.uint8).reshape(len(batch), -1)
+        n_bits = 8 * packed.shape[1]
+    result = batch_majority(packed, n_bits, bit_flips)
+    return tuple(values[0] for values in result)
+
+def process_batches(batches):
+    """Majority responses and reliabilities of several equal-size batches in one pass."""
+    packed, n_bits = pack_hex([resp for batch in batches for resp in batch])
+    packed = packed.reshape(len(batches), len(batches[0]), -1)
+    return batch_majority(packed, n_bits)
+
+def is_hex(line):
+    """Only hex digits (bytes.fromhex would also accept embedded whitespace)."""
+    return HEX_LINE.fullmatch(line) is not None
+
+# === SERIAL ===
+def open_serial(port, baud_rate=BAUD_RATE, timeout=TIMEOUT):
+    """Open a COM port, pty path, pyserial URL such as 'loop://' or a simulated board ('sim://F7?noise=...')."""
+    if port.startswith(SIM_SCHEME):
+        return SimulatedSerial.from_url(port, timeout=timeout, baud_rate=baud_rate)
+    return serial.serial_for_url(port, baudrate=baud_rate, timeout=timeout)
+
+class PortReader(threading.Thread):
+    """Reads raw lines from one serial port into a shared queue until stopped."""
+
+    def __init__(self, device, ser, out_queue):
+        super().__init__(name=f"reader-{device}", daemon=True)
+        self.device = device
+        self.ser = ser
+        self.out_queue = out_queue
+        self.stop_event = threading.Event()
+        self.error = None
+        self.backlog = 0
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                line = self.ser.readline()
+                if line:
+                    self.out_queue.put((self.device, line, time.time()))
+                try:
+                    self.backlog = self.ser.in_waiting
+                except Exception:
+                    self.backlog = None
+        except Exception as e:
+            self.error = e
+        finally:
+            # None tells the processing stage this reader has finished
+            self.out_queue.put((self.device, None, None))
+
+    def close(self):
+        self.ser.close()
+
+class ChunkedPortReader(PortReader):
+    """
+    Reads large chunks (ser.read of whatever is waiting, up to READ_CHUNK)
+    instead of one readline per response. framing="binary" parses
+    serial_framing frames and queues each one as (challenge index, payload
+    bytes) for the processing stage to batch directly; framing="line"
+    splits hex text lines out of the chunks; framing="auto" starts in both
+    and keeps whichever first yields a valid response (the current
+    firmware gives "line").
+    """
+
+    def __init__(self, device, ser, out_queue, framing="auto"):
+        super().__init__(device, ser, out_queue)
+        self.framing = None if framing == "auto" else framing
+        self.decoder = FrameDecoder()
+        self.splitter = LineSplitter()
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                waiting = self.ser.in_waiting
+                self.backlog = waiting
+                data = self.ser.read(min(max(waiting, 1), READ_CHUNK))
+                if not data:
+                    continue
+                timestamp = time.time()
+                frames = self.decoder.feed(data) if self.framing != "line" else []
+                lines = self.splitter.feed(data) if self.framing != "binary" else []
+                if self.framing is None:
+                    self.framing = detect_framing(lines, frames)
+                    if self.framing is None:
+                        continue
+                if self.framing == "binary":
+                    for frame in frames:
+                        self.out_queue.put((self.device, BAD_FRAME if frame[1] is None else frame, timestamp))
+                else:
+                    for line in lines:
+                        self.out_queue.put((self.device, line, timestamp))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.out_queue.put((self.device, None, None))
+
+class CaptureReader(threading.Thread):
+    """
+    Feeds one device's responses from a raw capture file into the shared
+    queue: records with a challenge index as binary frames, so the engine
+    batches them by challenge and drops those before its journal
+    progress, and version 1 records as hex lines.
+    """
+
+    def __init__(self, device, capture_file, out_queue, speed=None, session=None):
+        super().__init__(name=f"replay-{device}", daemon=True)
+        self.device = device
+        self.capture_file = capture_file
+        self.out_queue = out_queue
+        self.speed = speed
+        self.session = session
+        self.stop_event = threading.Event()
+        self.error = None
+        self.backlog = None
+
+    def run(self):
+        try:
+            records = iter_records(self.capture_file, self.speed, [self.device], self.session)
+            for device, challenge, payload, timestamp in records:
+                if self.stop_event.is_set():
+                    break
+                if challenge < 0:
+                    self.out_queue.put((device, payload.hex().upper()[-RESPONSE_HEX_LEN:].encode(), timestamp))
+                else:
+                    self.out_queue.put((device, (challenge % INDEX_MODULUS, payload), timestamp))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.out_queue.put((self.device, None, None))
+
+    def close(self):
+        pass
+
+# === ENGINE ===
+class AcquisitionEngine:
+    """
+    Collects responses from several boards at once. One PortReader thread
+    per serial port feeds a shared queue; the processing stage (run) batches
+    lines per device and computes majority/reliability.
+
+    Each row is appended to a ResponseJournal as soon as it is produced. A
+    run that stops early leaves its journal behind and the next run on the
+    same result file resumes each device after its last completed challenge
+    (set skip_completed if the boards restart from their first challenge,
+    so the lines of completed challenges are discarded). Once every device
+    is complete the journal is converted to the xlsx layout.
+
+    With raw_capture_file set, the raw lines of every completed batch are
+    also kept in a compressed RawCaptureWriter file, tagged with their
+    challenge index, for offline reprocessing / replay. Each run adds a
+    session to the file.
+
+    Live counters (lines/sec, malformed lines, batch latency, backlogs,
+    reliability histogram) are kept in `metrics` and logged to metrics_file
+    (default: next to the xlsx file, metrics_file=False disables the log).
+
+    framing selects the serial format: "line" reads hex text lines one
+    readline at a time, "binary" / "auto" use a ChunkedPortReader. Binary
+    frames carry their challenge index: frames of another challenge than
+    the one being collected are dropped as misaligned (so skip_completed
+    is not needed), and a frame of a later challenge closes a batch that
+    lost frames as a short batch. A challenge whose frames were all lost
+    holds its device back; the journal resumes there on the next run.
+
+    With longitudinal set (a LongitudinalStore or its directory), a
+    complete run is also recorded there, tagged with `conditions`
+    ({"temperature_c": 85, "vccint_v": 0.95, ...}), together with the
+    per-bit flip counts of the batches processed in this session.
+    """
+
+    def __init__(self, device_ports, xlsx_file, result_letter, batch_size=BATCH_SIZE,
+                 max_rows=MAX_ROWS, baud_rate=BAUD_RATE, timeout=TIMEOUT, on_progress=None,
+                 journal_file=None, fsync_every=FSYNC_EVERY, export_xlsx=True, skip_completed=False,
+                 raw_capture_file=None, metrics_file=None, metrics_interval=LOG_INTERVAL, framing=FRAMING,
+                 longitudinal=None, conditions=None):
+        if framing not in FRAMINGS:
+            raise ValueError(f"Unknown framing '{framing}', expected one of {FRAMINGS}")
+        self.device_ports = dict(device_ports)
+        self.xlsx_file = xlsx_file
+        self.result_letter = result_letter
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.baud_rate = baud_rate
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.journal_file = journal_file or journal_path_for(xlsx_file)
+        self.fsync_every = fsync_every
+        self.export_xlsx = export_xlsx
+        self.skip_completed = skip_completed
+        self.raw_capture_file = raw_capture_file
+        self.framing = framing
+        if metrics_file is None:
+            metrics_file = metrics_path_for(xlsx_file)
+        self.metrics = AcquisitionMetrics(self.device_ports, metrics_file or None, metrics_interval)
+        if isinstance(longitudinal, str):
+            longitudinal = LongitudinalStore(longitudinal)
+        self.longitudinal = longitudinal
+        self.conditions = dict(conditions or {})
+        self.longitudinal_records = []
+        self._bit_flips = {device: {} for device in self.device_ports}
+
+        self.progress = {device: 0 for device in self.device_ports}
+        self.errors = {}
+        self.elapsed_time = 0.0
+        self.complete = False
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._queue = queue.Queue()
+        self._readers = {}
+        self._skip = {}
+
+    def _open_ports(self):
+        opened_ports = {}
+        for device, port in self.device_ports.items():
+            if port in opened_ports:
+                self.errors[device] = f"{port} is already used by {opened_ports[port]}"
+                continue
+            try:
+                ser = open_serial(port, self.baud_rate, self.timeout)
+            except Exception as e:
+                self.errors[device] = str(e)
+                continue
+            opened_ports[port] = device
+            if self.framing == "line":
+                self._readers[device] = PortReader(device, ser, self._queue)
+            else:
+                self._readers[device] = ChunkedPortReader(device, ser, self._queue, self.framing)
+
+    def _open_journal(self):
+        journal = ResponseJournal(self.journal_file, self.fsync_every)
+        if journal.exported:
+            archive_journal(self.journal_file)
+            journal = ResponseJournal(self.journal_file, self.fsync_every)
+
+        if not journal.run:
+            journal.start_run(result_letter=self.result_letter, batch_size=self.batch_size, max_rows=self.max_rows)
+        elif journal.run.get("batch_size") != self.batch_size or journal.run.get("result_letter") != self.result_letter:
+            raise ValueError(
+                f"{self.journal_file} belongs to an unfinished run with different settings "
+                f"({journal.run}); export or remove it first"
+            )
+
+        for device in self._readers:
+            journal.start_device(device, f"{device} - {self.result_letter}")
+            self.progress[device] = journal.completed(device)
+            self._skip[device] = self.progress[device] * self.batch_size if self.skip_completed else 0
+        return journal
+
+    def stop(self):
+        """Stop the run; safe to call from another thread at any point, even before the ports are open."""
+        self._stop.set()
+        for reader in list(self._readers.values()):
+            reader.stop_event.set()
+
+    def run(self):
+        start_time = time.time()
+        try:
+            self._open_ports()
+            if self._stop.is_set():
+                for reader in self._readers.values():
+                    reader.close()
+                return
+            if not self._readers:
+                return
+
+            journal = self._open_journal()
+            capture = None
+            if self.raw_capture_file:
+                capture = RawCaptureWriter(
+                    self.raw_capture_file, n_hex=RESPONSE_HEX_LEN,
+                    result_letter=self.result_letter, batch_size=self.batch_size,
+                )
+            try:
+                self._process(journal, capture)
+            finally:
+                self.stop()
+                for reader in self._readers.values():
+                    reader.join(timeout=self.timeout + 1)
+                    reader.close()
+                    if reader.error is not None:
+                        self.errors[reader.device] = str(reader.error)
+                journal.close()
+                if capture is not None:
+                    capture.close()
+                self.metrics.close()
+
+            self.complete = all(journal.completed(d) >= self.max_rows for d in journal.headers)
+            columns = None
+            if self.complete and self.export_xlsx:
+                columns = journal_to_xlsx(journal, self.xlsx_file)
+            if self.complete and self.longitudinal is not None:
+                self.longitudinal_records = self.longitudinal.add_journal(
+                    journal, self.conditions, bit_flips=self._bit_flips,
+                    xlsx_file=self.xlsx_file if columns else None, columns=columns)
+        finally:
+            self.elapsed_time = time.time() - start_time
+            self.finished.set()
+
+    def _process(self, journal, capture=None):
+        batches = {device: [] for device in self._readers}
+        stamps = {device: [] for device in self._readers}
+        active = set(self._readers)
+
+        for device, reader in self._readers.items():
+            if self._stop.is_set() or self.progress[device] >= self.max_rows:
+                reader.stop_event.set()
+            reader.start()
+
+        while active:
+            try:
+                device, raw, timestamp = self._queue.get(timeout=self.metrics.log_interval)
+            except queue.Empty:
+                self._update_backlog()
+                self.metrics.maybe_log()
+                continue
+            self.metrics.maybe_log()
+            if raw is None:
+                active.discard(device)
+                batch = batches[device]
+                if batch and isinstance(batch[0], bytes) and self.progress[device] < self.max_rows:
+                    # frames of the last challenge that were lost can no longer arrive
+                    self.metrics.lost(device, self.batch_size - len(batch))
+                    self._finish_batch(journal, device, batch, capture, stamps[device])
+                continue
+            if self.progress[device] >= self.max_rows:
+                continue
+            batch = batches[device]
+
+            if isinstance(raw, tuple):
+                # binary frame: (challenge index, payload bytes)
+                index, response = raw
+                if 2 * len(response) != RESPONSE_HEX_LEN:
+                    self.metrics.line(device, False)
+                    continue
+                self.metrics.line(device, True, timestamp)
+                ahead = (index - self.progress[device]) % INDEX_MODULUS
+                if ahead and ahead < INDEX_MODULUS // 2 and batch:
+                    # the board moved on: the rest of this challenge's frames were lost
+                    self.metrics.lost(device, self.batch_size - len(batch))
+                    self._finish_batch(journal, device, batch, capture, stamps[device])
+                    if self.progress[device] >= self.max_rows:
+                        continue
+                    ahead = (index - self.progress[device]) % INDEX_MODULUS
+                if ahead:
+                    self.metrics.misaligned(device)
+                    continue
+            else:
+                response = raw.decode(errors='ignore').strip()
+                if not response:
+                    continue
+                if len(response) != RESPONSE_HEX_LEN or not is_hex(response):
+                    self.metrics.line(device, False)
+                    continue
+                self.metrics.line(device, True, timestamp)
+                if self._skip[device]:
+                    self._skip[device] -= 1
+                    continue
+
+            batch.append(response)
+            stamps[device].append(timestamp)
+            if len(batch) >= self.batch_size:
+                self._finish_batch(journal, device, batch, capture, stamps[device])
+
+    def _finish_batch(self, journal, device, batch, capture, stamps):
+        if capture is not None:
+            # the row is the challenge index (a frame index, unwrapped)
+            for response, timestamp in zip(batch, stamps):
+                capture.append(device, response, timestamp, self.progress[device])
+        stamps.clear()
+        batch_start = time.perf_counter()
+        if self.longitudinal is not None:
+            majority_hex, reliability, flips = process_batch(batch, bit_flips=True)
+            self._bit_flips[device][self.progress[device]] = (flips, len(batch))
+        else:
+            majority_hex, reliability = process_batch(batch)
+        batch.clear()
+
+        journal.append(device, self.progress[device], majority_hex, reliability)
+        self.metrics.batch(device, time.perf_counter() - batch_start, reliability)
+        self._update_backlog()
+
+        self.progress[device] += 1
+        if self.progress[device] >= self.max_rows:
+            self._readers[device].stop_event.set()
+        if self.on_progress:
+            self.on_progress(device, self.progress[device])
+
+    def _update_backlog(self):
+        self.metrics.backlog(self._queue.qsize(), {d: r.backlog for d, r in self._readers.items()})
+
+class ReplayEngine(AcquisitionEngine):
+    """
+    Runs a raw capture file through the same processing pipeline instead of
+    serial ports. speed=None replays as fast as possible, speed=k at k x the
+    recorded rate. Devices default to every device in the capture and the
+    sessions to all of them, in order; session=n replays only one.
+    """
+
+    def __init__(self, capture_file, xlsx_file, result_letter, devices=None, speed=None, session=None, **kwargs):
+        if devices is None:
+            devices = list_devices(capture_file)
+        super().__init__({device: capture_file for device in devices}, xlsx_file, result_letter, **kwargs)
+        self.capture_file = capture_file
+        self.speed = speed
+        self.session = session
+
+    def _open_ports(self):
+        for device in self.device_ports:
+            self._readers[device] = CaptureReader(device, self.capture_file, self._queue, self.speed, self.session)
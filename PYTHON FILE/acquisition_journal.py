@@ -0,0 +1,163 @@
+import os
+import json
+import time
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+from response_cache import invalidate
+
+# === CONFIGURATION ===
+JOURNAL_SUFFIX = ".journal.jsonl"
+FSYNC_EVERY = 16  # records between fsync calls
+
+def journal_path_for(xlsx_file):
+    return os.path.splitext(xlsx_file)[0] + JOURNAL_SUFFIX
+
+# === JOURNAL ===
+class ResponseJournal:
+    """
+    Append-only JSON-lines log of one acquisition run. Every majority
+    response / reliability row is written and flushed as it is produced and
+    fsync'ed every `fsync_every` rows, so a crash loses at most the record
+    being written. A truncated last line is dropped when the journal is
+    reopened, and the run resumes after the last completed challenge.
+
+    Records:
+      {"run": {...}}                                   run parameters
+      {"device": d, "header": h}                       device column started
+      {"device": d, "challenge": i, "majority": hex, "reliability": r}
+      {"exported": path}                               converted to xlsx
+    """
+
+    def __init__(self, path, fsync_every=FSYNC_EVERY):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.run = {}
+        self.headers = {}
+        self.rows = {}
+        self.exported = False
+        self._file = None
+        self._pending = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    break
+                valid_bytes += len(raw)
+                self._apply(record)
+        # drop a partially written tail so appends start on a clean line
+        if valid_bytes != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+    def _apply(self, record):
+        if "run" in record:
+            self.run = record["run"]
+        elif "exported" in record:
+            self.exported = True
+        elif "header" in record:
+            self.headers[record["device"]] = record["header"]
+            self.rows.setdefault(record["device"], [])
+        else:
+            self.rows.setdefault(record["device"], []).append(
+                (record["challenge"], record["majority"], record["reliability"])
+            )
+
+    def completed(self, device):
+        """Number of challenges already recorded for a device."""
+        return len(self.rows.get(device, []))
+
+    def _write(self, record, sync=False):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self._pending += 1
+        if sync or self._pending >= self.fsync_every:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._apply(record)
+
+    def start_run(self, **params):
+        self._write({"run": dict(params, started=time.strftime("%Y-%m-%d %H:%M:%S"))}, sync=True)
+
+    def start_device(self, device, header):
+        if device not in self.headers:
+            self._write({"device": device, "header": header}, sync=True)
+
+    def append(self, device, challenge, majority_hex, reliability):
+        self._write({"device": device, "challenge": challenge, "majority": majority_hex, "reliability": reliability})
+
+    def mark_exported(self, xlsx_file):
+        self._write({"exported": xlsx_file}, sync=True)
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._pending = 0
+
+def archive_journal(path):
+    """Move an exported journal aside so the next run starts a fresh one."""
+    archived = f"{path[:-len(JOURNAL_SUFFIX)]} {time.strftime('%Y%m%d-%H%M%S')}{JOURNAL_SUFFIX}"
+    os.replace(path, archived)
+    return archived
+
+# === XLSX CONVERSION ===
+def next_empty_col(ws):
+    col_idx = 1
+    while ws.cell(row=2, column=col_idx).value not in (None, ""):
+        col_idx += 1
+    return col_idx
+
+def open_result_workbook(xlsx_file):
+    if os.path.exists(xlsx_file):
+        return load_workbook(xlsx_file)
+    wb = Workbook()
+    if 'Sheet' in wb.sheetnames:
+        wb.remove(wb['Sheet'])
+    wb.create_sheet("Majority HEX")
+    wb.create_sheet("Reliability")
+    return wb
+
+def journal_to_xlsx(journal, xlsx_file):
+    """
+    Append every device column of a journal to the result workbook in the
+    Majority HEX / Reliability layout, then mark the journal exported.
+    Returns {device: 0-based Majority HEX column it was written to}.
+    """
+    if isinstance(journal, str):
+        journal = ResponseJournal(journal)
+
+    wb = open_result_workbook(xlsx_file)
+    sheet1 = wb["Majority HEX"]
+    sheet2 = wb["Reliability"]
+    col1_idx = next_empty_col(sheet1)
+    col2_idx = next_empty_col(sheet2)
+
+    columns = {}
+    for offset, (device, header) in enumerate(journal.headers.items()):
+        col1_letter = get_column_letter(col1_idx + offset)
+        col2_letter = get_column_letter(col2_idx + offset)
+        sheet1[f"{col1_letter}1"] = header
+        sheet2[f"{col2_letter}1"] = header
+        columns[device] = col1_idx + offset - 1
+        for challenge, majority_hex, reliability in journal.rows.get(device, []):
+            sheet1[f"{col1_letter}{challenge + 2}"] = majority_hex
+            sheet2[f"{col2_letter}{challenge + 2}"] = round(reliability, 2)
+
+    wb.save(xlsx_file)
+    invalidate(xlsx_file)
+    journal.mark_exported(xlsx_file)
+    journal.close()
+    return columns
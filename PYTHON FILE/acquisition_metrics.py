@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+# === CONFIGURATION ===
+METRICS_SUFFIX = ".metrics.jsonl"
+LOG_INTERVAL = 5.0          # seconds between metrics log records
+RATE_WINDOW = 10.0          # seconds of history for the lines/sec rate
+RELIABILITY_BIN_WIDTH = 5   # % per reliability histogram bin
+TREND_LENGTH = 32           # recent reliabilities kept per device
+
+def metrics_path_for(xlsx_file):
+    return os.path.splitext(xlsx_file)[0] + METRICS_SUFFIX
+
+# === METRICS ===
+class DeviceMetrics:
+    def __init__(self):
+        self.lines = 0
+        self.malformed = 0
+        self.misaligned = 0
+        self.lost = 0
+        self.batches = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.last_latency = 0.0
+        self.queue_delay = 0.0
+        self.serial_backlog = 0
+        self.histogram = [0] * (100 // RELIABILITY_BIN_WIDTH + 1)
+        self.trend = deque(maxlen=TREND_LENGTH)
+        self.line_times = deque()
+
+class AcquisitionMetrics:
+    """
+    Live counters of an acquisition run, updated by the processing stage and
+    read by front-ends through snapshot() (which only holds a short lock,
+    so the readers and the processing loop never wait for a GUI).
+
+    Per device: valid and malformed lines, binary frames dropped for a
+    wrong challenge index (misaligned) and responses missing from short
+    batches (lost), lines/sec over the last RATE_WINDOW seconds, batch
+    processing latency, delay between a line being read and processed,
+    serial input backlog and a histogram / trend of batch reliabilities.
+    Records are appended to a JSON-lines metrics log every `log_interval`
+    seconds when a log file is given.
+    """
+
+    def __init__(self, devices, log_file=None, log_interval=LOG_INTERVAL):
+        self.devices = {device: DeviceMetrics() for device in devices}
+        self.log_file = log_file
+        self.log_interval = log_interval
+        self.start_time = time.time()
+        self.queue_backlog = 0
+        self._lock = threading.Lock()
+        self._last_log = self.start_time
+        self._log = None
+
+    # --- updates (processing thread) ---
+    def line(self, device, valid, received=None):
+        now = time.time()
+        with self._lock:
+            m = self.devices[device]
+            if not valid:
+                m.malformed += 1
+                return
+            m.lines += 1
+            m.line_times.append(now)
+            if received is not None:
+                m.queue_delay = now - received
+            while m.line_times and now - m.line_times[0] > RATE_WINDOW:
+                m.line_times.popleft()
+
+    def misaligned(self, device):
+        with self._lock:
+            self.devices[device].misaligned += 1
+
+    def lost(self, device, responses):
+        with self._lock:
+            self.devices[device].lost += responses
+
+    def batch(self, device, latency, reliability):
+        with self._lock:
+            m = self.devices[device]
+            m.batches += 1
+            m.last_latency = latency
+            m.latency_total += latency
+            m.latency_max = max(m.latency_max, latency)
+            m.histogram[min(int(reliability // RELIABILITY_BIN_WIDTH), len(m.histogram) - 1)] += 1
+            m.trend.append(reliability)
+
+    def backlog(self, queue_size, serial_backlogs):
+        with self._lock:
+            self.queue_backlog = queue_size
+            for device, waiting in serial_backlogs.items():
+                if device in self.devices and waiting is not None:
+                    self.devices[device].serial_backlog = waiting
+
+    # --- reading (any thread) ---
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            devices = {}
+            for device, m in self.devices.items():
+                window = min(RATE_WINDOW, now - self.start_time) or 1e-9
+                total = m.lines + m.malformed
+                devices[device] = {
+                    "lines": m.lines,
+                    "malformed": m.malformed,
+                    "malformed_rate": m.malformed / total * 100 if total else 0.0,
+                    "misaligned": m.misaligned,
+                    "lost": m.lost,
+                    "lines_per_sec": sum(1 for t in m.line_times if now - t <= RATE_WINDOW) / window,
+                    "batches": m.batches,
+                    "batch_latency_ms": m.last_latency * 1000,
+                    "mean_batch_latency_ms": m.latency_total / m.batches * 1000 if m.batches else 0.0,
+                    "max_batch_latency_ms": m.latency_max * 1000,
+                    "queue_delay_ms": m.queue_delay * 1000,
+                    "serial_backlog": m.serial_backlog,
+                    "reliability_histogram": list(m.histogram),
+                    "reliability_trend": list(m.trend),
+                }
+            return {
+                "time": now,
+                "elapsed": now - self.start_time,
+                "queue_backlog": self.queue_backlog,
+                "lines_per_sec": sum(d["lines_per_sec"] for d in devices.values()),
+                "devices": devices,
+            }
+
+    # --- metrics log ---
+    def maybe_log(self, force=False):
+        if not self.log_file:
+            return
+        now = time.time()
+        if not force and now - self._last_log < self.log_interval:
+            return
+        self._last_log = now
+        snapshot = self.snapshot()
+        if self._log is None:
+            self._log = open(self.log_file, "a", encoding="utf-8")
+        self._log.write(json.dumps(snapshot) + "\n")
+        self._log.flush()
+
+    def close(self):
+        self.maybe_log(force=True)
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+def histogram_labels():
+    return [f"{lo}-{lo + RELIABILITY_BIN_WIDTH}%" for lo in range(0, 100, RELIABILITY_BIN_WIDTH)] + ["100%"]
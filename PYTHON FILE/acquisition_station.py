@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+from acquisition_engine import AcquisitionEngine
+from longitudinal_store import LongitudinalStore
+
+# === CONFIGURATION ===
+DEVICE_COM_PORT_MAP = {
+    "F1": "COM18",
+    "F2": "COM24",
+    "F3": "COM8",
+    "F4": "COM22",
+    "F5": "COM20",
+    "F6": "COM12",
+    "F7": "COM14",
+    "F8": "COM4",
+    "F9": "COM10",
+    "F10": "COM16",
+    "F11": "COM31",
+    "F12": "COM19",
+    "F13": "COM35",
+    "F14": "COM37",
+    "F15": "COM33",
+    "F17": "COM41",
+    "F16": "COM43",
+    "F18": "COM29",
+    "F19": "COM30",
+    "F20": "COM10"
+}
+
+RESULT_LETTERS = [chr(ord('A') + i) for i in range(12)]  # A to L
+ALL_DEVICES = "ALL"
+
+SAVE_DIR = r'C:\\ROPUF\\FINAL RESULTS'
+
+ALARM_DURATION = 10000  # milliseconds
+ALARM_FREQ = 750        # Hz
+
+# === STATION ===
+def result_file_path(result_letter, save_dir=SAVE_DIR):
+    os.makedirs(save_dir, exist_ok=True)
+    return os.path.join(save_dir, f"RESULTS {result_letter}.xlsx")
+
+def resolve_devices(device, port_map=DEVICE_COM_PORT_MAP):
+    """{device: port} for one device name, ALL or a comma-separated list."""
+    if device == ALL_DEVICES:
+        return dict(port_map)
+    names = [d.strip() for d in device.split(",") if d.strip()]
+    unknown = [d for d in names if d not in port_map]
+    if unknown or not names:
+        raise ValueError(f"Unknown device(s): {', '.join(unknown) or device}")
+    return {d: port_map[d] for d in names}
+
+def play_alarm(duration=ALARM_DURATION, freq=ALARM_FREQ):
+    """Beep through winsound on Windows, the terminal bell elsewhere."""
+    try:
+        import winsound
+    except ImportError:
+        sys.stdout.write("\a")
+        sys.stdout.flush()
+        return
+    winsound.Beep(freq, duration)
+
+# === QUEUED RUNS ===
+def run_queue(jobs, save_dir=SAVE_DIR, raw_capture_dir=None, on_start=None, on_status=None,
+              on_finish=None, status_interval=5.0, longitudinal_dir=None, **engine_kwargs):
+    """
+    Run acquisitions back to back without a GUI. jobs is a list of
+    ({device: port}, result_letter); each one gets its own
+    AcquisitionEngine on RESULTS <letter>.xlsx (plus the raw capture file
+    raw_capture_dir/RESULTS <letter>.capture if given; later runs of the
+    same letter append a new session to it). With longitudinal_dir, complete
+    runs are recorded in the LongitudinalStore longitudinal_dir/RESULTS
+    <letter>, one store per design, so a board is only ever compared with
+    its own earlier runs of the same design. on_start(engine) / on_finish(engine) are
+    called around each run and on_status(engine, snapshot) every
+    status_interval seconds while it is in progress. Ctrl+C stops the
+    current run (its journal is kept for resuming) and skips the rest.
+    Returns the engines that ran, in job order.
+    """
+    engines = []
+    stores = {}
+    for device_ports, result_letter in jobs:
+        kwargs = dict(engine_kwargs)
+        if longitudinal_dir:
+            if result_letter not in stores:
+                stores[result_letter] = LongitudinalStore(os.path.join(longitudinal_dir, f"RESULTS {result_letter}"))
+            kwargs["longitudinal"] = stores[result_letter]
+        if raw_capture_dir:
+            os.makedirs(raw_capture_dir, exist_ok=True)
+            kwargs["raw_capture_file"] = os.path.join(raw_capture_dir, f"RESULTS {result_letter}.capture")
+        engine = AcquisitionEngine(device_ports, result_file_path(result_letter, save_dir), result_letter, **kwargs)
+        engines.append(engine)
+        if on_start:
+            on_start(engine)
+        worker = threading.Thread(target=engine.run, name=f"acquisition-{result_letter}", daemon=True)
+        worker.start()
+        interrupted = False
+        try:
+            while not engine.finished.wait(status_interval):
+                if on_status:
+                    on_status(engine, engine.metrics.snapshot())
+        except KeyboardInterrupt:
+            interrupted = True
+            engine.stop()
+            engine.finished.wait()
+        if on_finish:
+            on_finish(engine)
+        if interrupted:
+            break
+    return engines
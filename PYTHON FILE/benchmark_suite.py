@@ -0,0 +1,426 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import itertools
+import statistics
+import importlib.util
+from collections import Counter
+import numpy as np
+from numpy import append, array, clip, cumsum, transpose, where
+from scipy.special import gammaincc
+from openpyxl import load_workbook, Workbook
+from puf_metrics import pack_hex, batch_majority, challenge_metrics, calculate_uniqueness
+from response_cache import DesignResponses, load_design, clear_memory
+from combination_scoring import CombinationCache
+from combination_search import search_combinations, scalar_score
+from metrics_cube import MetricsCube
+from workbook_io import read_sheets, combine_sheets, clear_cache, MAJORITY_SHEET, RELIABILITY_SHEET
+from nist_tests import RandomExcursions, run_suite
+
+# === CONFIGURATION ===
+# (designs, chips, challenges) of each synthetic dataset
+SCALES = {
+    "small": (1, 20, 256),
+    "medium": (4, 20, 256),
+    "full": (12, 20, 256),
+    "large": (12, 100, 1024),
+}
+BATCH_SIZE = 128           # raw responses per challenge for the majority benchmark
+N_BITS = 256
+NOISE = 0.02               # raw response bit flip probability
+REPEAT = 3                 # timed repetitions per case (best and median are kept)
+LEGACY_LIMIT = 2.0         # seconds a legacy baseline may run before it is sampled instead
+COMBINATION_SIZE = 4
+RANDOMNESS_BITS = 1 << 20  # bits per design stream for the randomness tests
+# Pure-Python and workbook-per-combination baselines only run on these
+# scales; above them they take hours or need several GB
+BASELINE_SCALES = ("small", "medium", "full")
+
+MIN_MAXING_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "4 WAY DESIGN PARAMETERS MIN-MAXING.py")
+
+# === LEGACY BASELINES ===
+# The original pure-Python implementations, kept verbatim as reference points.
+def legacy_hex_to_bin(hex_string):
+    return bin(int(hex_string, 16))[2:].zfill(len(hex_string) * 4)
+
+def legacy_hamming_distance(bin1, bin2):
+    return sum(c1 != c2 for c1, c2 in zip(bin1, bin2))
+
+def legacy_calculate_uniqueness(responses):
+    bins = [legacy_hex_to_bin(r) for r in responses if r]
+    k = len(bins)
+    if k < 2:
+        return 0.0
+    n = len(bins[0])
+    total_norm_hd = sum(legacy_hamming_distance(bins[i], bins[j]) / n for i in range(k) for j in range(i + 1, k))
+    return (2 * total_norm_hd / (k * (k - 1))) * 100
+
+def legacy_calculate_uniformity(responses):
+    bins = [legacy_hex_to_bin(r) for r in responses if r]
+    total_ones = sum(b.count('1') for b in bins)
+    total_bits = len(bins) * len(bins[0])
+    return (total_ones / total_bits) * 100 if total_bits else 0.0
+
+def legacy_compute_majority_bits(bin_list):
+    transposed = zip(*bin_list)
+    return ''.join(Counter(bits).most_common(1)[0][0] for bits in transposed)
+
+def legacy_process_batch(batch):
+    """Majority hex and reliability of one batch, as the original acquisition loop did."""
+    bins = [''.join(f"{int(c, 16):04b}" for c in h) for h in batch]
+    majority = legacy_compute_majority_bits(bins)
+    avg_hd = sum(legacy_hamming_distance(b, majority) for b in bins) / len(bins)
+    majority_hex = ''.join(f"{int(majority[i:i+4], 2):X}" for i in range(0, len(majority), 4))
+    return majority_hex, 100 - (avg_hd / len(majority)) * 100
+
+def legacy_random_excursions(binary_data):
+    length = len(binary_data)
+    sequence_x = [-1.0 if bit == '0' else 1.0 for bit in binary_data]
+    cumulative_sum = cumsum(sequence_x)
+    cumulative_sum = append([0], append(cumulative_sum, [0]))
+    x_values = array([-4, -3, -2, -1, 1, 2, 3, 4])
+    position = where(cumulative_sum == 0)[0]
+    if len(position) <= 1:
+        return [0.0] * len(x_values)
+    cycles = [cumulative_sum[position[i]:position[i + 1] + 1] for i in range(len(position) - 1)]
+    num_cycles = len(cycles)
+    state_count = [[cycle.tolist().count(state) for state in x_values] for cycle in cycles]
+    state_count = transpose(clip(state_count, 0, 5))
+    su = transpose([[(sct == cycle).sum() for sct in state_count] for cycle in range(6)])
+    pi = [[RandomExcursions.get_pi_value(k, state) for k in range(6)] for state in x_values]
+    inner_term = num_cycles * array(pi)
+    xObs = ((array(su) - inner_term) ** 2 / inner_term).sum(axis=1)
+    return [gammaincc(2.5, cs / 2.0) for cs in xObs]
+
+def legacy_analyze_combination(filepath, start_row=2, end_row=257):
+    wb = load_workbook(filepath)
+    sheet1 = wb[MAJORITY_SHEET]
+    sheet2 = wb[RELIABILITY_SHEET]
+    groups = []
+    for row in sheet1.iter_rows(min_row=start_row, max_row=end_row, min_col=1, max_col=sheet1.max_column, values_only=True):
+        vals = [cell for cell in row if cell not in (None, "")]
+        if vals:
+            groups.append(vals)
+    uniquenesses = [legacy_calculate_uniqueness(grp) for grp in groups]
+    uniformities = [legacy_calculate_uniformity(grp) for grp in groups]
+    counts = [len(grp) for grp in groups]
+    total_samples = sum(counts) or 1
+    reliability_values = [cell[0] for cell in sheet2.iter_rows(min_row=start_row, max_row=end_row, min_col=1, max_col=1, values_only=True) if cell[0] is not None]
+    return (
+        sum(u * c for u, c in zip(uniquenesses, counts)) / total_samples,
+        sum(v * c for v, c in zip(uniformities, counts)) / total_samples,
+        sum(reliability_values) / len(reliability_values) if reliability_values else 0.0,
+    )
+
+def legacy_write_workbook(path, majority_rows, reliability_rows, header):
+    """Cell-by-cell workbook writing, as the original scripts did."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = MAJORITY_SHEET
+    wr = wb.create_sheet(RELIABILITY_SHEET)
+    for col, label in enumerate(header, start=1):
+        ws.cell(row=1, column=col).value = label
+        wr.cell(row=1, column=col).value = label
+    for r, (maj, rel) in enumerate(zip(majority_rows, reliability_rows), start=2):
+        for col, (m, v) in enumerate(zip(maj, rel), start=1):
+            ws.cell(row=r, column=col).value = m
+            wr.cell(row=r, column=col).value = v
+    wb.save(path)
+
+# === SYNTHETIC DATA ===
+class SyntheticDataset:
+    """
+    Random majority responses for `designs` x `chips` x `challenges`
+    (packed (D, C, M, 32) uint8) with reliabilities, plus one chip's raw
+    batches (C, BATCH_SIZE, 32) with NOISE bit flips around its majority.
+    Workbooks are written on demand to a temporary directory.
+    """
+
+    def __init__(self, designs, chips, challenges, seed=0):
+        rng = np.random.default_rng(seed)
+        self.shape = (designs, chips, challenges)
+        self.packed = rng.integers(0, 256, (designs, challenges, chips, N_BITS // 8), dtype=np.uint8)
+        self.valid = np.ones((designs, challenges, chips), dtype=bool)
+        self.reliability = np.round(100 - rng.gamma(2.0, 0.8, (designs, challenges, chips)), 2)
+        flips = np.packbits(rng.random((challenges, BATCH_SIZE, N_BITS)) < NOISE, axis=-1)
+        self.raw = self.packed[0, :, :1, :] ^ flips
+        self.labels = [f"RESULTS {chr(ord('A') + d)}" if d < 26 else f"RESULTS {d}" for d in range(designs)]
+        self.header = [f"F{m + 1} - A" for m in range(chips)]
+        self.workdir = tempfile.mkdtemp(prefix="ropuf-bench-")
+        self._paths = {}
+
+    def hex_rows(self, design):
+        """Per-challenge lists of majority hex strings, the legacy input format."""
+        return [[row.tobytes().hex().upper() for row in challenge] for challenge in self.packed[design]]
+
+    def raw_batches_hex(self):
+        return [[row.tobytes().hex().upper() for row in batch] for batch in self.raw]
+
+    def designs(self):
+        return [
+            DesignResponses(self.header, self.header, self.packed[d], self.valid[d],
+                            self.reliability[d], N_BITS, 2)
+            for d in range(self.shape[0])
+        ]
+
+    def bit_streams(self, max_bits=RANDOMNESS_BITS):
+        """(designs, bits) 0/1 array: each design's responses concatenated, cut to max_bits."""
+        n_bytes = min(self.packed[0].size, max_bits // 8)
+        return np.unpackbits(self.packed.reshape(self.shape[0], -1)[:, :n_bytes], axis=-1)
+
+    def workbook_path(self, design):
+        """RESULTS workbook of one design (written on first use)."""
+        if design not in self._paths:
+            path = os.path.join(self.workdir, f"{self.labels[design]}.xlsx")
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(MAJORITY_SHEET)
+            ws.append(self.header)
+            for row in self.hex_rows(design):
+                ws.append(row)
+            wr = wb.create_sheet(RELIABILITY_SHEET)
+            wr.append(self.header)
+            for row in self.reliability[design].tolist():
+                wr.append(row)
+            wb.save(path)
+            self._paths[design] = path
+        return self._paths[design]
+
+    def cleanup(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+# === TIMING ===
+def time_call(func, repeat=REPEAT):
+    """(best, median) wall time in seconds of `repeat` calls."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+def time_items(func, items, limit=LEGACY_LIMIT, prepare=None):
+    """
+    Time func(item) over items one at a time, stopping once `limit` seconds
+    are spent; prepare(item), if given, runs untimed first and its result is
+    what func gets. Returns (items measured, seconds, extrapolated seconds for all).
+    """
+    elapsed = 0.0
+    done = 0
+    for item in items:
+        if prepare:
+            item = prepare(item)
+        start = time.perf_counter()
+        func(item)
+        elapsed += time.perf_counter() - start
+        done += 1
+        if elapsed >= limit:
+            break
+    return done, elapsed, elapsed / done * len(items) if done else 0.0
+
+def record(case, impl, scale, items, best, median=None, sampled=None):
+    rec = {
+        "case": case, "impl": impl, "scale": scale, "items": items,
+        "seconds": best, "median_seconds": median if median is not None else best,
+        "per_item_us": best / items * 1e6 if items else None,
+    }
+    if sampled is not None:
+        rec["sampled_items"] = sampled
+    return rec
+
+def sampled_record(case, impl, scale, func, items, prepare=None):
+    """Record for a slow per-item implementation, extrapolated when it was cut short; None above BASELINE_SCALES."""
+    if scale not in BASELINE_SCALES:
+        return None
+    done, _, total = time_items(func, items, prepare=prepare)
+    return record(case, impl, scale, len(items), total, sampled=done if done < len(items) else None)
+
+def legacy_record(case, scale, func, items):
+    return sampled_record(case, "legacy", scale, func, items)
+
+# === CHECKS ===
+def check_combination_search(cache, size, objective="uniqueness", top_k=10):
+    """
+    Compare the pruned search against scoring every combination; raises
+    RuntimeError if the top-k differs or, with more combinations than
+    top_k, if no subtree was pruned. Returns the search result.
+    """
+    combos = list(itertools.combinations(range(len(cache.labels)), size))
+    brute = sorted((scalar_score(cache.score(c), objective), c) for c in combos)[:top_k]
+    result = search_combinations(cache, size, top_k=top_k, objective=objective, pareto=False, workers=1)
+    found = [row["combo"] for row in result["top"]]
+    if found != [c for _, c in brute]:
+        raise RuntimeError(f"Pruned {objective} search returned {found}, expected {[c for _, c in brute]}")
+    if len(combos) > top_k and not result["pruned"]:
+        raise RuntimeError(f"Search of {len(combos)} combinations of {size} pruned nothing")
+    return result
+
+# === CASES ===
+def bench_hex_decode(data, scale):
+    responses = [h for row in data.hex_rows(0) for h in row]
+    best, median = time_call(lambda: pack_hex(responses))
+    return [
+        legacy_record("hex_decode", scale, legacy_hex_to_bin, responses),
+        record("hex_decode", "pack_hex", scale, len(responses), best, median),
+    ]
+
+def bench_majority(data, scale):
+    batches = data.raw_batches_hex()
+    best, median = time_call(lambda: batch_majority(pack_hex([r for b in batches for r in b])[0].reshape(len(batches), BATCH_SIZE, -1), N_BITS))
+    return [
+        legacy_record("majority", scale, legacy_process_batch, batches),
+        record("majority", "batch_majority", scale, len(batches), best, median),
+    ]
+
+def bench_uniqueness(data, scale):
+    groups = data.hex_rows(0)
+    designs = data.designs()[:1]
+    best, median = time_call(lambda: challenge_metrics(groups))
+    cube_best, cube_median = time_call(lambda: MetricsCube.from_designs(designs, data.labels[:1]).uniqueness())
+    popcount_best, popcount_median = time_call(lambda: challenge_metrics(groups, method="popcount"))
+    return [
+        legacy_record("uniqueness", scale, legacy_calculate_uniqueness, groups),
+        record("uniqueness", "calculate_uniqueness", scale, len(groups), *time_call(lambda: [calculate_uniqueness(g) for g in groups], 1)),
+        record("uniqueness", "challenge_metrics", scale, len(groups), best, median),
+        record("uniqueness", "metrics_cube", scale, len(groups), cube_best, cube_median),
+        record("uniqueness", "popcount", scale, len(groups), popcount_best, popcount_median),
+    ]
+
+def bench_combination_sweep(data, scale):
+    n_designs = data.shape[0]
+    size = min(COMBINATION_SIZE, n_designs)
+    combos = list(itertools.combinations(range(n_designs), size))
+    designs = data.designs()
+    max_row = data.shape[2] + 1
+
+    def sweep():
+        cache = CombinationCache.from_designs(designs, data.labels)
+        search_combinations(cache, size, objective="uniqueness", workers=1)
+
+    def combined_path(combo):
+        # combination workbooks are written outside the timed analysis, once
+        path = os.path.join(data.workdir, f"combination {'-'.join(map(str, combo))}.xlsx")
+        if not os.path.exists(path):
+            combine_sheets([data.workbook_path(i) for i in combo], path, max_row=max_row)
+        return path
+
+    analyze = load_script(MIN_MAXING_SCRIPT).analyze_combination
+    check_combination_search(CombinationCache.from_designs(designs, data.labels), size)
+    best, median = time_call(sweep)
+    return [
+        sampled_record("combination_sweep", "legacy", scale,
+                       lambda path: legacy_analyze_combination(path, 2, max_row), combos, combined_path),
+        sampled_record("combination_sweep", "analyze_combination", scale,
+                       lambda path: analyze(path, 2, max_row), combos, combined_path),
+        record("combination_sweep", "combination_cache", scale, len(combos), best, median),
+    ]
+
+def bench_workbook_io(data, scale):
+    paths = [data.workbook_path(d) for d in range(min(COMBINATION_SIZE, data.shape[0]))]
+    rows = data.hex_rows(0)
+    rel = data.reliability[0].tolist()
+    out = os.path.join(data.workdir, "save.xlsx")
+    combined = os.path.join(data.workdir, "combined.xlsx")
+
+    def cold_load():
+        clear_cache()
+        clear_memory()
+        read_sheets(paths[0], cache=False)
+
+    def cached_load():
+        clear_memory()
+        load_design(paths[0])
+
+    load_design(paths[0])  # warm the disk cache
+    return [
+        record("workbook_load", "legacy", scale, 1,
+               *time_call(lambda: [list(ws.iter_rows(values_only=True)) for ws in load_workbook(paths[0]).worksheets])),
+        record("workbook_load", "read_sheets", scale, 1, *time_call(cold_load)),
+        record("workbook_load", "load_design_disk_cache", scale, 1, *time_call(cached_load)),
+        record("workbook_save", "legacy", scale, 1, *time_call(lambda: legacy_write_workbook(out, rows, rel, data.header))),
+        record("workbook_save", "combine_sheets", scale, len(paths),
+               *time_call(lambda: combine_sheets(paths, combined, max_row=data.shape[2] + 1))),
+    ]
+
+def bench_randomness(data, scale):
+    streams = data.bit_streams()
+    strings = [''.join(map(str, s)) for s in streams.tolist()]
+    best, median = time_call(lambda: RandomExcursions.batch(streams))
+    suite_best, suite_median = time_call(lambda: run_suite(streams, workers=1), 1)
+    return [
+        legacy_record("random_excursions", scale, legacy_random_excursions, strings),
+        record("random_excursions", "batch", scale, len(strings), best, median),
+        record("nist_suite", "run_suite", scale, len(strings), suite_best, suite_median),
+    ]
+
+CASES = {
+    "hex_decode": bench_hex_decode,
+    "majority": bench_majority,
+    "uniqueness": bench_uniqueness,
+    "combination_sweep": bench_combination_sweep,
+    "workbook_io": bench_workbook_io,
+    "randomness": bench_randomness,
+}
+
+# === RUNNER ===
+def load_script(path):
+    """Import one of the analysis scripts (file names with spaces) as a module."""
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0].replace(" ", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+def run_benchmarks(scales=None, cases=None, seed=0, on_result=None):
+    """
+    Run the selected cases on every selected scale. Returns
+    {"environment": ..., "results": [record, ...]}; on_result(record) is
+    called as each one is produced.
+    """
+    results = []
+    for scale in scales or list(SCALES):
+        data = SyntheticDataset(*SCALES[scale], seed=seed)
+        try:
+            for case in cases or list(CASES):
+                for rec in CASES[case](data, scale):
+                    if rec is None:
+                        continue
+                    results.append(rec)
+                    if on_result:
+                        on_result(rec)
+        finally:
+            data.cleanup()
+    return {"environment": environment(), "results": results}
+
+def write_results(path, report):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+def read_results(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def compare_results(baseline, current, tolerance=0.25):
+    """
+    [(case, impl, scale, baseline s, current s, ratio)] of every record in
+    both reports that got slower than baseline * (1 + tolerance).
+    """
+    key = lambda r: (r["case"], r["impl"], r["scale"])
+    before = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for rec in current["results"]:
+        old = before.get(key(rec))
+        if old and old["seconds"] and rec["seconds"] > old["seconds"] * (1 + tolerance):
+            regressions.append(key(rec) + (old["seconds"], rec["seconds"], rec["seconds"] / old["seconds"]))
+    return regressions
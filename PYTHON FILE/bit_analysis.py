@@ -0,0 +1,156 @@
+import numpy as np
+from openpyxl import Workbook
+from puf_metrics import unpack_bits, majority_vote
+from response_cache import load_design
+from raw_capture import capture_batches, read_capture_metadata, BATCH_SIZE
+from hex_conversion import load_packed
+
+# === CONFIGURATION ===
+ALIASING_TOLERANCE = 10.0   # bit positions with aliasing outside 50 +/- this (%) are biased
+FLIP_THRESHOLD = 0.05       # bits flipping in more than this fraction of a batch are unreliable
+
+# === BIT TENSORS ===
+def response_bits(packed, n_bits):
+    """(..., n_bytes) right-aligned packed responses -> (..., n_bits) uint8 bits, MSB first."""
+    return unpack_bits(np.ascontiguousarray(packed))[..., -n_bits:]
+
+def stack_designs(designs):
+    """
+    Pad response_cache.DesignResponses to common shapes:
+    packed (designs, challenges, chips, n_bytes), valid (designs, challenges, chips), n_bits.
+    """
+    if not designs:
+        raise ValueError("No designs to stack")
+    n_challenges = max(d.packed.shape[0] for d in designs)
+    n_chips = max(d.packed.shape[1] for d in designs)
+    n_bytes = max(d.n_bytes for d in designs)
+    packed = np.zeros((len(designs), n_challenges, n_chips, n_bytes), dtype=np.uint8)
+    valid = np.zeros((len(designs), n_challenges, n_chips), dtype=bool)
+    for i, d in enumerate(designs):
+        c, m, b = d.packed.shape
+        packed[i, :c, :m, n_bytes - b:] = d.packed
+        valid[i, :c, :m] = d.valid
+    n_bits = next((d.n_bits for d in designs if d.n_bits), 0)
+    return packed, valid, n_bits
+
+def binary_entropy(p):
+    """Shannon entropy (bits) of a Bernoulli(p) variable, elementwise; NaN stays NaN."""
+    p = np.asarray(p, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        h = -(p * np.log2(p) + (1 - p) * np.log2(1 - p))
+    return np.where((p == 0) | (p == 1), 0.0, h)
+
+# === INTER-CHIP (MAJORITY RESPONSES) ===
+def analyze_aliasing(packed, valid, n_bits, tolerance=ALIASING_TOLERANCE):
+    """
+    Per-bit-position statistics over chips for (designs, challenges, chips,
+    n_bytes) majority responses, in one pass:
+      aliasing            (designs, challenges, n_bits) % of chips with the bit set
+      aliasing_by_bit     (designs, n_bits) same over all challenges and chips
+      entropy             (designs, challenges, n_bits) binary entropy of aliasing
+      entropy_by_bit      (designs, n_bits)
+      biased_mask         (designs, n_bits) aliasing_by_bit outside 50 +/- tolerance
+    """
+    bits = response_bits(packed, n_bits) * valid[..., None]
+    ones = bits.sum(axis=2, dtype=np.int64)
+    chips = valid.sum(axis=2)[..., None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = np.where(chips > 0, ones / chips, np.nan)
+        p_bit = ones.sum(axis=1) / chips.sum(axis=1)
+    return {
+        "aliasing": p * 100,
+        "aliasing_by_bit": p_bit * 100,
+        "entropy": binary_entropy(p),
+        "entropy_by_bit": binary_entropy(p_bit),
+        "biased_mask": np.abs(p_bit * 100 - 50.0) > tolerance,
+    }
+
+# === INTRA-CHIP (RAW BATCHES) ===
+def analyze_stability(batches, n_bits, threshold=FLIP_THRESHOLD):
+    """
+    Per-bit stability of one chip from its raw responses grouped as
+    (challenges, batch_size, n_bytes):
+      flip_rate         (challenges, n_bits) fraction of the batch disagreeing with the majority bit
+      entropy           (challenges, n_bits) binary entropy of the in-batch ones fraction
+      unreliable_mask   (challenges, n_bits) flip_rate > threshold
+      unstable_by_bit   (n_bits) fraction of challenges in which the bit is unreliable
+    """
+    majority, _ = majority_vote(batches)
+    flips = response_bits(batches ^ majority[:, None, :], n_bits).mean(axis=1)
+    ones = response_bits(batches, n_bits).mean(axis=1)
+    unreliable = flips > threshold
+    return {
+        "flip_rate": flips,
+        "entropy": binary_entropy(ones),
+        "unreliable_mask": unreliable,
+        "unstable_by_bit": unreliable.mean(axis=0) if len(unreliable) else np.zeros(n_bits),
+    }
+
+def analyze_capture(path, batch_size=None, threshold=FLIP_THRESHOLD):
+    """
+    analyze_stability for every device of a raw capture file, {device:
+    result}, over its batches (see raw_capture.capture_batches) that hold
+    at least batch_size responses; short batches of lost frames are left out.
+    """
+    meta = read_capture_metadata(path)
+    batch_size = batch_size or meta.get("batch_size") or BATCH_SIZE
+    n_bits = meta["n_hex"] * 4
+    results = {}
+    for device, batches in capture_batches(path, batch_size).items():
+        batches = [batch for batch in batches if len(batch) == batch_size]
+        if batches:
+            results[device] = analyze_stability(np.stack(batches), n_bits, threshold)
+    return results
+
+# === SOURCES ===
+def aliasing_from_files(paths, start_row=2, end_row=257, tolerance=ALIASING_TOLERANCE):
+    """analyze_aliasing over RESULTS workbooks (through the response cache); returns (labels, result)."""
+    loaded = [(p, load_design(p, start_row, end_row)) for p in paths]
+    loaded = [(p, d) for p, d in loaded if d is not None]
+    if not loaded:
+        raise FileNotFoundError(f"No result files found among {list(paths)}")
+    packed, valid, n_bits = stack_designs([d for _, d in loaded])
+    return [p for p, _ in loaded], analyze_aliasing(packed, valid, n_bits, tolerance)
+
+def aliasing_from_store(store, designs=None, tolerance=ALIASING_TOLERANCE):
+    designs = designs or store.designs
+    idx = [store.design_index(d) for d in designs]
+    packed = np.asarray(store.majority[idx]).transpose(0, 2, 1, 3)
+    valid = np.asarray(store.valid[idx]).transpose(0, 2, 1)
+    return list(designs), analyze_aliasing(packed, valid, store.n_bits, tolerance)
+
+def aliasing_from_binary(paths, tolerance=ALIASING_TOLERANCE):
+    """analyze_aliasing over packed '<name> BINARY.npz' files written by the HEX TO BINARY converter."""
+    loaded = [load_packed(p) for p in paths]
+    n_challenges = max(packed.shape[0] for _, packed, _, _ in loaded)
+    n_chips = max(packed.shape[1] for _, packed, _, _ in loaded)
+    n_bytes = max(packed.shape[2] for _, packed, _, _ in loaded)
+    packed = np.zeros((len(loaded), n_challenges, n_chips, n_bytes), dtype=np.uint8)
+    valid = np.zeros((len(loaded), n_challenges, n_chips), dtype=bool)
+    for i, (_, p, v, _) in enumerate(loaded):
+        packed[i, :p.shape[0], :p.shape[1], n_bytes - p.shape[2]:] = p
+        valid[i, :v.shape[0], :v.shape[1]] = v
+    n_bits = int(max(lengths.max(initial=0) for _, _, _, lengths in loaded)) * 4
+    return list(paths), analyze_aliasing(packed, valid, n_bits, tolerance)
+
+# === REPORT ===
+def write_bit_report(path, labels, aliasing, stability=None):
+    """Per-bit-position sheets: one row per design (aliasing) or device (stability)."""
+    wb = Workbook(write_only=True)
+    n_bits = aliasing["aliasing_by_bit"].shape[1]
+    header = ["Source"] + [f"Bit {i}" for i in range(n_bits)]
+
+    def sheet(title, names, rows, fmt=lambda v: round(float(v), 4)):
+        ws = wb.create_sheet(title)
+        ws.append(header)
+        for name, row in zip(names, rows):
+            ws.append([name] + [fmt(v) if not np.isnan(v) else None for v in row])
+
+    sheet("Bit Aliasing (%)", labels, aliasing["aliasing_by_bit"])
+    sheet("Bit Entropy", labels, aliasing["entropy_by_bit"])
+    sheet("Biased Bits", labels, aliasing["biased_mask"], fmt=int)
+    if stability:
+        devices = list(stability)
+        sheet("Mean Flip Rate", devices, [s["flip_rate"].mean(axis=0) for s in stability.values()])
+        sheet("Unstable Challenges", devices, [s["unstable_by_bit"] for s in stability.values()])
+    wb.save(path)
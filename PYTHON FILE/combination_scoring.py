@@ -0,0 +1,198 @@
+import os
+import numpy as np
+from puf_metrics import pack_hex, popcount, as_words, bit_counts, check_uniqueness_method
+from workbook_io import read_sheets, row_range, MAJORITY_SHEET, RELIABILITY_SHEET
+from response_cache import load_design
+
+# === LOADING ===
+def read_result_sheets(path, start_row=2, end_row=257):
+    """
+    Read the Majority HEX and Reliability sheets of one RESULTS workbook.
+    Returns (majority_rows, reliability_rows) as lists of cell-value tuples,
+    or None if the file or either sheet is missing.
+    """
+    sheets = read_sheets(path)
+    if sheets is None:
+        return None
+    majority = row_range(sheets[MAJORITY_SHEET][1], start_row, end_row)
+    reliability = row_range(sheets[RELIABILITY_SHEET][1], start_row, end_row)
+    return majority, reliability
+
+def pack_design_rows(majority_rows, n_hex):
+    """
+    Pack ragged Majority HEX rows into a (rows, k, n_bytes) array. Non-empty
+    cells are left-aligned per row; the (rows, k) mask marks real responses.
+    """
+    values = [[v for v in row if v not in (None, "")] for row in majority_rows]
+    k = max((len(v) for v in values), default=0)
+    packed = np.zeros((len(values), k, (n_hex + 1) // 2), dtype=np.uint8)
+    mask = np.zeros((len(values), k), dtype=bool)
+    for r, vals in enumerate(values):
+        if vals:
+            packed[r, :len(vals)] = pack_hex(vals, n_hex)[0]
+            mask[r, :len(vals)] = True
+    return packed, mask
+
+def _masked_cross_hd(words_a, mask_a, words_b, mask_b):
+    hd = popcount(words_a[:, :, None, :] ^ words_b[:, None, :, :])
+    return (hd * (mask_a[:, :, None] & mask_b[:, None, :])).sum(axis=(1, 2))
+
+def _bit_count_cross_hd(bits_a, k_a, bits_b, k_b):
+    # a chip of a with bit i set differs from the k_b - c_b chips of b without it, and vice versa
+    return (bits_a * (k_b[:, None] - bits_b) + bits_b * (k_a[:, None] - bits_a)).sum(axis=1)
+
+# === PARTIAL SUMS ===
+class CombinationCache:
+    """
+    Per-challenge partial sums for every design, computed once:
+      counts[d, r]  responses of design d on row r
+      ones[d, r]    total set bits of those responses
+      hd[a, b, r]   summed inter-chip HD between designs a and b (a == b:
+                    pairs within the design, each counted once)
+      reliability   column 1 of each design's Reliability sheet
+    Any combination's metrics are then sums over these arrays. With
+    method="popcount" the HD sums come from per-bit ones counts instead of
+    comparing chip pairs; the integers are identical, only cheaper to get
+    for designs with many chips.
+    """
+
+    def __init__(self, labels, counts, ones, hd, n_bits, reliability):
+        self.labels = labels
+        self.counts = counts
+        self.ones = ones
+        self.hd = hd
+        self.n_bits = n_bits
+        self.reliability = reliability
+
+    @classmethod
+    def from_files(cls, paths, labels=None, start_row=2, end_row=257, method="pairwise"):
+        labels = labels or [os.path.basename(p) for p in paths]
+        designs = [load_design(p, start_row, end_row) for p in paths]
+        return cls.from_designs(designs, labels, method)
+
+    @classmethod
+    def from_designs(cls, designs, labels, method="pairwise"):
+        """Build the cache from response_cache.DesignResponses (None = missing)."""
+        present = [d for d in designs if d is not None]
+        n_rows = max((d.packed.shape[0] for d in present), default=0)
+        n_bytes = max((d.n_bytes for d in present), default=0)
+        n_bits = next((d.n_bits for d in present if d.valid.any()), 0)
+
+        packed, masks = [], []
+        for d in designs:
+            if d is None:
+                packed.append(np.zeros((n_rows, 0, n_bytes), dtype=np.uint8))
+                masks.append(np.zeros((n_rows, 0), dtype=bool))
+                continue
+            p, m = d.left_aligned(n_bytes)
+            packed.append(p)
+            masks.append(m)
+
+        reliability = [d.reliability_column(0) if d is not None else None for d in designs]
+        return cls.from_packed(labels, packed, masks, n_bits, reliability, method)
+
+    @classmethod
+    def from_sheets(cls, sheets, labels, method="pairwise"):
+        """Build the cache from (majority_rows, reliability_rows) pairs (None = missing)."""
+        n_rows = max((len(s[0]) for s in sheets if s), default=0)
+        n_hex = max(
+            (len(str(v).strip()) for s in sheets if s for row in s[0] for v in row if v not in (None, "")),
+            default=0,
+        )
+        first = next(
+            (str(v).strip() for s in sheets if s for row in s[0] for v in row if v not in (None, "")),
+            "",
+        )
+        n_bits = len(first) * 4
+
+        packed, masks = [], []
+        for s in sheets:
+            rows = list(s[0]) + [()] * (n_rows - len(s[0])) if s else [()] * n_rows
+            p, m = pack_design_rows(rows, n_hex)
+            packed.append(p)
+            masks.append(m)
+
+        reliability = [
+            [row[0] for row in s[1] if row and row[0] is not None] if s else None
+            for s in sheets
+        ]
+        return cls.from_packed(labels, packed, masks, n_bits, reliability, method)
+
+    @classmethod
+    def from_store(cls, store, designs=None, labels=None, method="pairwise"):
+        """Build the cache from a ResponseStore without going through hex strings."""
+        designs = designs or store.designs
+        labels = labels or list(designs)
+        idx = [store.design_index(d) for d in designs]
+        # store arrays are (devices, challenges, ...); the cache works per challenge row
+        packed = [np.asarray(store.majority[d]).transpose(1, 0, 2) for d in idx]
+        masks = [np.asarray(store.valid[d]).T for d in idx]
+        reliability = []
+        for d in idx:
+            column = np.asarray(store.reliability[d, 0]) if store.reliability.shape[1] else np.array([])
+            reliability.append([float(v) for v in column if not np.isnan(v)])
+        return cls.from_packed(labels, packed, masks, store.n_bits, reliability, method)
+
+    @classmethod
+    def from_packed(cls, labels, packed, masks, n_bits, reliability, method="pairwise"):
+        """Build the cache from per-design (rows, k, n_bytes) arrays and (rows, k) masks."""
+        check_uniqueness_method(method)
+        return cls(labels, *cls._partial_sums(packed, masks, method), n_bits, reliability)
+
+    @staticmethod
+    def _partial_sums(packed, masks, method="pairwise"):
+        n_designs = len(packed)
+        n_rows = packed[0].shape[0] if packed else 0
+        counts = np.zeros((n_designs, n_rows), dtype=np.int64)
+        ones = np.zeros((n_designs, n_rows), dtype=np.int64)
+        words, bits = [], []
+        for d, (p, m) in enumerate(zip(packed, masks)):
+            counts[d] = m.sum(axis=1)
+            ones[d] = popcount(np.where(m[:, :, None], p, 0).reshape(n_rows, -1))
+            if method == "popcount":
+                bits.append(bit_counts(p, m))
+            else:
+                words.append(as_words(p))
+
+        hd = np.zeros((n_designs, n_designs, n_rows), dtype=np.int64)
+        if method == "popcount":
+            for a in range(n_designs):
+                hd[a, a] = (bits[a] * (counts[a][:, None] - bits[a])).sum(axis=1)
+                for b in range(a + 1, n_designs):
+                    hd[a, b] = hd[b, a] = _bit_count_cross_hd(bits[a], counts[a], bits[b], counts[b])
+            return counts, ones, hd
+        for a in range(n_designs):
+            hd[a, a] = _masked_cross_hd(words[a], masks[a], words[a], masks[a]) // 2
+            for b in range(a + 1, n_designs):
+                hd[a, b] = hd[b, a] = _masked_cross_hd(words[a], masks[a], words[b], masks[b])
+        return counts, ones, hd
+
+    def score(self, combo):
+        """
+        Weighted mean uniqueness, uniformity and reliability (%) of a design
+        combination, matching analyze_combination on the combined workbook.
+        """
+        idx = np.asarray(combo)
+        k = self.counts[idx].sum(axis=0)
+        ones = self.ones[idx].sum(axis=0)
+        sub = self.hd[np.ix_(idx, idx)]
+        within = sub[np.arange(len(idx)), np.arange(len(idx))].sum(axis=0)
+        total_hd = (sub.sum(axis=(0, 1)) + within) // 2
+
+        valid = k > 0
+        k, ones, total_hd = k[valid], ones[valid], total_hd[valid]
+        total_samples = k.sum()
+        if not total_samples:
+            weighted_mean_uniqueness = weighted_mean_uniformity = 0.0
+        else:
+            pairs = np.maximum(k * (k - 1), 1)
+            uniq = np.where(k >= 2, 2 * (total_hd / self.n_bits) / pairs * 100, 0.0)
+            unif = ones / (k * self.n_bits) * 100
+            weighted_mean_uniqueness = float((uniq * k).sum() / total_samples)
+            weighted_mean_uniformity = float((unif * k).sum() / total_samples)
+
+        # The combined workbook's Reliability column 1 is the first available design's column 1
+        rel = next((self.reliability[i] for i in combo if self.reliability[i] is not None), None)
+        weighted_mean_reliability = sum(rel) / len(rel) if rel else 0.0
+
+        return weighted_mean_uniqueness, weighted_mean_uniformity, weighted_mean_reliability
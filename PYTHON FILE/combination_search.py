@@ -0,0 +1,283 @@
+import heapq
+import itertools
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Value
+
+# === CONFIGURATION ===
+IDEAL_UNIQUENESS = 50.0
+IDEAL_UNIFORMITY = 50.0
+OBJECTIVES = ("balanced", "uniqueness")
+BOUND_SLACK = 1e-9     # % added around the metric bounds
+
+# === OBJECTIVES ===
+def objective_vector(result):
+    """(|uniqueness - 50|, |uniformity - 50|, 100 - reliability): all minimised."""
+    uniqueness, uniformity, reliability = result
+    return (
+        abs(uniqueness - IDEAL_UNIQUENESS),
+        abs(uniformity - IDEAL_UNIFORMITY),
+        100.0 - reliability,
+    )
+
+def scalar_score(result, objective="balanced", weights=(1.0, 1.0, 1.0)):
+    """Lower is better. 'uniqueness' reproduces the old max-uniqueness sweep."""
+    if objective == "uniqueness":
+        return -result[0]
+    return sum(w * v for w, v in zip(weights, objective_vector(result)))
+
+def dominates(a, b):
+    return all(x <= y for x, y in zip(a, b)) and any(x < y for x, y in zip(a, b))
+
+def pareto_insert(front, vector, entry):
+    """Add entry to a list of (vector, entry) pairs if no member dominates it."""
+    for other, _ in front:
+        if other == vector or dominates(other, vector):
+            return False
+    front[:] = [(v, e) for v, e in front if not dominates(vector, v)]
+    front.append((vector, entry))
+    return True
+
+# === BOUNDS ===
+class SearchBounds:
+    """
+    Pooled sums bounding the metrics of any combination drawn from a set
+    of designs. Weighted mean uniformity is sum(ones) / (sum(counts) *
+    n_bits) over the chosen designs, so it is bounded by the chosen sums
+    plus the largest / smallest sums of the designs still to pick. When
+    every design has the same count on every row, weighted mean uniqueness
+    is likewise sum(hd) / sum(pairs) over the chosen design pairs and is
+    bounded the same way; otherwise the rows are weighted unequally and
+    the per-row pair extremes are used instead.
+    """
+
+    def __init__(self, cache):
+        counts = cache.counts.astype(float)
+        n_bits = cache.n_bits or 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pairs = counts[:, None, :] * counts[None, :, :]
+            within = counts * (counts - 1) / 2
+            idx = np.arange(len(counts))
+            pairs[idx, idx] = within
+            pair_avg = np.where(pairs > 0, cache.hd / pairs, np.nan) / n_bits * 100
+
+        self.counts = cache.counts
+        self.n_bits = n_bits
+        self.pooled = bool((cache.counts == cache.counts[:, :1]).all())
+        self.hd_sum = cache.hd.sum(axis=-1).astype(float)
+        self.pair_sum = pairs.sum(axis=-1)
+        self.ones_sum = cache.ones.sum(axis=-1).astype(float)
+        self.count_sum = counts.sum(axis=-1)
+        self.pair_lo = _nan_reduce(np.nanmin, pair_avg, np.inf)
+        self.pair_hi = _nan_reduce(np.nanmax, pair_avg, -np.inf)
+        self.available = [rel is not None for rel in cache.reliability]
+        self.rel_mean = np.array([sum(rel) / len(rel) if rel else 0.0 for rel in cache.reliability])
+
+    def corner(self, chosen, pool, size):
+        """Best-case objective vector for any size-combination of chosen + pool."""
+        chosen, pool = list(chosen), list(pool)
+        designs = chosen + pool
+        need = size - len(chosen)
+        sub = np.ix_(designs, designs)
+        u_lo, u_hi = self.pair_lo[sub].min(), max(self.pair_hi[sub].max(), 0.0)
+        if self.pooled:
+            u_lo, u_hi = _ratio_bounds(self.hd_sum, self.pair_sum, chosen, pool, need, u_lo, u_hi, self.n_bits)
+
+        fixed = self.counts[list(chosen)].sum(axis=0)
+        extra = np.sort(self.counts[list(pool)], axis=0) if pool else np.zeros((0, self.counts.shape[1]))
+        min_k = fixed + extra[:need].sum(axis=0)
+        max_k = fixed + extra[len(extra) - need:].sum(axis=0)
+        if ((min_k <= 1) & (max_k >= 1)).any():
+            # a row with a single response scores 0% uniqueness
+            u_lo = min(u_lo, 0.0)
+
+        f_lo, f_hi = _ratio_bounds(np.diag(self.ones_sum), np.diag(self.count_sum), chosen, pool, need,
+                                   0.0, 100.0, self.n_bits)
+        # slack keeps float rounding of the pooled sums from pruning exact ties
+        u_lo, u_hi = u_lo - BOUND_SLACK, u_hi + BOUND_SLACK
+        f_lo, f_hi = f_lo - BOUND_SLACK, f_hi + BOUND_SLACK
+
+        # reliability comes from the first available design of the combination
+        first = next((d for d in chosen if self.available[d]), None)
+        rel_hi = self.rel_mean[first] if first is not None else self.rel_mean[designs].max()
+
+        return (
+            _distance_to_range(IDEAL_UNIQUENESS, u_lo, u_hi),
+            _distance_to_range(IDEAL_UNIFORMITY, f_lo, f_hi),
+            100.0 - rel_hi,
+        ), u_hi
+
+def _ratio_bounds(num, den, chosen, pool, need, lo, hi, n_bits):
+    """
+    Narrow [lo, hi] (in %) to the range of sum(num) / sum(den) over the
+    pairs (a <= b) of chosen plus need designs of pool: the chosen pairs
+    are fixed, each picked design adds its pairs with the chosen designs
+    and itself, and the picked designs add need*(need-1)/2 pairs among
+    themselves.
+    """
+    def part(mat):
+        fixed = (mat[np.ix_(chosen, chosen)].sum() + mat[chosen, chosen].sum()) / 2
+        single = mat[np.ix_(pool, chosen)].sum(axis=1) + mat[pool, pool]
+        cross = mat[np.ix_(pool, pool)][np.triu_indices(len(pool), 1)]
+        single, cross = np.sort(single), np.sort(cross)
+        n_cross = need * (need - 1) // 2
+        return (fixed + single[:need].sum() + cross[:n_cross].sum(),
+                fixed + single[len(single) - need:].sum() + cross[len(cross) - n_cross:].sum())
+
+    num_lo, num_hi = part(num)
+    den_lo, den_hi = part(den)
+    scale = 100.0 / n_bits
+    if den_lo > 0:
+        lo = max(lo, num_lo / den_hi * scale)
+        hi = min(hi, num_hi / den_lo * scale)
+    return lo, hi
+
+def _nan_reduce(func, arr, empty):
+    valid = ~np.isnan(arr).all(axis=-1)
+    out = np.full(arr.shape[:-1], empty)
+    out[valid] = func(arr[valid], axis=-1)
+    return out
+
+def _distance_to_range(target, lo, hi):
+    if lo > hi:
+        return 0.0
+    return max(lo - target, target - hi, 0.0)
+
+# === SEARCH ===
+_WORKER = {}
+
+def _init_worker(cache, size, top_k, objective, weights, pareto, shared):
+    _WORKER.update(
+        cache=cache, bounds=SearchBounds(cache), size=size, top_k=top_k,
+        objective=objective, weights=weights, pareto=pareto, shared=shared,
+    )
+
+def _search_prefix(prefix):
+    """Depth-first search of every combination that starts with `prefix`."""
+    w = _WORKER
+    cache, bounds, size = w["cache"], w["bounds"], w["size"]
+    n_designs = len(cache.labels)
+    heap, front = [], []
+    stats = {"evaluated": 0, "pruned": 0}
+
+    def threshold():
+        local = -heap[0][0] if len(heap) >= w["top_k"] else np.inf
+        return min(local, w["shared"].value)
+
+    def lower_bound(corner, u_hi):
+        if w["objective"] == "uniqueness":
+            return -u_hi
+        return sum(wt * v for wt, v in zip(w["weights"], corner))
+
+    def visit(chosen, start):
+        remaining = size - len(chosen)
+        if remaining == 0:
+            combo = tuple(chosen)
+            result = cache.score(combo)
+            score = scalar_score(result, w["objective"], w["weights"])
+            stats["evaluated"] += 1
+            key = (-score, tuple(-i for i in combo))
+            if len(heap) < w["top_k"]:
+                heapq.heappush(heap, key)
+            elif key > heap[0]:
+                heapq.heapreplace(heap, key)
+            if w["pareto"]:
+                pareto_insert(front, objective_vector(result), (combo, result))
+            if len(heap) >= w["top_k"] and -heap[0][0] < w["shared"].value:
+                # publish this worker's k-th best so other workers prune against it
+                with w["shared"].get_lock():
+                    w["shared"].value = min(w["shared"].value, -heap[0][0])
+            return
+
+        pool = range(start, n_designs)
+        corner, u_hi = bounds.corner(chosen, pool, size)
+        beats_top = lower_bound(corner, u_hi) <= threshold()
+        on_front = w["pareto"] and not any(all(p <= c for p, c in zip(v, corner)) for v, _ in front)
+        if not beats_top and not on_front:
+            stats["pruned"] += 1
+            return
+
+        for i in range(start, n_designs - remaining + 1):
+            visit(chosen + [i], i + 1)
+
+    visit(list(prefix), prefix[-1] + 1 if prefix else 0)
+
+    top = []
+    for neg_score, neg_combo in heap:
+        combo = tuple(-i for i in neg_combo)
+        top.append((combo, cache.score(combo), -neg_score))
+    return top, [entry for _, entry in front], stats
+
+def _result_row(cache, combo, result, score):
+    return {
+        "combo": combo,
+        "labels": ''.join(str(cache.labels[i]) for i in combo),
+        "uniqueness": result[0],
+        "uniformity": result[1],
+        "reliability": result[2],
+        "score": score,
+    }
+
+def search_combinations(cache, size, top_k=10, objective="balanced", weights=(1.0, 1.0, 1.0),
+                        pareto=True, workers=None, show_bar=None):
+    """
+    Search every `size`-of-N design combination in `cache` (a
+    CombinationCache). Subtrees whose best-case bound can neither enter the
+    top-k nor the Pareto front are pruned. Work is split by two-design
+    prefixes across a process pool; `workers=1` runs in-process.
+
+    Returns a dict with "top" (best first), "pareto", "evaluated" and "pruned".
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}', expected one of {OBJECTIVES}")
+    n_designs = len(cache.labels)
+    if not 0 < size <= n_designs:
+        raise ValueError(f"Cannot choose {size} of {n_designs} designs")
+
+    prefix_len = min(2, size)
+    prefixes = [
+        p for p in itertools.combinations(range(n_designs), prefix_len)
+        if p[-1] <= n_designs - (size - prefix_len) - 1
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    top, front = [], []
+    stats = {"evaluated": 0, "pruned": 0}
+
+    def merge(part, done):
+        part_top, part_front, part_stats = part
+        top.extend(part_top)
+        for combo, result in part_front:
+            pareto_insert(front, objective_vector(result), (combo, result))
+        for key in stats:
+            stats[key] += part_stats[key]
+        if show_bar:
+            show_bar(done, len(prefixes))
+
+    # shared k-th best score: the minimum over workers is a valid pruning threshold
+    shared = Value('d', np.inf)
+    if workers == 1:
+        _init_worker(cache, size, top_k, objective, weights, pareto, shared)
+        for done, prefix in enumerate(prefixes, start=1):
+            merge(_search_prefix(prefix), done)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker,
+            initargs=(cache, size, top_k, objective, weights, pareto, shared),
+        ) as pool:
+            futures = [pool.submit(_search_prefix, p) for p in prefixes]
+            for done, future in enumerate(as_completed(futures), start=1):
+                merge(future.result(), done)
+
+    top.sort(key=lambda t: (t[2], t[0]))
+    front.sort(key=lambda ve: ve[0])
+    return {
+        "top": [_result_row(cache, combo, result, score) for combo, result, score in top[:top_k]],
+        "pareto": [
+            _result_row(cache, combo, result, scalar_score(result, objective, weights))
+            for _, (combo, result) in front
+        ],
+        "evaluated": stats["evaluated"],
+        "pruned": stats["pruned"],
+    }
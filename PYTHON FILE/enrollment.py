@@ -0,0 +1,412 @@
+import json
+import time
+import socket
+import itertools
+import socketserver
+import numpy as np
+from puf_metrics import popcount, as_words
+from response_cache import load_design
+
+# === CONFIGURATION ===
+THRESHOLD_FACTOR = 3.0         # accept up to 3x the intra-chip HD implied by the reliability
+MIN_THRESHOLD_PERCENT = 3.0    # accepted HD never below this % of the response bits ...
+MAX_THRESHOLD_PERCENT = 18.0   # ... nor above this (inter-chip HD is ~50%)
+SUBSTRING_BITS = 16            # multi-index hashing: a 256-bit response -> 16 tables of 16 bits
+SMALL_SUBSTRING_BITS = 8       # ... or 32 tables of 8 bits for small enrollments
+SMALL_INDEX_DEVICES = 4096     # devices per challenge below which 8-bit substrings are used
+SYNTHETIC_RELIABILITY = 95.0
+HOST = "127.0.0.1"
+PORT = 8750
+
+# === THRESHOLDS ===
+def reliability_thresholds(reliability, n_bits, factor=THRESHOLD_FACTOR):
+    """
+    Accepted HD (bits) per reference: `factor` times the intra-chip HD that
+    the reliability (%) implies, clipped to the MIN/MAX_THRESHOLD_PERCENT
+    range; the maximum where the reliability is unknown.
+    """
+    lowest = int(MIN_THRESHOLD_PERCENT * n_bits / 100)
+    highest = int(MAX_THRESHOLD_PERCENT * n_bits / 100)
+    with np.errstate(invalid="ignore"):
+        bits = np.ceil((100 - np.asarray(reliability, dtype=float)) / 100 * n_bits * factor)
+    bits = np.where(np.isnan(bits), highest, bits)
+    return np.clip(bits, lowest, highest).astype(np.int32)
+
+# === MULTI-INDEX HASHING ===
+class MultiIndexHash:
+    """
+    Multi-index hash over (devices, n_bytes) packed responses. Every
+    response is cut into m substrings of `substring_bits` and each
+    substring position gets its own table: device indices sorted by
+    substring value plus bucket offsets (CSR). Two responses within HD r
+    differ in at most r // m bits on at least one substring, so probing
+    every table with the query substrings' r // m bit neighbourhood finds
+    all of them; the candidates are then checked on the full response.
+    """
+
+    def __init__(self, packed, valid=None, substring_bits=SUBSTRING_BITS):
+        if substring_bits not in (8, 16):
+            raise ValueError(f"substring_bits must be 8 or 16, got {substring_bits}")
+        self.substring_bits = substring_bits
+        rows = np.arange(packed.shape[0]) if valid is None else np.flatnonzero(valid)
+        keys = self.keys(packed[rows])
+        self.m = keys.shape[1]
+        n_buckets = 1 << substring_bits
+        self.order = np.empty((self.m, len(rows)), dtype=np.int32)
+        self.offsets = np.zeros((self.m, n_buckets + 1), dtype=np.int32)
+        for j in range(self.m):
+            self.order[j] = rows[np.argsort(keys[:, j], kind="stable")]
+            np.cumsum(np.bincount(keys[:, j], minlength=n_buckets), out=self.offsets[j, 1:])
+        self._neighbourhoods = {}
+
+    def keys(self, packed):
+        """(n, m) substring values of (n, n_bytes) packed responses."""
+        width = self.substring_bits // 8
+        pad = -packed.shape[1] % width
+        if pad:
+            packed = np.concatenate([packed, np.zeros((packed.shape[0], pad), dtype=np.uint8)], axis=1)
+        return np.ascontiguousarray(packed).view(f">u{width}").astype(np.int64)
+
+    def neighbourhood(self, radius):
+        """XOR masks of every substring value within `radius` bits."""
+        if radius not in self._neighbourhoods:
+            masks = [0]
+            for r in range(1, radius + 1):
+                for bits in itertools.combinations(range(self.substring_bits), r):
+                    masks.append(sum(1 << b for b in bits))
+            self._neighbourhoods[radius] = np.array(masks, dtype=np.int64)
+        return self._neighbourhoods[radius]
+
+    def candidates(self, packed_query, radius):
+        """Sorted device indices that may lie within `radius` bits of one (n_bytes,) response."""
+        probe = self.keys(packed_query[None])[0][:, None] ^ self.neighbourhood(radius // self.m)[None, :]
+        tables = np.broadcast_to(np.arange(self.m)[:, None], probe.shape)
+        starts = self.offsets[tables, probe].ravel()
+        lengths = self.offsets[tables, probe + 1].ravel() - starts
+        hit = lengths > 0
+        starts, lengths, tables = starts[hit], lengths[hit], tables.ravel()[hit]
+        if not len(lengths):
+            return np.empty(0, dtype=np.int32)
+        # positions starts[i] .. starts[i] + lengths[i] of table tables[i] in the flattened order
+        first = np.cumsum(lengths) - lengths
+        base = starts - first + tables * self.order.shape[1]
+        found = self.order.ravel()[np.arange(lengths.sum()) + np.repeat(base, lengths)]
+        found.sort()
+        return found[np.concatenate(([True], found[1:] != found[:-1]))]
+
+# === ENROLLMENT DATABASE ===
+class EnrollmentDB:
+    """
+    Enrolled reference responses (the majority responses of the
+    acquisition system), challenge-major for lookups:
+      packed       (challenges, devices, n_bytes) uint8 references
+      enrolled     (challenges, devices) bool, reference present
+      reliability  (challenges, devices) float64 % from the Reliability sheet
+      thresholds   (challenges, devices) int32 accepted HD in bits
+    Challenge c is sheet row start_row + c. Each challenge gets a
+    MultiIndexHash, searched up to the challenge's largest threshold, on
+    first use.
+    """
+
+    def __init__(self, devices, packed, enrolled, reliability, n_bits, start_row=2, thresholds=None):
+        self.devices = list(devices)
+        self.packed = packed
+        self.enrolled = enrolled
+        self.reliability = reliability
+        self.n_bits = int(n_bits)
+        self.start_row = start_row
+        self.thresholds = reliability_thresholds(reliability, n_bits) if thresholds is None else thresholds
+        self._device_index = {name: i for i, name in enumerate(self.devices)}
+        if len(self._device_index) != len(self.devices):
+            raise ValueError("Device names must be unique")
+        self._indexes = {}
+
+    @property
+    def n_challenges(self):
+        return self.packed.shape[0]
+
+    @property
+    def n_bytes(self):
+        return self.packed.shape[2]
+
+    # === CONSTRUCTION ===
+    @classmethod
+    def from_designs(cls, designs, labels):
+        """
+        Enroll every column of response_cache.DesignResponses (None =
+        missing) as device "<label>:<column header>".
+        """
+        present = [(label, d) for label, d in zip(labels, designs) if d is not None]
+        if not present:
+            raise ValueError("No designs to enroll")
+        n_rows = max(d.packed.shape[0] for _, d in present)
+        n_bytes = max(d.n_bytes for _, d in present)
+        n_devices = sum(d.valid.shape[1] for _, d in present)
+        packed = np.zeros((n_rows, n_devices, n_bytes), dtype=np.uint8)
+        enrolled = np.zeros((n_rows, n_devices), dtype=bool)
+        reliability = np.full((n_rows, n_devices), np.nan)
+        devices = []
+        col = 0
+        for label, d in present:
+            rows, m = d.valid.shape
+            # hex is right-aligned: shorter responses get leading zero bytes
+            packed[:rows, col:col + m, n_bytes - d.n_bytes:] = d.packed
+            enrolled[:rows, col:col + m] = d.valid
+            r = d.reliability[:, :m]
+            reliability[:r.shape[0], col:col + r.shape[1]] = r
+            header = (list(d.header) + [None] * m)[:m]
+            devices += [f"{label}:{h if h else f'Column {i + 1}'}" for i, h in enumerate(header)]
+            col += m
+        n_bits = next((d.n_bits for _, d in present if d.valid.any()), 8 * n_bytes)
+        return cls(devices, packed, enrolled, reliability, n_bits, present[0][1].start_row)
+
+    @classmethod
+    def from_files(cls, paths, labels, start_row=2, end_row=257):
+        return cls.from_designs([load_design(p, start_row, end_row) for p in paths], labels)
+
+    @classmethod
+    def from_store(cls, store, designs=None):
+        """Enroll devices of a ResponseStore as "<design>:<device>"."""
+        designs = designs or store.designs
+        idx = [store.design_index(d) for d in designs]
+        return cls(
+            [f"{store.designs[d]}:{name}" for d in idx for name in store.devices[d]],
+            np.concatenate([np.asarray(store.majority[d]) for d in idx]).transpose(1, 0, 2).copy(),
+            np.concatenate([np.asarray(store.valid[d]) for d in idx]).T.copy(),
+            np.concatenate([np.asarray(store.reliability[d]) for d in idx]).T.copy(),
+            store.n_bits, store.start_row,
+        )
+
+    @classmethod
+    def synthetic(cls, n_devices, n_challenges, n_bits=256, reliability=SYNTHETIC_RELIABILITY,
+                  seed=0, prefix="SIM"):
+        """Uniformly random references for load tests, all at the same reliability."""
+        rng = np.random.default_rng(seed)
+        packed = rng.integers(0, 256, (n_challenges, n_devices, (n_bits + 7) // 8), dtype=np.uint8)
+        return cls([f"{prefix}{i:06d}" for i in range(n_devices)], packed,
+                   np.ones((n_challenges, n_devices), dtype=bool),
+                   np.full((n_challenges, n_devices), float(reliability)), n_bits)
+
+    @classmethod
+    def concat(cls, dbs):
+        """One database holding the devices of several (same response width)."""
+        if len({db.n_bytes for db in dbs}) > 1:
+            raise ValueError("Cannot combine enrollments of different response widths")
+        n_challenges = max(db.n_challenges for db in dbs)
+
+        def stack(arrays, fill):
+            return np.concatenate([
+                np.concatenate([a, np.full((n_challenges - a.shape[0],) + a.shape[1:], fill, dtype=a.dtype)])
+                for a in arrays
+            ], axis=1)
+
+        return cls([name for db in dbs for name in db.devices],
+                   stack([db.packed for db in dbs], 0), stack([db.enrolled for db in dbs], False),
+                   stack([db.reliability for db in dbs], np.nan), dbs[0].n_bits, dbs[0].start_row,
+                   stack([db.thresholds for db in dbs], 0))
+
+    def head(self, n_challenges):
+        """The same devices enrolled on the first n_challenges challenges only."""
+        n = min(n_challenges, self.n_challenges)
+        return EnrollmentDB(self.devices, self.packed[:n], self.enrolled[:n], self.reliability[:n],
+                            self.n_bits, self.start_row, self.thresholds[:n])
+
+    def save(self, path):
+        meta = {"devices": self.devices, "n_bits": self.n_bits, "start_row": self.start_row}
+        np.savez(path, meta=np.array(json.dumps(meta)), packed=self.packed, enrolled=self.enrolled,
+                 reliability=self.reliability, thresholds=self.thresholds)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(meta["devices"], data["packed"], data["enrolled"], data["reliability"],
+                       meta["n_bits"], meta["start_row"], data["thresholds"])
+
+    # === LOOKUPS ===
+    def device_index(self, device):
+        if device not in self._device_index:
+            raise KeyError(f"Device '{device}' is not enrolled")
+        return self._device_index[device]
+
+    def index(self, challenge):
+        """(MultiIndexHash, search radius, uint64 reference words) of one challenge."""
+        if challenge not in self._indexes:
+            enrolled = self.enrolled[challenge]
+            radius = int(self.thresholds[challenge][enrolled].max()) if enrolled.any() else -1
+            # 16-bit tables have 65536 buckets each, too sparse to pay off for a few devices
+            bits = SMALL_SUBSTRING_BITS if enrolled.sum() < SMALL_INDEX_DEVICES else SUBSTRING_BITS
+            self._indexes[challenge] = (MultiIndexHash(self.packed[challenge], enrolled, bits), radius,
+                                        as_words(self.packed[challenge]))
+        return self._indexes[challenge]
+
+    def build_indexes(self):
+        """Index every challenge now instead of on its first lookup."""
+        for challenge in range(self.n_challenges):
+            self.index(challenge)
+
+    def pack_response(self, response):
+        """(n_bytes,) uint8 of a hex string (as in Majority HEX) or raw response bytes."""
+        if isinstance(response, str):
+            response = bytes.fromhex(response.strip().zfill(2 * self.n_bytes))
+        packed = np.frombuffer(bytes(response), dtype=np.uint8)
+        if packed.shape[0] != self.n_bytes:
+            raise ValueError(f"Expected a {self.n_bits}-bit response, got {8 * packed.shape[0]} bits")
+        return packed
+
+    def _check_challenge(self, challenge):
+        if not 0 <= challenge < self.n_challenges:
+            raise ValueError(f"Challenge {challenge} outside 0..{self.n_challenges - 1}")
+
+    def verify(self, device, challenge, response):
+        """Compare a response with one device's reference: {device, challenge, hd, threshold, accepted}."""
+        self._check_challenge(challenge)
+        d = self.device_index(device)
+        if not self.enrolled[challenge, d]:
+            raise ValueError(f"Device '{device}' has no reference for challenge {challenge}")
+        hd = int(popcount(as_words(self.packed[challenge, d] ^ self.pack_response(response))))
+        threshold = int(self.thresholds[challenge, d])
+        return {"device": device, "challenge": challenge, "hd": hd, "threshold": threshold,
+                "accepted": hd <= threshold}
+
+    def identify(self, challenge, response):
+        """
+        The enrolled device whose reference is closest to a noisy response
+        and within that reference's threshold: {device, challenge, hd,
+        threshold, candidates}, or None when no device matches.
+        """
+        self._check_challenge(challenge)
+        index, radius, words = self.index(challenge)
+        if radius < 0:
+            return None
+        query = self.pack_response(response)
+        candidates = index.candidates(query, radius)
+        if not len(candidates):
+            return None
+        hd = popcount(words[candidates] ^ as_words(query))
+        accepted = hd <= self.thresholds[challenge, candidates]
+        if not accepted.any():
+            return None
+        best = np.flatnonzero(accepted)[np.argmin(hd[accepted])]
+        d = int(candidates[best])
+        return {"device": self.devices[d], "challenge": challenge, "hd": int(hd[best]),
+                "threshold": int(self.thresholds[challenge, d]), "candidates": len(candidates)}
+
+# === SERVER ===
+class _AuthHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = {"ok": True, **self.server.dispatch(json.loads(line))}
+            except (ValueError, KeyError, TypeError) as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+
+class AuthServer(socketserver.ThreadingTCPServer):
+    """
+    Local authentication service over TCP, one JSON request per line:
+      {"op": "identify", "challenge": 5, "response": "<hex>"}
+      {"op": "verify", "device": "RESULTS A:F7", "challenge": 5, "response": "<hex>"}
+      {"op": "info"}
+    Every reply is one JSON line with "ok" and either the result or "error".
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, db, host=HOST, port=PORT):
+        super().__init__((host, port), _AuthHandler)
+        self.db = db
+
+    def dispatch(self, request):
+        if not isinstance(request, dict):
+            raise ValueError(f"Expected a JSON object, got {type(request).__name__}")
+        op = request.get("op")
+        if op == "identify":
+            return {"match": self.db.identify(int(request["challenge"]), request["response"])}
+        if op == "verify":
+            return self.db.verify(request["device"], int(request["challenge"]), request["response"])
+        if op == "info":
+            return {"devices": len(self.db.devices), "challenges": self.db.n_challenges,
+                    "n_bits": self.db.n_bits, "enrolled": int(self.db.enrolled.sum())}
+        raise ValueError(f"Unknown op '{op}'")
+
+class AuthClient:
+    """Blocking client for AuthServer over one persistent connection."""
+
+    def __init__(self, host=HOST, port=PORT, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rwb")
+
+    def request(self, **message):
+        self.file.write((json.dumps(message) + "\n").encode())
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Authentication server closed the connection")
+        reply = json.loads(line)
+        if not reply.pop("ok"):
+            raise ValueError(reply["error"])
+        return reply
+
+    def identify(self, challenge, response):
+        return self.request(op="identify", challenge=challenge, response=response)["match"]
+
+    def verify(self, device, challenge, response):
+        return self.request(op="verify", device=device, challenge=challenge, response=response)
+
+    def info(self):
+        return self.request(op="info")
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+# === STAND-IN CLIENT BENCHMARK ===
+def stand_in_requests(db, n, seed=0):
+    """
+    n (device, challenge, noisy hex response) triples: random enrolled
+    references with every bit flipped at the reference's measured
+    unreliability (100 - reliability %), as a fielded device would answer.
+    """
+    rng = np.random.default_rng(seed)
+    challenges, devices = np.nonzero(db.enrolled)
+    pick = rng.integers(0, len(challenges), n)
+    requests = []
+    for c, d in zip(challenges[pick], devices[pick]):
+        flip_p = (100 - np.nan_to_num(db.reliability[c, d], nan=100.0)) / 100
+        flips = np.packbits(rng.random(8 * db.n_bytes) < flip_p)
+        requests.append((db.devices[d], int(c), (db.packed[c, d] ^ flips).tobytes().hex().upper()))
+    return requests
+
+def benchmark_identify(identify, requests):
+    """
+    Run identify(challenge, response) over stand_in_requests and report
+    the outcome counts, latency percentiles (ms) and lookups/sec.
+    """
+    latencies = np.empty(len(requests))
+    correct = rejected = wrong = 0
+    start = time.perf_counter()
+    for i, (device, challenge, response) in enumerate(requests):
+        t = time.perf_counter()
+        match = identify(challenge, response)
+        latencies[i] = time.perf_counter() - t
+        if match is None:
+            rejected += 1
+        elif match["device"] == device:
+            correct += 1
+        else:
+            wrong += 1
+    elapsed = time.perf_counter() - start
+    ms = latencies * 1000
+    return {
+        "requests": len(requests), "correct": correct, "rejected": rejected, "wrong": wrong,
+        "mean_ms": float(ms.mean()) if len(ms) else 0.0,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else 0.0,
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else 0.0,
+        "max_ms": float(ms.max()) if len(ms) else 0.0,
+        "per_sec": len(requests) / elapsed if elapsed else 0.0,
+    }
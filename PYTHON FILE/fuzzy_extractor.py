@@ -0,0 +1,184 @@
+import time
+import hashlib
+import numpy as np
+from scipy.stats import binom
+from puf_metrics import popcount
+
+# === CONFIGURATION ===
+REPETITION = 5        # inner repetition code: every outer codeword bit sent 5 times
+RM_M = 5              # outer first-order Reed-Muller RM(1, 5): 32-bit codewords carrying 6 bits
+KEY_CHALLENGES = 16   # challenge responses concatenated per key (16 x 256 = 4096 bits)
+TRIALS = 200          # noisy reproductions simulated per device
+CHUNK_BITS = 1 << 24  # response bits decoded per batch
+
+# === CODE ===
+class ConcatenatedCode:
+    """
+    Outer RM(1, m) code with every codeword bit repeated `repetition`
+    times (m=0 is a plain repetition code, repetition=1 plain RM(1, m)).
+    A block carries k = m + 1 message bits in n = 2^m * repetition bits:
+    codeword bit x is a0 XOR parity(a & x) for message (a0, a), repeated
+    in place. decode() is maximum-likelihood on a binary symmetric channel:
+    the +-1 values of each repeated bit are summed and correlated with all
+    2^(m+1) codewords through one Hadamard matrix product, so a whole
+    batch of blocks decodes in a few array operations.
+    """
+
+    def __init__(self, repetition=REPETITION, m=RM_M):
+        self.repetition = repetition
+        self.m = m
+        self.k = m + 1
+        self.n = (1 << m) * repetition
+        x = np.arange(1 << m)
+        # generator rows: all ones (a0), then bit i of the position x
+        self.generator = np.vstack([np.ones(1 << m, dtype=np.uint8)] +
+                                   [((x >> i) & 1).astype(np.uint8) for i in range(m)])
+        parity = popcount((x[:, None] & x[None, :]).astype(np.uint64)[..., None]) & 1
+        self.hadamard = (1 - 2 * parity).astype(np.float32)
+
+    def __repr__(self):
+        return f"{self.repetition}x RM(1,{self.m}) [{self.n},{self.k}]"
+
+    def encode(self, messages):
+        """(..., k) message bits -> (..., n) codeword bits."""
+        codewords = (messages.astype(np.int32) @ self.generator) & 1
+        return np.repeat(codewords.astype(np.uint8), self.repetition, axis=-1)
+
+    def decode(self, bits):
+        """(..., n) received bits -> (..., k) most likely message bits."""
+        soft = (1 - 2 * bits.astype(np.float32)).reshape(bits.shape[:-1] + (1 << self.m, self.repetition))
+        correlation = soft.sum(axis=-1) @ self.hadamard
+        best = np.abs(correlation).argmax(axis=-1)
+        a0 = np.take_along_axis(correlation, best[..., None], axis=-1)[..., 0] < 0
+        linear = (best[..., None] >> np.arange(self.m)) & 1
+        return np.concatenate([a0[..., None], linear], axis=-1).astype(np.uint8)
+
+    def block_failure_bound(self, p):
+        """
+        Upper bound on the block decoding failure rate at bit error rate p:
+        the inner majority vote fails with p_rep, the outer code with more
+        than its bounded-distance radius of such failures (ML does better).
+        """
+        p = np.asarray(p, dtype=float)
+        p_rep = binom.sf(self.repetition // 2, self.repetition, p)
+        if self.repetition % 2 == 0:
+            # ties go either way
+            p_rep = p_rep + 0.5 * binom.pmf(self.repetition // 2, self.repetition, p)
+        if self.m < 2:
+            return 1 - (1 - p_rep) ** (1 << self.m)
+        return binom.sf((1 << (self.m - 2)) - 1, 1 << self.m, p_rep)
+
+# === FUZZY EXTRACTOR ===
+class FuzzyExtractor:
+    """
+    Code-offset fuzzy extractor over n_bits response bits. generate()
+    picks a random message per block, publishes helper = response XOR
+    codeword and derives key = SHA-256 of the response. reproduce() XORs
+    a noisy response with the helper, decodes back to the codeword and so
+    recovers the enrolled response and its key. Bits beyond the last full
+    block are not used.
+    """
+
+    def __init__(self, n_bits, code=None):
+        self.code = code or ConcatenatedCode()
+        self.blocks = n_bits // self.code.n
+        if not self.blocks:
+            raise ValueError(f"{n_bits} response bits are too few for one {self.code!r} block")
+        self.used_bits = self.blocks * self.code.n
+        self.message_bits = self.blocks * self.code.k
+
+    @staticmethod
+    def keys(responses):
+        """(batch, 32) uint8 SHA-256 of each used response."""
+        packed = np.packbits(responses, axis=-1)
+        digests = b"".join(hashlib.sha256(row.tobytes()).digest() for row in packed)
+        return np.frombuffer(digests, dtype=np.uint8).reshape(len(packed), 32)
+
+    def generate(self, responses, rng=None):
+        """(batch, n_bits) reference bits -> helper (batch, used_bits) bits and keys (batch, 32)."""
+        rng = rng or np.random.default_rng()
+        responses = responses[:, :self.used_bits]
+        messages = rng.integers(0, 2, (responses.shape[0], self.blocks, self.code.k), dtype=np.uint8)
+        codewords = self.code.encode(messages).reshape(responses.shape)
+        return responses ^ codewords, self.keys(responses)
+
+    def recover(self, noisy, helper):
+        """(batch, n_bits) noisy bits and helper data -> (batch, used_bits) recovered reference bits."""
+        received = (noisy[:, :self.used_bits] ^ helper).reshape(-1, self.blocks, self.code.n)
+        codewords = self.code.encode(self.code.decode(received)).reshape(helper.shape)
+        return helper ^ codewords
+
+    def reproduce(self, noisy, helper):
+        return self.keys(self.recover(noisy, helper))
+
+    def key_failure_bound(self, flip_p):
+        """
+        Upper bound on the key failure rate for one bit error rate or
+        per-bit rates (..., n_bits), every block taken at its mean rate.
+        """
+        p = np.asarray(flip_p, dtype=float)
+        if p.ndim:
+            p = p[..., :self.used_bits].reshape(p.shape[:-1] + (self.blocks, self.code.n)).mean(axis=-1)
+        else:
+            p = np.full(self.blocks, p)
+        # 1 - prod(1 - b) without losing tiny block rates to rounding
+        return -np.expm1(np.log1p(-self.code.block_failure_bound(p)).sum(axis=-1))
+
+# === ENROLLMENT DATA ===
+def key_material(db, challenges):
+    """
+    Reference bits and bit error rates of every device of an
+    enrollment.EnrollmentDB that is enrolled on all `challenges`:
+    (device indices, (devices, len(challenges) * n_bits) reference bits,
+    same-shape bit error rates). The error rate of a bit is its challenge's
+    measured intra-chip HD, 1 - reliability / 100.
+    """
+    challenges = list(challenges)
+    devices = np.flatnonzero(db.enrolled[challenges].all(axis=0))
+    bits = np.unpackbits(db.packed[challenges][:, devices], axis=-1)[..., -db.n_bits:]
+    references = bits.transpose(1, 0, 2).reshape(len(devices), -1)
+    intra = 1 - np.nan_to_num(db.reliability[challenges][:, devices].T, nan=100.0) / 100
+    return devices, references, np.repeat(intra, db.n_bits, axis=1)
+
+def noisy_copies(references, flip_p, trials, rng):
+    """(trials * batch, n) noisy reproductions, trial-major: bits flipped independently with flip_p."""
+    flips = rng.random((trials,) + references.shape) < flip_p
+    return (references[None] ^ flips).reshape(-1, references.shape[1]).astype(np.uint8)
+
+def simulate_key_failures(extractor, references, flip_p, trials=TRIALS, seed=0, chunk_bits=CHUNK_BITS):
+    """
+    Enroll every reference, reproduce each `trials` times from noisy
+    copies and count failed keys per device. Returns (failures per device,
+    decode seconds, reproductions); the decode time excludes noise
+    generation. Flips are independent at each bit's rate, which is
+    pessimistic next to real chips whose errors sit on a few unstable bits.
+    """
+    rng = np.random.default_rng(seed)
+    helper, keys = extractor.generate(references, rng)
+    failures = np.zeros(references.shape[0], dtype=np.int64)
+    per_trial = references.shape[0] * references.shape[1]
+    step = max(1, chunk_bits // max(per_trial, 1))
+    seconds = 0.0
+    for start in range(0, trials, step):
+        n = min(step, trials - start)
+        noisy = noisy_copies(references, flip_p, n, rng)
+        t = time.perf_counter()
+        reproduced = extractor.reproduce(noisy, np.tile(helper, (n, 1)))
+        seconds += time.perf_counter() - t
+        failed = (reproduced != np.tile(keys, (n, 1))).any(axis=1).reshape(n, -1)
+        failures += failed.sum(axis=0)
+    return failures, seconds, trials * references.shape[0]
+
+def decoder_throughput(code, n_blocks=1 << 16, p=0.05, seed=0, repeat=3):
+    """Best-of-`repeat` decode rate of `code` in blocks/sec and Mbit/s of received bits."""
+    rng = np.random.default_rng(seed)
+    messages = rng.integers(0, 2, (n_blocks, code.k), dtype=np.uint8)
+    received = code.encode(messages) ^ (rng.random((n_blocks, code.n)) < p).astype(np.uint8)
+    best = min(_timed(code.decode, received) for _ in range(repeat))
+    return {"blocks_per_sec": n_blocks / best, "mbit_per_sec": n_blocks * code.n / best / 1e6,
+            "block_errors": int((code.decode(received) != messages).any(axis=1).sum())}
+
+def _timed(func, *args):
+    t = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t
@@ -0,0 +1,152 @@
+import os
+import glob
+import string
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from openpyxl import load_workbook, Workbook
+from puf_metrics import pack_hex, unpack_bits
+
+# === CONFIGURATION ===
+HEX_SHEET = "Majority HEX"
+BINARY_SHEET = "Majority Binary"
+OUTPUT_SUFFIX = " BINARY"
+OUTPUT_FORMATS = ("xlsx", "npz")
+
+_HEX_DIGITS = set(string.hexdigits)
+
+# === READING ===
+def read_sheet_rows(path, sheet_name=HEX_SHEET):
+    """
+    All rows of a sheet (header included) streamed in read-only mode and
+    trimmed to the used range, or None if the sheet is missing.
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            print(f"Error: Sheet '{sheet_name}' not found in {path}.")
+            return None
+        rows = [list(row) for row in wb[sheet_name].iter_rows(values_only=True)]
+    finally:
+        wb.close()
+
+    used = [i for i, row in enumerate(rows) if any(v not in (None, "") for v in row)]
+    rows = rows[:used[-1] + 1] if used else []
+    width = max((max(i for i, v in enumerate(row) if v not in (None, "")) + 1
+                 for row in rows if any(v not in (None, "") for v in row)), default=0)
+    return [row[:width] + [None] * (width - len(row)) for row in rows]
+
+# === DECODING ===
+def _hex_text(value):
+    """Stripped hex text of a cell, or None. Integer cells (e.g. 1234) are read as hex digits, as str() gives them."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    return text if text and set(text) <= _HEX_DIGITS else None
+
+def decode_hex_grid(rows):
+    """
+    Decode every hex cell of a grid of data rows at once.
+    Returns (packed, valid, lengths): packed (rows, cols, n_bytes) uint8
+    right-aligned to the widest cell, valid (rows, cols) bool and the hex
+    length of every cell (0 where not hex).
+    """
+    n_rows, n_cols = len(rows), max((len(r) for r in rows), default=0)
+    texts = [(r, c, _hex_text(v)) for r, row in enumerate(rows) for c, v in enumerate(row)]
+    cells = [cell for cell in texts if cell[2] is not None]
+    lengths = np.zeros((n_rows, n_cols), dtype=np.int32)
+    n_hex = max((len(v) for _, _, v in cells), default=0)
+    packed = np.zeros((n_rows, n_cols, (n_hex + 1) // 2), dtype=np.uint8)
+    if cells:
+        r_idx = np.array([r for r, _, _ in cells])
+        c_idx = np.array([c for _, c, _ in cells])
+        packed[r_idx, c_idx] = pack_hex([v for _, _, v in cells], n_hex)[0]
+        lengths[r_idx, c_idx] = [len(v) for _, _, v in cells]
+    return packed, lengths > 0, lengths
+
+def binary_strings(packed, lengths):
+    """Binary strings of the decoded cells ('' where not hex), 4 bits per hex digit with leading zeros."""
+    bits = unpack_bits(packed)
+    out = np.full(lengths.shape, "", dtype=object)
+    # one vectorised pass per distinct cell width
+    for n_hex in np.unique(lengths[lengths > 0]):
+        sel = lengths == n_hex
+        chars = (bits[sel][:, -4 * n_hex:] + ord('0')).astype(np.uint8)
+        out[sel] = np.char.decode(np.ascontiguousarray(chars).view(f"S{4 * n_hex}").ravel(), "ascii")
+    return out
+
+# === WRITING ===
+def write_binary_workbook(path, header, data_rows, binary):
+    """Majority Binary sheet written row by row in write-only mode; non-hex cells are copied as-is."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(BINARY_SHEET)
+    ws.append(header)
+    for r, row in enumerate(data_rows):
+        ws.append([binary[r, c] if binary[r, c] else v for c, v in enumerate(row)])
+    wb.save(path)
+
+def save_packed(path, header, packed, valid, lengths):
+    np.savez(path, packed=packed, valid=valid, lengths=lengths, header=np.array(["" if h is None else str(h) for h in header]))
+
+def load_packed(path):
+    """(header, packed, valid, lengths) of a file written by save_packed."""
+    data = np.load(path)
+    return data["header"].tolist(), data["packed"], data["valid"], data["lengths"]
+
+# === CONVERSION ===
+def output_path_for(path, output="xlsx", output_dir=None):
+    name = os.path.splitext(os.path.basename(path))[0] + OUTPUT_SUFFIX + "." + output
+    return os.path.join(output_dir or os.path.dirname(path), name)
+
+def convert_file(path, output="xlsx", output_path=None, sheet_name=HEX_SHEET):
+    """
+    Convert the hex sheet of one workbook (dimensions detected from the
+    sheet) to a Majority Binary workbook or a packed .npz array.
+    Returns (output path, converted cells) or None.
+    """
+    if output not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output '{output}', expected one of {OUTPUT_FORMATS}")
+    rows = read_sheet_rows(path, sheet_name)
+    if rows is None:
+        return None
+    header, data_rows = (rows[0], rows[1:]) if rows else ([], [])
+    packed, valid, lengths = decode_hex_grid(data_rows)
+
+    output_path = output_path or output_path_for(path, output)
+    if output == "npz":
+        save_packed(output_path, header, packed, valid, lengths)
+    else:
+        write_binary_workbook(output_path, header, data_rows, binary_strings(packed, lengths))
+    return output_path, int(valid.sum())
+
+def convert_directory(directory, output="xlsx", output_dir=None, pattern="*.xlsx",
+                      sheet_name=HEX_SHEET, workers=None, show_bar=None):
+    """
+    Convert every matching workbook in a directory, one file per process.
+    Returns {input path: (output path, converted cells) or None}.
+    """
+    paths = sorted(
+        p for p in glob.glob(os.path.join(directory, pattern))
+        if not os.path.splitext(os.path.basename(p))[0].endswith(OUTPUT_SUFFIX)
+        and not os.path.basename(p).startswith("~$")
+    )
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    jobs = {p: output_path_for(p, output, output_dir) for p in paths}
+
+    results = {}
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        for done, path in enumerate(paths, start=1):
+            results[path] = convert_file(path, output, jobs[path], sheet_name)
+            if show_bar:
+                show_bar(done, len(paths))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            futures = {pool.submit(convert_file, p, output, jobs[p], sheet_name): p for p in paths}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                if show_bar:
+                    show_bar(done, len(paths))
+    return results
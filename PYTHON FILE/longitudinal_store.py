@@ -0,0 +1,333 @@
+import os
+import json
+import time
+import numpy as np
+from puf_metrics import pack_hex
+from response_cache import load_design
+
+# === CONFIGURATION ===
+META_FILE = "meta.json"
+RUNS_FILE = "runs.jsonl"              # one record per acquisition run, appended
+DEVICE_FILE = "device_{index:04d}.npz"  # running aggregates of one device
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def device_name(header):
+    """Device of a result column header ("F7 - A" -> "F7")."""
+    return str(header).split(" - ")[0].strip()
+
+# === RUNNING AGGREGATES ===
+class DeviceHistory:
+    """
+    Fixed-size running aggregates of one device over all its runs:
+      reference      (challenges, n_bytes) first majority seen per challenge
+      has_reference  (challenges,) bool
+      count, mean, m2  (challenges,) Welford accumulators of the reliability
+      bit_flips      (challenges, n_bits) batch responses that differed from
+                     their majority, summed over runs (noise)
+      flip_samples   (challenges,) responses behind bit_flips
+      drift_flips    (challenges, n_bits) runs whose majority bit differed
+                     from the reference (drift)
+      drift_runs     (challenges,) runs compared with the reference
+    Adding a run touches these arrays only, never earlier runs.
+    """
+
+    FIELDS = ("reference", "has_reference", "count", "mean", "m2",
+              "bit_flips", "flip_samples", "drift_flips", "drift_runs")
+
+    def __init__(self, n_challenges, n_bits, arrays=None):
+        n_bytes = (n_bits + 7) // 8
+        self.n_bits = n_bits
+        if arrays is None:
+            arrays = {
+                "reference": np.zeros((n_challenges, n_bytes), dtype=np.uint8),
+                "has_reference": np.zeros(n_challenges, dtype=bool),
+                "count": np.zeros(n_challenges, dtype=np.int64),
+                "mean": np.zeros(n_challenges),
+                "m2": np.zeros(n_challenges),
+                "bit_flips": np.zeros((n_challenges, n_bits), dtype=np.int64),
+                "flip_samples": np.zeros(n_challenges, dtype=np.int64),
+                "drift_flips": np.zeros((n_challenges, n_bits), dtype=np.int64),
+                "drift_runs": np.zeros(n_challenges, dtype=np.int64),
+            }
+        for name in self.FIELDS:
+            setattr(self, name, arrays[name])
+
+    def update(self, majority, valid, reliability, bit_flips=None, flip_samples=None):
+        """
+        Fold one run in: (challenges, n_bytes) majority, (challenges,) valid
+        mask and reliability, optional (challenges, n_bits) batch bit flips
+        with (challenges,) samples. Returns the run's drift HD per compared
+        challenge, in bits.
+        """
+        rel = np.asarray(reliability, dtype=float)
+        seen = valid & ~np.isnan(rel)
+        # Welford: one pass, no history
+        self.count[seen] += 1
+        delta = rel[seen] - self.mean[seen]
+        self.mean[seen] += delta / self.count[seen]
+        self.m2[seen] += delta * (rel[seen] - self.mean[seen])
+
+        compared = valid & self.has_reference
+        diff = np.unpackbits(majority[compared] ^ self.reference[compared], axis=-1)[:, -self.n_bits:]
+        self.drift_flips[compared] += diff
+        self.drift_runs[compared] += 1
+
+        new = valid & ~self.has_reference
+        self.reference[new] = majority[new]
+        self.has_reference |= valid
+
+        if bit_flips is not None:
+            self.bit_flips += np.asarray(bit_flips, dtype=np.int64)[:, -self.n_bits:]
+            self.flip_samples += np.asarray(flip_samples, dtype=np.int64)
+        return diff.sum(axis=1)
+
+    def variance(self):
+        """(challenges,) sample variance of the reliability, NaN below two runs."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    def noise_flip_rate(self):
+        """(challenges, n_bits) fraction of responses that differed from their batch majority."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.flip_samples[:, None] > 0, self.bit_flips / self.flip_samples[:, None], np.nan)
+
+    def drift_flip_rate(self):
+        """(challenges, n_bits) fraction of runs whose majority bit moved away from the reference."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.drift_runs[:, None] > 0, self.drift_flips / self.drift_runs[:, None], np.nan)
+
+# === STORE ===
+class LongitudinalStore:
+    """
+    Directory of acquisition runs tagged with a timestamp and conditions
+    (temperature, voltage, age, ...). runs.jsonl keeps one summary record
+    per run, meta.json the devices, ingested workbook columns and per
+    (device, conditions) Welford aggregates of the run reliability, and
+    one DeviceHistory file per device the per-challenge and per-bit
+    aggregates. Adding a run costs O(challenges x bits) for its device;
+    trend queries read the in-memory run records.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        meta = {}
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+        self.n_bits = meta.get("n_bits")
+        self.n_challenges = meta.get("n_challenges")
+        self.devices = meta.get("devices", [])
+        self.sources = meta.get("sources", {})
+        self.condition_stats = meta.get("condition_stats", {})
+        self.records = []
+        runs_path = os.path.join(path, RUNS_FILE)
+        if os.path.exists(runs_path):
+            with open(runs_path, "r", encoding="utf-8") as f:
+                self.records = [json.loads(line) for line in f if line.strip()]
+        self._device_runs = {}
+        for r in self.records:
+            self._device_runs[r["device"]] = r["device_run"]
+        self._histories = {}
+
+    # === PERSISTENCE ===
+    def _save_meta(self):
+        meta = {"n_bits": self.n_bits, "n_challenges": self.n_challenges, "devices": self.devices,
+                "sources": self.sources, "condition_stats": self.condition_stats}
+        tmp = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    def _device_path(self, device):
+        return os.path.join(self.path, DEVICE_FILE.format(index=self.devices.index(device)))
+
+    def history(self, device):
+        """DeviceHistory of an already recorded device."""
+        if device not in self.devices:
+            raise KeyError(f"No runs recorded for device '{device}'")
+        if device not in self._histories:
+            path = self._device_path(device)
+            if os.path.exists(path):
+                with np.load(path, allow_pickle=False) as data:
+                    self._histories[device] = DeviceHistory(
+                        self.n_challenges, self.n_bits, {name: data[name] for name in DeviceHistory.FIELDS})
+            else:
+                self._histories[device] = DeviceHistory(self.n_challenges, self.n_bits)
+        return self._histories[device]
+
+    def _save_history(self, device):
+        history = self._histories[device]
+        tmp = self._device_path(device) + ".tmp.npz"
+        np.savez(tmp, **{name: getattr(history, name) for name in DeviceHistory.FIELDS})
+        os.replace(tmp, self._device_path(device))
+
+    # === RECORDING ===
+    def add_run(self, device, majority, valid=None, reliability=None, conditions=None, timestamp=None,
+                source=None, bit_flips=None, flip_samples=None):
+        """
+        Record one acquisition run of a device: majority responses as hex
+        strings (None = missing) or a (challenges, n_bytes) array, its
+        reliabilities (%), optional per-bit batch flip counts with the
+        responses behind them, conditions ({"temperature_c": 25, ...}) and
+        timestamp (default now). Returns the run record.
+        """
+        if not isinstance(majority, np.ndarray):
+            hexes = list(majority)
+            valid = np.array([h not in (None, "") for h in hexes]) if valid is None else np.asarray(valid)
+            n_hex = max((len(str(h).strip()) for h in hexes if h not in (None, "")), default=0)
+            majority = np.zeros((len(hexes), (n_hex + 1) // 2), dtype=np.uint8)
+            if valid.any():
+                majority[valid] = pack_hex([h for h, v in zip(hexes, valid) if v], n_hex)[0]
+            n_bits = n_hex * 4
+        else:
+            valid = np.ones(majority.shape[0], dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+            n_bits = self.n_bits or 8 * majority.shape[1]
+        if reliability is None:
+            reliability = np.full(majority.shape[0], np.nan)
+
+        if self.n_bits is None:
+            self.n_bits, self.n_challenges = n_bits, majority.shape[0]
+        if majority.shape != (self.n_challenges, (self.n_bits + 7) // 8):
+            raise ValueError(f"Expected {self.n_challenges} challenges of {self.n_bits} bits, "
+                             f"got {majority.shape[0]} x {8 * majority.shape[1]}")
+        if device not in self.devices:
+            self.devices.append(device)
+
+        history = self.history(device)
+        rel = np.asarray(reliability, dtype=float)
+        compared = valid & history.has_reference
+        drift = history.update(majority, valid, rel, bit_flips, flip_samples)
+        self._save_history(device)
+
+        measured = rel[valid & ~np.isnan(rel)]
+        run_mean = float(measured.mean()) if len(measured) else None
+        record = {
+            "run": len(self.records) + 1,
+            "device_run": self._device_runs.get(device, 0) + 1,
+            "device": device,
+            "timestamp": timestamp or time.strftime(TIME_FORMAT),
+            "conditions": dict(conditions or {}),
+            "source": source,
+            "challenges": int(valid.sum()),
+            "reliability_mean": run_mean,
+            "reliability_std": float(measured.std()) if len(measured) else None,
+            "drift_hd_percent": float(drift.mean() / self.n_bits * 100) if compared.any() else None,
+            "noise_flip_percent": (float(np.asarray(bit_flips)[:, -self.n_bits:].sum()
+                                         / max(int(np.sum(flip_samples)), 1) / self.n_bits * 100)
+                                   if bit_flips is not None else None),
+        }
+        with open(os.path.join(self.path, RUNS_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self.records.append(record)
+        self._device_runs[device] = record["device_run"]
+
+        if run_mean is not None:
+            stats = self.condition_stats.setdefault(
+                self.condition_key(device, record["conditions"]), {"count": 0, "mean": 0.0, "m2": 0.0})
+            stats["count"] += 1
+            delta = run_mean - stats["mean"]
+            stats["mean"] += delta / stats["count"]
+            stats["m2"] += delta * (run_mean - stats["mean"])
+        self._save_meta()
+        return record
+
+    @staticmethod
+    def condition_key(device, conditions):
+        return f"{device}|{json.dumps(conditions, sort_keys=True)}"
+
+    def ingest_workbook(self, path, conditions=None, timestamp=None, start_row=2, end_row=257):
+        """
+        Record every result column of a RESULTS workbook that is not in the
+        store yet (each run adds one column per device), so re-ingesting a
+        growing workbook only reads in the new runs. Returns their records.
+        """
+        design = load_design(path, start_row, end_row)
+        if design is None:
+            raise ValueError(f"{path} is missing the Majority HEX / Reliability sheets")
+        key = os.path.abspath(path)
+        done = set(self.sources.get(key, []))
+        if self.n_bits is None:
+            self.n_bits, self.n_challenges = design.n_bits, design.packed.shape[0]
+        records = []
+        for col in range(design.valid.shape[1]):
+            if col in done:
+                continue
+            header = design.header[col] if col < len(design.header) else None
+            reliability = design.reliability[:, col] if col < design.reliability.shape[1] else None
+            records.append(self.add_run(
+                device_name(header) if header else f"Column {col + 1}",
+                np.ascontiguousarray(design.packed[:, col]), design.valid[:, col], reliability,
+                conditions, timestamp, source=f"{path} [{header or col + 1}]",
+            ))
+            self.sources.setdefault(key, []).append(col)
+            self._save_meta()
+        return records
+
+    def add_journal(self, journal, conditions=None, timestamp=None, bit_flips=None,
+                    xlsx_file=None, columns=None):
+        """
+        Record the device columns of a completed ResponseJournal; bit_flips
+        maps device -> {challenge: ((n_bits,) flip counts, batch responses)}
+        for the batches processed in this session. When the journal was exported,
+        pass the workbook and journal_to_xlsx's {device: column} so a later
+        ingest_workbook of it skips these runs.
+        """
+        records = []
+        for device in journal.headers:
+            rows = journal.rows.get(device, [])
+            n = self.n_challenges or (max((c for c, _, _ in rows), default=-1) + 1)
+            hexes = [None] * n
+            reliability = np.full(n, np.nan)
+            for challenge, majority_hex, rel in rows:
+                if challenge < n:
+                    hexes[challenge], reliability[challenge] = majority_hex, rel
+            flips = samples = None
+            if bit_flips and bit_flips.get(device):
+                n_bits = len(next(iter(bit_flips[device].values()))[0])
+                flips = np.zeros((n, n_bits), dtype=np.int64)
+                samples = np.zeros(n, dtype=np.int64)
+                for challenge, (counts, responses) in bit_flips[device].items():
+                    if challenge < n:
+                        flips[challenge], samples[challenge] = counts, responses
+            records.append(self.add_run(device, hexes, None, reliability, conditions, timestamp,
+                                        journal.path, flips, samples))
+            if xlsx_file and device in columns:
+                self.sources.setdefault(os.path.abspath(xlsx_file), []).append(columns[device])
+                self._save_meta()
+        return records
+
+    # === QUERIES ===
+    def runs(self, device=None, **conditions):
+        """Run records, optionally of one device and matching condition values."""
+        return [
+            r for r in self.records
+            if (device is None or r["device"] == device)
+            and all(r["conditions"].get(k) == v for k, v in conditions.items())
+        ]
+
+    def reliability_trend(self, device):
+        """[(device run number, timestamp, conditions, mean reliability %)] in run order."""
+        return [(r["device_run"], r["timestamp"], r["conditions"], r["reliability_mean"]) for r in self.runs(device)]
+
+    def drift_trend(self, device):
+        """[(device run number, timestamp, conditions, mean HD % to the reference)] in run order."""
+        return [(r["device_run"], r["timestamp"], r["conditions"], r["drift_hd_percent"]) for r in self.runs(device)]
+
+    def condition_summary(self, device=None):
+        """[(device, conditions, runs, mean, std of the run reliability)] per condition set."""
+        out = []
+        for key, s in self.condition_stats.items():
+            name, _, conditions = key.partition("|")
+            if device is None or name == device:
+                std = (s["m2"] / (s["count"] - 1)) ** 0.5 if s["count"] > 1 else None
+                out.append((name, json.loads(conditions), s["count"], s["mean"], std))
+        return out
+
+    def unstable_bits(self, device, threshold=0.1, drift=False):
+        """[(challenge, bit)] whose noise (or drift) flip rate exceeds `threshold`."""
+        history = self.history(device)
+        rate = history.drift_flip_rate() if drift else history.noise_flip_rate()
+        with np.errstate(invalid="ignore"):
+            return [(int(c), int(b)) for c, b in np.argwhere(rate > threshold)]
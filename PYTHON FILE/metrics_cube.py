@@ -0,0 +1,279 @@
+import json
+import numpy as np
+from puf_metrics import (pairwise_hd_batch, popcount, bit_counts, uniqueness_from_bit_counts,
+                         check_uniqueness_method)
+from response_cache import load_design
+
+# === CONFIGURATION ===
+IDEAL = 50.0  # ideal uniqueness / uniformity / bit-aliasing (%)
+METRICS = ("uniqueness", "uniformity", "reliability", "aliasing")
+
+# === CUBE ===
+class MetricsCube:
+    """
+    Precomputed response metrics for several designs, padded to the same
+    number of chips M:
+      hd        (designs, challenges, pairs) int32 inter-chip HD, pairs in
+                upper-triangle row-major order of `pairs`; None when built
+                with method="popcount" (uniqueness then comes from bit_ones)
+      ones      (designs, challenges, M) int32 set bits per response
+      bit_ones  (designs, challenges, n_bits) int32 chips with bit i set
+      valid     (designs, challenges, M) bool
+      reliability (designs, challenges, M) float64, NaN where empty
+    Challenge c of every design is sheet row start_row + c. All queries
+    below are array operations on these, no workbook is read.
+    """
+
+    def __init__(self, labels, devices, hd, ones, bit_ones, valid, reliability, n_bits, start_row=2):
+        self.labels = list(labels)
+        self.devices = [list(d) for d in devices]
+        self.hd = hd
+        self.ones = ones
+        self.bit_ones = bit_ones
+        self.valid = valid
+        self.reliability = reliability
+        self.n_bits = np.asarray(n_bits)
+        self.start_row = start_row
+        self.pairs = np.stack(np.triu_indices(valid.shape[2], 1), axis=1) if hd is not None else None
+
+    # === CONSTRUCTION ===
+    @classmethod
+    def from_packed(cls, labels, devices, packed, valid, reliability, n_bits, start_row=2, method="pairwise"):
+        """
+        Build from per-design (challenges, chips, n_bytes) packed responses,
+        (challenges, chips) masks and reliabilities; n_bits per design.
+        method="popcount" skips the pairwise HD array, which grows with the
+        square of the chip count; pair queries are then unavailable.
+        """
+        check_uniqueness_method(method)
+        n_chips = max((v.shape[1] for v in valid), default=0)
+        n_challenges = max((v.shape[0] for v in valid), default=0)
+        max_bits = max(list(n_bits) + [0])
+        shape = (len(labels), n_challenges)
+        if method == "pairwise":
+            iu = np.triu_indices(n_chips, 1)
+            hd = np.zeros(shape + (len(iu[0]),), dtype=np.int32)
+        else:
+            hd = None
+        ones = np.zeros(shape + (n_chips,), dtype=np.int32)
+        bit_ones = np.zeros(shape + (max_bits,), dtype=np.int32)
+        valid_all = np.zeros(shape + (n_chips,), dtype=bool)
+        rel_all = np.full(shape + (n_chips,), np.nan)
+
+        for d, (p, v, r, bits) in enumerate(zip(packed, valid, reliability, n_bits)):
+            c, m = v.shape
+            p = np.where(v[:, :, None], p, 0).astype(np.uint8)
+            padded = np.zeros((c, n_chips, p.shape[2]), dtype=np.uint8)
+            padded[:, :m] = p
+            if hd is not None:
+                hd[d, :c] = pairwise_hd_batch(padded)[:, iu[0], iu[1]]
+            ones[d, :c, :m] = popcount(p)
+            if bits:
+                bit_ones[d, :c, max_bits - bits:] = bit_counts(p)[:, -bits:]
+            valid_all[d, :c, :m] = v
+            r = np.asarray(r, dtype=float)
+            rel_all[d, :r.shape[0], :r.shape[1]] = r
+        return cls(labels, devices, hd, ones, bit_ones, valid_all, rel_all, n_bits, start_row)
+
+    @classmethod
+    def from_designs(cls, designs, labels, method="pairwise"):
+        """Build from response_cache.DesignResponses (missing designs are skipped)."""
+        present = [(label, d) for label, d in zip(labels, designs) if d is not None]
+        return cls.from_packed(
+            [label for label, _ in present],
+            [[h if h else f"Column {i + 1}" for i, h in enumerate(d.header)] for _, d in present],
+            [d.packed for _, d in present],
+            [d.valid for _, d in present],
+            [d.reliability[:, :d.valid.shape[1]] for _, d in present],
+            [d.n_bits for _, d in present],
+            present[0][1].start_row if present else 2,
+            method,
+        )
+
+    @classmethod
+    def from_files(cls, paths, labels, start_row=2, end_row=257, method="pairwise"):
+        return cls.from_designs([load_design(p, start_row, end_row) for p in paths], labels, method)
+
+    @classmethod
+    def from_store(cls, store, designs=None, labels=None, method="pairwise"):
+        designs = designs or store.designs
+        idx = [store.design_index(d) for d in designs]
+        return cls.from_packed(
+            labels or list(designs), [store.devices[d] for d in idx],
+            [np.asarray(store.majority[d]).transpose(1, 0, 2) for d in idx],
+            [np.asarray(store.valid[d]).T for d in idx],
+            [np.asarray(store.reliability[d]).T for d in idx],
+            [store.n_bits] * len(idx), store.start_row, method,
+        )
+
+    def save(self, path):
+        meta = {"labels": self.labels, "devices": self.devices, "start_row": self.start_row}
+        arrays = {} if self.hd is None else {"hd": self.hd}
+        np.savez(path, meta=np.array(json.dumps(meta, default=str)), ones=self.ones, bit_ones=self.bit_ones,
+                 valid=self.valid, reliability=self.reliability, n_bits=self.n_bits, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            hd = data["hd"] if "hd" in data.files else None
+            return cls(meta["labels"], meta["devices"], hd, data["ones"], data["bit_ones"],
+                       data["valid"], data["reliability"], data["n_bits"], meta["start_row"])
+
+    # === INDEXING ===
+    def design_index(self, design):
+        return design if isinstance(design, (int, np.integer)) else self.labels.index(design)
+
+    def _designs(self, designs):
+        return list(range(len(self.labels))) if designs is None else [self.design_index(d) for d in designs]
+
+    def challenge_row(self, challenge):
+        return self.start_row + int(challenge)
+
+    # === PER-CHALLENGE METRICS ===
+    def chip_counts(self):
+        """(designs, challenges) responses per challenge."""
+        return self.valid.sum(axis=2)
+
+    def pair_valid(self):
+        """(designs, challenges, pairs) both chips of the pair responded."""
+        if self.hd is None:
+            raise ValueError("Pairwise HDs were not kept (cube built with method='popcount')")
+        return self.valid[:, :, self.pairs[:, 0]] & self.valid[:, :, self.pairs[:, 1]]
+
+    def pair_hd_percent(self):
+        """(designs, challenges, pairs) inter-chip HD in %, NaN where a chip is missing."""
+        with np.errstate(invalid="ignore"):
+            pct = self.hd / self.n_bits[:, None, None] * 100
+        return np.where(self.pair_valid(), pct, np.nan)
+
+    def uniqueness(self):
+        """(designs, challenges) uniqueness in %, 0 where fewer than two chips (as PARAMETER CALCULATION)."""
+        k = self.chip_counts()
+        if self.hd is None:
+            return uniqueness_from_bit_counts(self.bit_ones, k, self.n_bits[:, None])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fractions = np.where(self.pair_valid(), self.hd / self.n_bits[:, None, None], 0.0)
+            # cumsum adds in pair order, matching the reference per-pair Python sum exactly
+            total = np.cumsum(fractions, axis=2)[:, :, -1] if fractions.shape[2] else np.zeros(k.shape)
+            u = (2 * total / (k * (k - 1))) * 100
+        return np.where(k >= 2, u, 0.0)
+
+    def uniformity(self):
+        """(designs, challenges) mean uniformity of the responding chips in %."""
+        k = self.chip_counts()
+        ones = np.where(self.valid, self.ones, 0).sum(axis=2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = (ones / (k * self.n_bits[:, None])) * 100
+        return np.where(k > 0, u, 0.0)
+
+    def chip_uniformity(self):
+        """(designs, challenges, chips) uniformity of every response in %, NaN where empty."""
+        with np.errstate(invalid="ignore"):
+            return np.where(self.valid, self.ones / self.n_bits[:, None, None] * 100, np.nan)
+
+    def bit_aliasing(self):
+        """(designs, challenges, n_bits) % of chips with bit i set, NaN without responses."""
+        k = self.chip_counts()[:, :, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(k > 0, self.bit_ones / k * 100, np.nan)
+
+    def aliasing(self):
+        """(designs, challenges) mean |bit-aliasing - 50| over bit positions (0 is ideal)."""
+        with np.errstate(invalid="ignore"):
+            dev = np.abs(self.bit_aliasing() - IDEAL)
+        out = np.full(dev.shape[:2], np.nan)
+        has = ~np.isnan(dev).all(axis=2)
+        out[has] = np.nanmean(dev[has], axis=1)
+        return out
+
+    def challenge_reliability(self, chip=0):
+        """(designs, challenges) reliability of one chip column (PARAMETER CALCULATION uses the first)."""
+        return self.reliability[:, :, chip]
+
+    def metric(self, name):
+        if name == "uniqueness":
+            return self.uniqueness()
+        if name == "uniformity":
+            return self.uniformity()
+        if name == "reliability":
+            return self.challenge_reliability()
+        if name == "aliasing":
+            return self.aliasing()
+        raise ValueError(f"Unknown metric '{name}', expected one of {METRICS}")
+
+    # === QUERIES ===
+    def worst_challenges(self, design, n=10, metric="uniqueness"):
+        """
+        The n challenges of a design that are furthest from ideal: uniqueness
+        and uniformity furthest from 50%, reliability lowest, aliasing highest.
+        Returns [(challenge, sheet row, value)], worst first.
+        """
+        d = self.design_index(design)
+        values = self.metric(metric)[d]
+        has = self.chip_counts()[d] > 0
+        if metric in ("uniqueness", "uniformity"):
+            badness = np.abs(values - IDEAL)
+        elif metric == "reliability":
+            badness = -values
+        else:
+            badness = values
+        badness = np.where(has & ~np.isnan(badness), badness, -np.inf)
+        order = np.argsort(-badness, kind="stable")[:n]
+        return [(int(c), self.challenge_row(c), float(values[c])) for c in order if np.isfinite(badness[c])]
+
+    def low_hd_pairs(self, threshold=40.0, designs=None, per_challenge=False):
+        """
+        Chip pairs whose inter-chip HD is below `threshold` %.
+        per_challenge=False compares the pair's mean HD over all challenges
+        and returns [(design, chip a, chip b, mean HD %)]; True returns every
+        (design, challenge, chip a, chip b, HD %).
+        """
+        pct = self.pair_hd_percent()
+        out = []
+        for d in self._designs(designs):
+            names = self.devices[d]
+            if per_challenge:
+                for c, p in np.argwhere(pct[d] < threshold):
+                    a, b = self.pairs[p]
+                    out.append((self.labels[d], int(c), names[a], names[b], float(pct[d, c, p])))
+                continue
+            seen = ~np.isnan(pct[d]).all(axis=0)
+            means = np.full(pct.shape[2], np.nan)
+            means[seen] = np.nanmean(pct[d][:, seen], axis=0)
+            for p in np.flatnonzero(means < threshold):
+                a, b = self.pairs[p]
+                out.append((self.labels[d], names[a], names[b], float(means[p])))
+        return out
+
+    # === REPORT VIEWS ===
+    def details(self, design):
+        """Details rows [(challenge, uniqueness, uniformity, reliability)] for challenges with data."""
+        d = self.design_index(design)
+        uniq, unif = self.uniqueness()[d], self.uniformity()[d]
+        rel = np.nan_to_num(self.challenge_reliability()[d], nan=0.0)
+        return [
+            (self.challenge_row(c) - 1, float(uniq[c]), float(unif[c]), float(rel[c]))
+            for c in np.flatnonzero(self.chip_counts()[d] > 0)
+        ]
+
+    def summary(self, design):
+        """
+        Weighted mean uniqueness / uniformity (weights = chips per challenge),
+        mean reliability and the challenge with the highest uniqueness.
+        """
+        d = self.design_index(design)
+        rows = self.details(d)
+        counts = self.chip_counts()[d][self.chip_counts()[d] > 0].tolist()
+        total = sum(counts) or 1
+        max_challenge, max_u = None, -1
+        for challenge, u, _, _ in rows:
+            if u > max_u:
+                max_challenge, max_u = challenge, u
+        return {
+            "uniqueness": sum(r[1] * c for r, c in zip(rows, counts)) / total,
+            "uniformity": sum(r[2] * c for r, c in zip(rows, counts)) / total,
+            "reliability": sum(r[3] for r in rows) / len(rows) if rows else 0.0,
+            "max_challenge": max_challenge,
+            "max_uniqueness": max_u,
+        }
@@ -0,0 +1,465 @@
+import os
+import numpy as np
+from scipy.special import gammaincc, erfc, ndtr
+from concurrent.futures import ProcessPoolExecutor
+from openpyxl import Workbook
+from puf_metrics import unpack_bits
+from response_cache import load_design
+
+# === CONFIGURATION ===
+ALPHA = 0.01                # significance level of every test
+BLOCK_FREQUENCY_M = 128     # block length of the block frequency test
+APEN_MAX_M = 10             # largest approximate entropy block length
+SERIAL_MAX_M = 16           # largest serial test block length
+CHUNK_SEQUENCES = 4096      # sequences per process pool task
+
+# === RANDOM EXCURSIONS ===
+class RandomExcursions:
+    @staticmethod
+    def get_pi_value(k, x):
+        if k == 0:
+            return 1 - 1.0 / (2 * abs(x))
+        elif k >= 5:
+            return (1.0 / (2 * abs(x))) * (1 - 1.0 / (2 * abs(x))) ** 4
+        else:
+            return (1.0 / (4 * x * x)) * (1 - 1.0 / (2 * abs(x))) ** (k - 1)
+
+    @staticmethod
+    def test(binary_data, verbose=True):
+        p_values, cycles = RandomExcursions.batch(to_bits(binary_data))
+        if cycles[0] < 1:
+            if verbose:
+                print("⚠️  Not enough zero-crossings for Random Excursions Test.")
+            return [0.0] * len(EXCURSION_STATES)
+
+        if verbose:
+            print(f"🔍 Zero-crossing cycles found: {cycles[0]}")
+        return p_values[0].tolist()
+
+    @staticmethod
+    def batch(bits):
+        """
+        Random Excursions over a (sequences, n) 0/1 array in one pass.
+        Every state visit is assigned to its cycle by searching the flat
+        zero-crossing positions of the random walks, visits are counted per
+        (cycle, state) with bincount, and the clipped counts are histogrammed
+        per (sequence, state) the same way. No per-cycle arrays are built.
+
+        Returns ((sequences, 8) p-values for states -4..-1, 1..4, cycles per
+        sequence). Sequences without a cycle get p = 0.
+        """
+        n_seq, n = bits.shape
+        n_states = len(EXCURSION_STATES)
+        walk = _excursion_walk(bits).ravel()
+
+        zero_pos = np.flatnonzero(walk == 0)
+        cycles = np.bincount(zero_pos // (n + 2), minlength=n_seq) - 1
+
+        visits = np.flatnonzero((walk != 0) & (np.abs(walk) <= 4))
+        state = walk[visits]
+        state = np.where(state < 0, state + 4, state + 3)
+        cycle = np.searchsorted(zero_pos, visits, side="right") - 1
+        counts = np.bincount(cycle * n_states + state, minlength=len(zero_pos) * n_states)
+        counts = np.minimum(counts.reshape(len(zero_pos), n_states), 5)
+
+        # the closing zero of each walk starts no cycle
+        real = zero_pos % (n + 2) != n + 1
+        row = (zero_pos // (n + 2))[real]
+        key = (row[:, None] * n_states + np.arange(n_states)) * 6 + counts[real]
+        su = np.bincount(key.ravel(), minlength=n_seq * n_states * 6).reshape(n_seq, n_states, 6)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inner_term = cycles[:, None, None] * _PI_TABLE
+            x_obs = ((su - inner_term) ** 2 / inner_term).sum(axis=2)
+            p_values = gammaincc(2.5, x_obs / 2.0)
+        p_values[cycles < 1] = 0.0
+        return p_values, cycles
+
+EXCURSION_STATES = (-4, -3, -2, -1, 1, 2, 3, 4)
+# pi_k(x): probability of exactly k visits (k = 5: five or more) to state x in a cycle
+_PI_TABLE = np.array([[RandomExcursions.get_pi_value(k, x) for k in range(6)] for x in EXCURSION_STATES])
+
+# === HELPERS ===
+def to_bits(data):
+    """'0'/'1' string, list of strings or 0/1 array -> (sequences, n) uint8 array."""
+    if isinstance(data, str):
+        data = [data]
+    if isinstance(data, (list, tuple)) and data and isinstance(data[0], str):
+        return (np.array([list(s) for s in data]) == '1').astype(np.uint8)
+    return np.atleast_2d(np.asarray(data, dtype=np.uint8))
+
+def _signs(bits):
+    return bits.astype(np.int32) * 2 - 1
+
+def _pattern_counts(bits, m):
+    """Per-sequence counts of every overlapping (cyclic) m-bit pattern, shape (S, 2**m)."""
+    n_seq, n = bits.shape
+    if m == 0:
+        return np.full((n_seq, 1), n, dtype=np.int64)
+    ext = np.concatenate([bits, bits[:, :m - 1]], axis=1).astype(np.int32)
+    values = np.zeros((n_seq, n), dtype=np.int32)
+    for i in range(m):
+        values = (values << 1) | ext[:, i:i + n]
+    offsets = np.arange(n_seq, dtype=np.int64)[:, None] << m
+    return np.bincount((values + offsets).ravel(), minlength=n_seq << m).reshape(n_seq, 1 << m)
+
+def _max_run(blocks):
+    """Longest run of ones in each row of a (rows, M) 0/1 array."""
+    rows, m = blocks.shape
+    padded = np.zeros((rows, m + 2), dtype=np.uint8)
+    padded[:, 1:-1] = blocks
+    zeros_at = np.flatnonzero(padded.ravel() == 0)
+    gaps = np.diff(zeros_at) - 1
+    # every row starts with a padding zero, so reduceat segments map to rows
+    starts = np.searchsorted(zeros_at[:-1] // (m + 2), np.arange(rows))
+    return np.maximum.reduceat(gaps, starts)
+
+def _gf2_rank(matrices):
+    """Rank over GF(2) of a batch of (R, 32, 32) 0/1 matrices."""
+    n_mat, size, _ = matrices.shape
+    rows = (matrices.astype(np.uint64) << np.arange(size - 1, -1, -1, dtype=np.uint64)).sum(axis=2)
+    rank = np.zeros(n_mat, dtype=np.int64)
+    row_idx = np.arange(size)
+    for col in range(size):
+        shift = np.uint64(size - 1 - col)
+        has = ((rows >> shift) & np.uint64(1)).astype(bool)
+        candidate = has & (row_idx >= rank[:, None])
+        r = np.flatnonzero(candidate.any(axis=1))
+        if not len(r):
+            continue
+        piv = candidate[r].argmax(axis=1)
+        top = rank[r]
+        pivot_row = rows[r, piv]
+        rows[r, piv] = rows[r, top]
+        rows[r, top] = pivot_row
+        eliminate = ((rows[r] >> shift) & np.uint64(1)).astype(bool)
+        eliminate[np.arange(len(r)), top] = False
+        rows[r] ^= np.where(eliminate, pivot_row[:, None], np.uint64(0))
+        rank[r] += 1
+    return rank
+
+# === TESTS ===
+# Each test takes a (sequences, n) 0/1 uint8 array and returns a
+# (sequences, subtests) array of p-values; NaN marks "not applicable".
+
+def frequency(bits):
+    n = bits.shape[1]
+    s_obs = np.abs(_signs(bits).sum(axis=1)) / np.sqrt(n)
+    return erfc(s_obs / np.sqrt(2))[:, None]
+
+def block_frequency(bits, m=BLOCK_FREQUENCY_M):
+    n_seq, n = bits.shape
+    n_blocks = n // m
+    if n_blocks == 0:
+        return np.full((n_seq, 1), np.nan)
+    pi = bits[:, :n_blocks * m].reshape(n_seq, n_blocks, m).mean(axis=2)
+    chi2 = 4.0 * m * ((pi - 0.5) ** 2).sum(axis=1)
+    return gammaincc(n_blocks / 2.0, chi2 / 2.0)[:, None]
+
+def runs(bits):
+    n = bits.shape[1]
+    pi = bits.mean(axis=1)
+    v_obs = 1 + (bits[:, 1:] != bits[:, :-1]).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = erfc(np.abs(v_obs - 2 * n * pi * (1 - pi)) / (2 * np.sqrt(2 * n) * pi * (1 - pi)))
+    # frequency prerequisite: the runs test is not run, p = 0
+    return np.where(np.abs(pi - 0.5) >= 2 / np.sqrt(n), 0.0, p)[:, None]
+
+_LONGEST_RUN_TABLES = (
+    # (min n, M, class upper bounds, class probabilities)
+    (750000, 10000, (10, 11, 12, 13, 14, 15, 16),
+     (0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727)),
+    (6272, 128, (4, 5, 6, 7, 8, 9), (0.1174, 0.2430, 0.2493, 0.1752, 0.1027, 0.1124)),
+    (128, 8, (1, 2, 3, 4), (0.2148, 0.3672, 0.2305, 0.1875)),
+)
+
+def longest_run(bits):
+    n_seq, n = bits.shape
+    for min_n, m, bounds, probs in _LONGEST_RUN_TABLES:
+        if n >= min_n:
+            break
+    else:
+        return np.full((n_seq, 1), np.nan)
+    n_blocks = n // m
+    longest = _max_run(bits[:, :n_blocks * m].reshape(-1, m)).reshape(n_seq, n_blocks)
+    classes = np.clip(np.searchsorted(bounds, longest), 0, len(bounds) - 1)
+    v = np.stack([(classes == i).sum(axis=1) for i in range(len(bounds))], axis=1)
+    expected = n_blocks * np.array(probs)
+    chi2 = ((v - expected) ** 2 / expected).sum(axis=1)
+    return gammaincc((len(bounds) - 1) / 2.0, chi2 / 2.0)[:, None]
+
+def _cusum_p(z, n):
+    z = z.astype(float)
+    sqrt_n = np.sqrt(n)
+    k1 = np.arange(int(np.trunc((-n / z.min() + 1) / 4)), int(np.trunc((n / z.min() - 1) / 4)) + 1)
+    k2 = np.arange(int(np.trunc((-n / z.min() - 3) / 4)), int(np.trunc((n / z.min() - 1) / 4)) + 1)
+    zc = z[:, None]
+
+    in1 = (k1 >= np.trunc((-n / zc + 1) / 4)) & (k1 <= np.trunc((n / zc - 1) / 4))
+    term1 = ndtr((4 * k1 + 1) * zc / sqrt_n) - ndtr((4 * k1 - 1) * zc / sqrt_n)
+    in2 = (k2 >= np.trunc((-n / zc - 3) / 4)) & (k2 <= np.trunc((n / zc - 1) / 4))
+    term2 = ndtr((4 * k2 + 3) * zc / sqrt_n) - ndtr((4 * k2 + 1) * zc / sqrt_n)
+    return 1.0 - (term1 * in1).sum(axis=1) + (term2 * in2).sum(axis=1)
+
+def cumulative_sums(bits):
+    """Forward and backward cumulative sums p-values."""
+    n = bits.shape[1]
+    x = _signs(bits)
+    forward = np.abs(np.cumsum(x, axis=1)).max(axis=1)
+    backward = np.abs(np.cumsum(x[:, ::-1], axis=1)).max(axis=1)
+    return np.stack([_cusum_p(forward, n), _cusum_p(backward, n)], axis=1)
+
+def _auto_m(n, margin, largest):
+    return max(1, min(largest, int(np.floor(np.log2(n))) - margin))
+
+def approximate_entropy(bits, m=None):
+    n = bits.shape[1]
+    m = m or _auto_m(n, 6, APEN_MAX_M)
+
+    def phi(k):
+        counts = _pattern_counts(bits, k) / n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(counts > 0, counts * np.log(counts), 0.0).sum(axis=1)
+
+    ap_en = phi(m) - phi(m + 1)
+    chi2 = 2.0 * n * (np.log(2) - ap_en)
+    return gammaincc(2 ** (m - 1), chi2 / 2.0)[:, None]
+
+def serial(bits, m=None):
+    n = bits.shape[1]
+    m = max(2, m or _auto_m(n, 3, SERIAL_MAX_M))
+
+    def psi2(k):
+        if k <= 0:
+            return 0.0
+        counts = _pattern_counts(bits, k).astype(float)
+        return (2 ** k / n) * (counts ** 2).sum(axis=1) - n
+
+    psi_m, psi_m1, psi_m2 = psi2(m), psi2(m - 1), psi2(m - 2)
+    del1 = psi_m - psi_m1
+    del2 = psi_m - 2 * psi_m1 + psi_m2
+    return np.stack([gammaincc(2 ** (m - 2), del1 / 2.0), gammaincc(2 ** (m - 3), del2 / 2.0)], axis=1)
+
+def spectral(bits):
+    n = bits.shape[1]
+    modulus = np.abs(np.fft.rfft(_signs(bits), axis=1))[:, :n // 2]
+    threshold = np.sqrt(np.log(1 / 0.05) * n)
+    n0 = 0.95 * n / 2
+    n1 = (modulus < threshold).sum(axis=1)
+    d = (n1 - n0) / np.sqrt(n * 0.95 * 0.05 / 4)
+    return erfc(np.abs(d) / np.sqrt(2))[:, None]
+
+def binary_matrix_rank(bits, size=32):
+    n_seq, n = bits.shape
+    n_mat = n // (size * size)
+    if n_mat == 0:
+        return np.full((n_seq, 1), np.nan)
+    matrices = bits[:, :n_mat * size * size].reshape(n_seq * n_mat, size, size)
+    rank = _gf2_rank(matrices).reshape(n_seq, n_mat)
+    full = (rank == size).sum(axis=1)
+    minus_one = (rank == size - 1).sum(axis=1)
+    rest = n_mat - full - minus_one
+    chi2 = ((full - 0.2888 * n_mat) ** 2 / (0.2888 * n_mat)
+            + (minus_one - 0.5776 * n_mat) ** 2 / (0.5776 * n_mat)
+            + (rest - 0.1336 * n_mat) ** 2 / (0.1336 * n_mat))
+    return np.exp(-chi2 / 2.0)[:, None]
+
+def _excursion_walk(bits):
+    n_seq = bits.shape[0]
+    walk = np.zeros((n_seq, bits.shape[1] + 2), dtype=np.int32)
+    walk[:, 1:-1] = np.cumsum(_signs(bits), axis=1)
+    return walk
+
+def random_excursions(bits):
+    """p-values for states -4..-1, 1..4."""
+    return RandomExcursions.batch(bits)[0]
+
+def random_excursions_variant(bits):
+    """p-values for states -9..-1, 1..9."""
+    walk = _excursion_walk(bits)
+    cycles = (walk == 0).sum(axis=1) - 1
+    states = [x for x in range(-9, 10) if x != 0]
+    p = np.empty((bits.shape[0], len(states)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i, x in enumerate(states):
+            visits = (walk == x).sum(axis=1)
+            p[:, i] = erfc(np.abs(visits - cycles) / np.sqrt(2.0 * cycles * (4 * abs(x) - 2)))
+    p[cycles < 1] = np.nan
+    return p
+
+# name -> (test, minimum recommended sequence length in bits)
+TESTS = {
+    "Frequency": (frequency, 100),
+    "Block Frequency": (block_frequency, 100),
+    "Runs": (runs, 100),
+    "Longest Run": (longest_run, 128),
+    "Binary Matrix Rank": (binary_matrix_rank, 38912),
+    "Spectral DFT": (spectral, 1000),
+    "Approximate Entropy": (approximate_entropy, 100),
+    "Serial": (serial, 100),
+    "Cumulative Sums": (cumulative_sums, 100),
+    "Random Excursions": (random_excursions, 1000000),
+    "Random Excursions Variant": (random_excursions_variant, 1000000),
+}
+
+# excursion tests also need enough zero-crossing cycles (SP 800-22 section 2.14.7)
+MIN_EXCURSION_CYCLES = 500
+
+# === SUITE ===
+def _run_chunk(bits, names, enforce_min_length):
+    results = {}
+    n = bits.shape[1]
+    for name in names:
+        test, min_bits = TESTS[name]
+        if enforce_min_length and n < min_bits:
+            results[name] = None
+            continue
+        p = np.asarray(test(bits), dtype=float)
+        if enforce_min_length and name.startswith("Random Excursions"):
+            cycles = (_excursion_walk(bits) == 0).sum(axis=1) - 1
+            p[cycles < max(MIN_EXCURSION_CYCLES, 0.005 * np.sqrt(n))] = np.nan
+        results[name] = p
+    return results
+
+def run_suite(sequences, labels=None, tests=None, alpha=ALPHA, workers=None,
+              enforce_min_length=True, chunk_size=CHUNK_SEQUENCES):
+    """
+    Run the selected tests over many bit sequences. `sequences` is a
+    (S, n) 0/1 array or a list of 0/1 arrays / '01' strings of any lengths
+    (grouped by length internally). Chunks of sequences are spread over a
+    process pool; `workers=1` runs in-process.
+
+    Tests whose recommended minimum length exceeds a sequence's length are
+    reported as not applicable unless enforce_min_length is False.
+
+    Returns a dict with "labels", "tests", "p_values" ({test: list of
+    per-sequence p-value arrays, None when not applicable}), "min_p"
+    (S, T) with NaN for not applicable, "passed" (S, T) bool and
+    "applicable" (S, T) bool.
+    """
+    if isinstance(sequences, np.ndarray) and sequences.ndim == 2:
+        rows = list(sequences)
+    else:
+        rows = [to_bits(s)[0] for s in sequences]
+    names = list(tests or TESTS)
+    labels = list(labels) if labels is not None else [str(i + 1) for i in range(len(rows))]
+
+    tasks = []
+    by_length = {}
+    for i, row in enumerate(rows):
+        by_length.setdefault(len(row), []).append(i)
+    for n, index in by_length.items():
+        for start in range(0, len(index), chunk_size):
+            part = index[start:start + chunk_size]
+            tasks.append((part, np.array([rows[i] for i in part], dtype=np.uint8)))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        outputs = [_run_chunk(bits, names, enforce_min_length) for _, bits in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            outputs = list(pool.map(
+                _run_chunk, [bits for _, bits in tasks],
+                [names] * len(tasks), [enforce_min_length] * len(tasks),
+            ))
+
+    p_values = {name: [None] * len(rows) for name in names}
+    min_p = np.full((len(rows), len(names)), np.nan)
+    for (part, _), output in zip(tasks, outputs):
+        for t, name in enumerate(names):
+            p = output[name]
+            if p is None:
+                continue
+            for j, i in enumerate(part):
+                p_values[name][i] = p[j]
+            with np.errstate(invalid="ignore"):
+                min_p[part, t] = np.where(np.isnan(p).any(axis=1), np.nan, p.min(axis=1))
+
+    applicable = ~np.isnan(min_p)
+    with np.errstate(invalid="ignore"):
+        passed = applicable & (min_p >= alpha)
+    return {
+        "labels": labels,
+        "tests": names,
+        "p_values": p_values,
+        "min_p": min_p,
+        "passed": passed,
+        "applicable": applicable,
+        "alpha": alpha,
+    }
+
+# === SOURCES ===
+def _response_bits(packed, n_bits):
+    return unpack_bits(packed)[..., -n_bits:]
+
+def store_sequences(store, designs=None, concatenate=False):
+    """
+    Bit sequences from a ResponseStore: every valid majority response
+    (labelled "design / device / challenge") or, with concatenate, one
+    stream per design made of all its responses in device, challenge order.
+    """
+    labels, sequences = [], []
+    for design in designs or store.designs:
+        d = store.design_index(design)
+        name = store.designs[d]
+        valid = np.asarray(store.valid[d])
+        bits = _response_bits(np.asarray(store.majority[d])[valid], store.n_bits)
+        if concatenate:
+            labels.append(name)
+            sequences.append(bits.ravel())
+            continue
+        for (m, c), row in zip(np.argwhere(valid), bits):
+            labels.append(f"{name} / {store.devices[d][m]} / {store.start_row + c}")
+            sequences.append(row)
+    return labels, sequences
+
+def result_file_sequences(paths, labels=None, start_row=2, end_row=257, concatenate=False):
+    """Same as store_sequences, read from RESULTS workbooks (Majority HEX sheet)."""
+    labels = labels or [os.path.splitext(os.path.basename(p))[0] for p in paths]
+    out_labels, sequences = [], []
+    for path, label in zip(paths, labels):
+        design = load_design(path, start_row, end_row)
+        if design is None or not design.valid.any():
+            continue
+        bits = _response_bits(design.packed[design.valid], design.n_bits)
+        if concatenate:
+            out_labels.append(label)
+            sequences.append(bits.ravel())
+            continue
+        for (r, c), row in zip(np.argwhere(design.valid), bits):
+            device = design.header[c] if c < len(design.header) and design.header[c] else f"Column {c + 1}"
+            out_labels.append(f"{label} / {device} / {start_row + r}")
+            sequences.append(row)
+    return out_labels, sequences
+
+# === REPORT ===
+def summary_rows(result):
+    """(test, applicable sequences, passed, pass rate %) per test."""
+    rows = []
+    for t, name in enumerate(result["tests"]):
+        applicable = int(result["applicable"][:, t].sum())
+        passed = int(result["passed"][:, t].sum())
+        rows.append((name, applicable, passed, round(passed / applicable * 100, 2) if applicable else None))
+    return rows
+
+def write_suite_report(result, path):
+    """Pass/fail matrix, minimum p-values and per-test pass rates in one workbook."""
+    wb = Workbook(write_only=True)
+    matrix_ws = wb.create_sheet("Pass Fail")
+    p_ws = wb.create_sheet("P-Values")
+    summary_ws = wb.create_sheet("Summary")
+    header = ["Sequence"] + result["tests"]
+    matrix_ws.append(header)
+    p_ws.append(header)
+    for i, label in enumerate(result["labels"]):
+        matrix_ws.append([label] + [
+            ("PASSED" if result["passed"][i, t] else "FAILED") if result["applicable"][i, t] else "N/A"
+            for t in range(len(result["tests"]))
+        ])
+        p_ws.append([label] + [
+            round(float(p), 6) if not np.isnan(p) else None for p in result["min_p"][i]
+        ])
+    summary_ws.append(["Test", "Applicable", "Passed", "Pass Rate (%)"])
+    for row in summary_rows(result):
+        summary_ws.append(list(row))
+    wb.save(path)
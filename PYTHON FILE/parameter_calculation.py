@@ -0,0 +1,181 @@
+import os
+import glob
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from openpyxl import Workbook
+from response_store import open_store
+from response_cache import load_design
+from metrics_cube import MetricsCube
+from puf_metrics import hd_histogram, HISTOGRAM_BLOCK
+
+# === CONFIGURATION ===
+SHEET1_NAME = "Majority HEX"
+SHEET2_NAME = "Reliability"
+
+# === CALCULATION ===
+def calculate_parameters(xlsx_path=None, start_row=2, end_row=257, store=None, store_designs=None,
+                         method="pairwise", histogram=False, block=HISTOGRAM_BLOCK, cube_path=None):
+    """
+    Uniqueness, uniformity and reliability of one combined RESULTS
+    workbook, or of `store_designs` of a response store (path or
+    ResponseStore) combined in column order. Returns a dict with "label",
+    "source", "summary" (MetricsCube.summary), "details" (challenge,
+    uniqueness, uniformity, reliability rows), "n_bits" and "histogram"
+    (pairwise HD counts 0..n_bits when `histogram` is set, else None).
+    """
+    if store is not None:
+        store = open_store(store) if isinstance(store, (str, os.PathLike)) else store
+        store_designs = store_designs or store.designs
+        design_idx = [store.design_index(d) for d in store_designs]
+        first = max(start_row - store.start_row, 0)
+        last = min(end_row - store.start_row + 1, store.n_challenges)
+
+        # (challenges, devices, ...) across the selected designs, in column order
+        packed = np.concatenate([store.majority[d, :, first:last] for d in design_idx]).transpose(1, 0, 2)
+        mask = np.concatenate([store.valid[d, :, first:last] for d in design_idx]).T
+        reliability = np.concatenate([store.reliability[d, :, first:last] for d in design_idx]).T
+        devices = [name for d in design_idx for name in store.devices[d]]
+        label = " + ".join(store_designs)
+        source = store.path
+        n_bits = store.n_bits
+        cube = MetricsCube.from_packed([label], [devices], [packed], [mask], [reliability],
+                                       [n_bits], store.start_row + first, method=method)
+    else:
+        if not os.path.exists(xlsx_path):
+            raise FileNotFoundError(f"{xlsx_path} not found")
+
+        # decoded arrays come from the response cache (see response_cache.py)
+        design = load_design(xlsx_path, start_row, end_row)
+        if design is None:
+            raise ValueError(f"{xlsx_path} is missing the {SHEET1_NAME} / {SHEET2_NAME} sheets")
+        label = os.path.splitext(os.path.basename(xlsx_path))[0]
+        source = xlsx_path
+        packed, mask, n_bits = design.packed, design.valid, design.n_bits
+        cube = MetricsCube.from_designs([design], [label], method=method)
+
+    if cube_path:
+        cube.save(cube_path)
+
+    counts = None
+    if histogram:
+        counts = hd_histogram(packed, mask, block).sum(axis=0)[:n_bits + 1].tolist()
+    return {
+        "label": label, "source": source, "n_bits": n_bits,
+        "summary": cube.summary(label), "details": cube.details(label), "histogram": counts,
+    }
+
+# === REPORTS ===
+def _summary_rows(summary):
+    return [
+        ["Weighted mean uniqueness (%)", round(summary["uniqueness"], 2)],
+        ["Weighted mean uniformity (%)", round(summary["uniformity"], 2)],
+        ["Average reliability (%)", round(summary["reliability"], 2)],
+        ["Challenge with highest uniqueness",
+         f"{summary['max_challenge']} ({round(summary['max_uniqueness'], 2)}%)"],
+    ]
+
+def write_report(result, output_path):
+    """Summary / Details (/ HD Histogram) workbook of one calculate_parameters result."""
+    out_wb = Workbook()
+
+    sum_ws = out_wb.active
+    sum_ws.title = "Summary"
+    sum_ws.append(["Metric", "Value"])
+    for row in _summary_rows(result["summary"]):
+        sum_ws.append(row)
+
+    det_ws = out_wb.create_sheet("Details")
+    det_ws.append(["Challenge", "Uniqueness (%)", "Uniformity (%)", "Reliability (%)"])
+    for challenge, u, v, r in result["details"]:
+        det_ws.append([challenge, round(u, 2), round(v, 2), round(r, 2)])
+
+    if result["histogram"] is not None:
+        n_bits = result["n_bits"]
+        hist_ws = out_wb.create_sheet("HD Histogram")
+        hist_ws.append(["HD (bits)", "HD (%)", "Chip pairs"])
+        for hd, count in enumerate(result["histogram"]):
+            hist_ws.append([hd, round(hd / n_bits * 100, 2), count])
+
+    out_wb.save(output_path)
+
+def write_consolidated_report(results, output_path):
+    """
+    One workbook for many results: a Summary row per input (failed inputs
+    keep their error), every input's Details rows tagged with its label,
+    and HD Histogram columns per input when histograms were computed.
+    """
+    wb = Workbook(write_only=True)
+    sum_ws = wb.create_sheet("Summary")
+    sum_ws.append(["Input", "Weighted mean uniqueness (%)", "Weighted mean uniformity (%)",
+                   "Average reliability (%)", "Challenge with highest uniqueness",
+                   "Highest uniqueness (%)", "Challenges", "Source", "Error"])
+    for result in results:
+        if "error" in result:
+            sum_ws.append([result["label"], None, None, None, None, None, None, result["source"], result["error"]])
+            continue
+        s = result["summary"]
+        sum_ws.append([result["label"], round(s["uniqueness"], 2), round(s["uniformity"], 2),
+                       round(s["reliability"], 2), s["max_challenge"], round(s["max_uniqueness"], 2),
+                       len(result["details"]), result["source"], None])
+
+    det_ws = wb.create_sheet("Details")
+    det_ws.append(["Input", "Challenge", "Uniqueness (%)", "Uniformity (%)", "Reliability (%)"])
+    for result in results:
+        for challenge, u, v, r in result.get("details", []):
+            det_ws.append([result["label"], challenge, round(u, 2), round(v, 2), round(r, 2)])
+
+    with_hist = [r for r in results if r.get("histogram") is not None]
+    if with_hist:
+        hist_ws = wb.create_sheet("HD Histogram")
+        hist_ws.append(["HD (bits)"] + [r["label"] for r in with_hist])
+        for hd in range(max(len(r["histogram"]) for r in with_hist)):
+            hist_ws.append([hd] + [r["histogram"][hd] if hd < len(r["histogram"]) else None for r in with_hist])
+    wb.save(output_path)
+
+# === PARALLEL RUNNER ===
+def expand_inputs(inputs):
+    """Workbook paths from paths and glob patterns, in order, without duplicates or Excel lock files."""
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [inputs]
+    paths = []
+    for spec in inputs:
+        spec = os.fspath(spec)
+        matches = sorted(glob.glob(spec)) if glob.has_magic(spec) else [spec]
+        for path in matches:
+            if not os.path.basename(path).startswith("~$") and path not in paths:
+                paths.append(path)
+    return paths
+
+def _calculate_one(path, kwargs):
+    try:
+        return calculate_parameters(path, **kwargs)
+    except Exception as e:  # one bad workbook must not stop the whole run
+        return {"label": os.path.splitext(os.path.basename(path))[0], "source": path,
+                "error": f"{type(e).__name__}: {e}"}
+
+def run_parameter_calculations(inputs, workers=None, on_result=None, **kwargs):
+    """
+    calculate_parameters for every workbook of `inputs` (paths and glob
+    patterns) across a process pool; `workers=1` runs in-process.
+    on_result(done, total, result) is called as each input finishes.
+    Failed inputs come back as {"label", "source", "error"}. Returns the
+    results in input order.
+    """
+    paths = expand_inputs(inputs)
+    workers = min(workers or os.cpu_count() or 1, max(len(paths), 1))
+    results = [None] * len(paths)
+
+    def collect(i, result, done):
+        results[i] = result
+        if on_result:
+            on_result(done, len(paths), result)
+
+    if workers == 1:
+        for done, (i, path) in enumerate(enumerate(paths), start=1):
+            collect(i, _calculate_one(path, kwargs), done)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_calculate_one, path, kwargs): i for i, path in enumerate(paths)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                collect(futures[future], future.result(), done)
+    return results
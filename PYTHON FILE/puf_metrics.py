@@ -0,0 +1,242 @@
+import numpy as np
+
+# === CONFIGURATION ===
+# "pairwise" compares every chip pair (O(k^2) per challenge), "popcount"
+# sums c * (k - c) over per-bit ones counts (O(k)); both give the same HD total
+UNIQUENESS_METHODS = ("pairwise", "popcount")
+BIT_COUNT_CHUNK = 1 << 24  # bits unpacked at a time by bit_counts
+HISTOGRAM_BLOCK = 256      # chips per block in hd_histogram
+
+# === POPCOUNT ===
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def popcount(arr, axis=-1):
+    """Count set bits of an unsigned integer array, summed along `axis`."""
+    arr = np.ascontiguousarray(arr)
+    if hasattr(np, "bitwise_count"):
+        counts = np.bitwise_count(arr)
+    else:
+        counts = _POPCOUNT_TABLE[arr.view(np.uint8)].reshape(arr.shape + (arr.itemsize,)).sum(axis=-1)
+    return counts.sum(axis=axis, dtype=np.int64)
+
+# === PACKING ===
+def pack_hex(responses, n_hex=None):
+    """
+    Pack hex response strings into a (k, n_bytes) uint8 array, MSB first.
+    Returns the packed array and the response width in bits (4 * len of the
+    first response). Pass `n_hex` to force a fixed width.
+    """
+    responses = [str(r).strip() for r in responses]
+    if not responses:
+        return np.zeros((0, ((n_hex or 0) + 1) // 2), dtype=np.uint8), 0
+    n_bits = len(responses[0]) * 4
+    width = n_hex or max(len(r) for r in responses)
+    width += width % 2
+    buf = bytes.fromhex(''.join(r.zfill(width) for r in responses))
+    packed = np.frombuffer(buf, dtype=np.uint8).reshape(len(responses), width // 2)
+    return packed, n_bits
+
+def as_words(packed):
+    """View a (..., n_bytes) uint8 array as uint64 words, zero-padding the tail."""
+    n_bytes = packed.shape[-1]
+    pad = -n_bytes % 8
+    if pad:
+        packed = np.concatenate(
+            [packed, np.zeros(packed.shape[:-1] + (pad,), dtype=np.uint8)], axis=-1
+        )
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+def unpack_bits(packed):
+    """Expand packed responses to a (..., n_bits) uint8 array of 0/1."""
+    return np.unpackbits(packed, axis=-1)
+
+# === HAMMING DISTANCES ===
+def pairwise_hd(packed):
+    """All pairwise Hamming distances of a (k, n_bytes) array -> (k, k) int64."""
+    words = as_words(packed)
+    return popcount(words[:, None, :] ^ words[None, :, :])
+
+def pairwise_hd_batch(packed):
+    """Pairwise Hamming distances per challenge for a (rows, k, n_bytes) array."""
+    words = as_words(packed)
+    return popcount(words[:, :, None, :] ^ words[:, None, :, :])
+
+def hd_histogram(packed, mask=None, block=HISTOGRAM_BLOCK):
+    """
+    Distribution of the pairwise Hamming distances per challenge row of a
+    (rows, k, n_bytes) array: (rows, 8 * n_bytes + 1) int64 pair counts for
+    HD = 0 .. 8 * n_bytes. Chips are compared `block` x `block` at a time,
+    so memory stays bounded however many chips a row holds. Responses
+    outside the (rows, k) mask are left out.
+    """
+    rows, k, n_bytes = packed.shape
+    n_bins = 8 * n_bytes + 1
+    hist = np.zeros((rows, n_bins), dtype=np.int64)
+    words = as_words(packed)
+    for r in range(rows):
+        w = words[r] if mask is None else words[r, np.flatnonzero(mask[r])]
+        for i in range(0, len(w), block):
+            a = w[i:i + block]
+            for j in range(i, len(w), block):
+                hd = popcount(a[:, None, :] ^ w[None, j:j + block, :])
+                if i == j:
+                    hd = hd[np.triu_indices(len(a), 1)]
+                hist[r] += np.bincount(hd.ravel(), minlength=n_bins)
+    return hist
+
+# === BIT COUNTS ===
+def bit_counts(packed, mask=None, chunk=BIT_COUNT_CHUNK):
+    """
+    Chips with bit i set per challenge row of a (rows, k, n_bytes) array:
+    (rows, 8 * n_bytes) int64, MSB first as unpack_bits. Rows are unpacked
+    about `chunk` bits at a time; responses outside the mask count as 0.
+    """
+    rows, k, n_bytes = packed.shape
+    if mask is not None:
+        packed = np.where(mask[:, :, None], packed, 0).astype(np.uint8)
+    counts = np.zeros((rows, 8 * n_bytes), dtype=np.int64)
+    step = max(1, chunk // max(8 * k * n_bytes, 1))
+    for start in range(0, rows, step):
+        counts[start:start + step] = unpack_bits(packed[start:start + step]).sum(axis=1, dtype=np.int64)
+    return counts
+
+def uniqueness_from_bit_counts(counts, k, n_bits):
+    """
+    Uniqueness (%) from per-bit ones counts (..., bits) of k chips (...).
+    c chips with a bit set and k - c without differ in c * (k - c) pairs at
+    that bit, so the summed pairwise HD is sum(c * (k - c)) over the bits.
+    0 where fewer than two chips.
+    """
+    k = np.asarray(k)
+    total = (counts * (k[..., None] - counts)).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = (2 * (total / n_bits) / (k * (k - 1))) * 100
+    return np.where(k >= 2, u, 0.0)
+
+def check_uniqueness_method(method):
+    if method not in UNIQUENESS_METHODS:
+        raise ValueError(f"Unknown uniqueness method '{method}', expected one of {UNIQUENESS_METHODS}")
+
+# === METRICS ===
+def _uniqueness_from_hd(hd, n_bits):
+    k = hd.shape[0]
+    if k < 2:
+        return 0.0
+    iu = np.triu_indices(k, 1)
+    # Sum in the same (i, j) order as the reference loop so floats match exactly
+    total = sum((hd[iu] / n_bits).tolist())
+    return (2 * total / (k * (k - 1))) * 100
+
+def _uniformity_from_ones(ones, k, n_bits):
+    bits = k * n_bits
+    return (ones / bits) * 100 if bits else 0.0
+
+def calculate_uniqueness(responses):
+    responses = [r for r in responses if r]
+    if len(responses) < 2:
+        return 0.0
+    packed, n_bits = pack_hex(responses)
+    return _uniqueness_from_hd(pairwise_hd(packed), n_bits)
+
+def calculate_uniformity(responses):
+    responses = [r for r in responses if r]
+    if not responses:
+        return 0.0
+    packed, n_bits = pack_hex(responses)
+    return _uniformity_from_ones(int(popcount(packed, axis=None)), len(responses), n_bits)
+
+def challenge_metrics(groups, method="pairwise"):
+    """
+    Uniqueness and uniformity (%) for every challenge row at once.
+    `groups` is a list of per-row hex response lists (one entry per chip).
+    Rows with the same chip count are stacked and processed in one batch.
+    """
+    check_uniqueness_method(method)
+    groups = [[r for r in grp if r] for grp in groups]
+    uniquenesses = [0.0] * len(groups)
+    uniformities = [0.0] * len(groups)
+
+    by_size = {}
+    for idx, grp in enumerate(groups):
+        if grp:
+            by_size.setdefault(len(grp), []).append(idx)
+
+    for k, indices in by_size.items():
+        packed, _ = pack_hex([r for idx in indices for r in groups[idx]])
+        packed = packed.reshape(len(indices), k, -1)
+        ones = popcount(packed.reshape(len(indices), -1))
+        hd = pairwise_hd_batch(packed) if k >= 2 and method == "pairwise" else None
+        counts = bit_counts(packed) if k >= 2 and method == "popcount" else None
+        for pos, idx in enumerate(indices):
+            n_bits = len(str(groups[idx][0]).strip()) * 4
+            if hd is not None:
+                uniquenesses[idx] = _uniqueness_from_hd(hd[pos], n_bits)
+            elif counts is not None:
+                uniquenesses[idx] = float(uniqueness_from_bit_counts(counts[pos], k, n_bits))
+            uniformities[idx] = _uniformity_from_ones(int(ones[pos]), k, n_bits)
+
+    return uniquenesses, uniformities
+
+def packed_challenge_metrics(packed, mask, n_bits, method="pairwise"):
+    """
+    Uniqueness and uniformity (%) per challenge row of a (rows, k, n_bytes)
+    packed array, counting only responses where the (rows, k) mask is set.
+    """
+    check_uniqueness_method(method)
+    ones = popcount(packed)
+    if method == "popcount":
+        k = mask.sum(axis=1)
+        uniquenesses = uniqueness_from_bit_counts(bit_counts(packed, mask), k, n_bits).tolist()
+        uniformities = [_uniformity_from_ones(int(ones[r, mask[r]].sum()), int(k[r]), n_bits)
+                        for r in range(packed.shape[0])]
+        return uniquenesses, uniformities
+    hd = pairwise_hd_batch(packed)
+    uniquenesses, uniformities = [], []
+    for r in range(packed.shape[0]):
+        present = np.flatnonzero(mask[r])
+        uniquenesses.append(_uniqueness_from_hd(hd[r][np.ix_(present, present)], n_bits))
+        uniformities.append(_uniformity_from_ones(int(ones[r, present].sum()), len(present), n_bits))
+    return uniquenesses, uniformities
+
+# === MAJORITY VOTING ===
+def majority_vote(packed):
+    """
+    Bitwise majority over axis -2 of a (..., n, n_bytes) batch of packed
+    responses. Ties keep the first response's bit, as Counter.most_common
+    does. Returns the packed majority (..., n_bytes) and the summed
+    Hamming distance of the batch to it (...).
+    """
+    majority_bits, flips = _majority_bits(packed)
+    return np.packbits(majority_bits, axis=-1), flips.sum(axis=-1)
+
+def _majority_bits(packed):
+    n = packed.shape[-2]
+    bits = np.unpackbits(packed, axis=-1)
+    ones = bits.sum(axis=-2, dtype=np.int64)
+    majority_bits = np.where(2 * ones == n, bits[..., 0, :], 2 * ones > n).astype(np.uint8)
+    return majority_bits, np.where(majority_bits == 1, n - ones, ones)
+
+def intra_reliability(total_hd, batch_size, n_bits):
+    """Reliability (%) = 100 - mean intra-chip HD (%) against the majority."""
+    avg_hd = total_hd / batch_size
+    hd_intra_percent = (avg_hd / n_bits) * 100
+    return 100 - hd_intra_percent
+
+def batch_majority(packed, n_bits, bit_flips=False):
+    """
+    Majority hex strings and reliabilities for one (n, n_bytes) batch or a
+    stack of batches (..., n, n_bytes), flattened in batch order. With
+    bit_flips, also the (batches, 8 * n_bytes) count of responses that
+    differ from the majority at each bit, from the same pass.
+    """
+    majority_bits, flips = _majority_bits(packed)
+    majority = np.packbits(majority_bits, axis=-1)
+    total_hd = flips.sum(axis=-1)
+    n = packed.shape[-2]
+    majority = majority.reshape(-1, majority.shape[-1])
+    hex_len = n_bits // 4
+    majority_hex = [row.tobytes().hex().upper()[-hex_len:] for row in majority]
+    reliabilities = [intra_reliability(int(hd), n, n_bits) for hd in total_hd.reshape(-1)]
+    if bit_flips:
+        return majority_hex, reliabilities, flips.reshape(-1, flips.shape[-1])
+    return majority_hex, reliabilities
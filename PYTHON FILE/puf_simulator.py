@@ -0,0 +1,212 @@
+import time
+import zlib
+import binascii
+from urllib.parse import urlsplit, parse_qsl
+import numpy as np
+from scipy.special import ndtr
+from serial_framing import encode_frame
+
+# === CONFIGURATION ===
+SIM_SCHEME = "sim://"
+N_BITS = 256               # response bits (SHIFT_REGISTER width)
+RO_PER_MUX = 16            # ring oscillators behind each 16:1 MUX
+LFSR_BITS = 8              # LFSR width driving both MUX selects
+PROCESS_SIGMA = 0.01       # chip-to-chip RO frequency spread (relative)
+NOISE_SIGMA = 0.0005       # per-measurement RO frequency jitter (relative)
+BATCH_SIZE = 128           # responses per challenge
+N_CHALLENGES = 256
+BAUD_RATE = 230400         # default line rate is what the UART can carry
+READ_AHEAD = 4096          # bytes generated ahead when the rate is unlimited
+
+# === LFSR / CHALLENGES ===
+def lfsr_states(seed, n=N_BITS):
+    """
+    n successive states of LFSR.v with NUM_BITS=8 starting at `seed`:
+    shift left, feed back XNOR of taps 8, 6, 5, 4 (1-indexed). Note that
+    0xFF is the XNOR lock-up state.
+    """
+    states = np.empty(n, dtype=np.int64)
+    r = seed & 0xFF
+    for i in range(n):
+        states[i] = r
+        feedback = 1 ^ (((r >> 7) ^ (r >> 5) ^ (r >> 4) ^ (r >> 3)) & 1)
+        r = ((r << 1) & 0xFF) | feedback
+    return states
+
+def challenge_seed(challenge):
+    """Master challenge (LFSR seed) of sheet challenge row `challenge` (0-based)."""
+    return challenge % (1 << LFSR_BITS)
+
+# === CHIP MODEL ===
+class SimulatedChip:
+    """
+    RO-PUF model of one board: two banks of RO_PER_MUX ring oscillators
+    with fixed, chip-specific frequencies (the fingerprint). Response bit i
+    compares RO[low nibble] of bank 1 with RO[high nibble] of bank 2 for
+    LFSR state i (COMPARATOR gives 1 when count1 <= count2) and lands at bit
+    position i of the 256-bit word (SHIFT_REGISTER shifts in at the MSB, so
+    the first bit ends at the LSB). Every measurement adds Gaussian jitter
+    of `noise` (relative) to both frequencies; noise=0 is noiseless.
+    """
+
+    def __init__(self, name, seed=0, noise=NOISE_SIGMA, process_sigma=PROCESS_SIGMA):
+        self.name = name
+        self.noise = noise
+        rng = np.random.default_rng([zlib.crc32(str(name).encode()), seed])
+        self.freq = 1.0 + process_sigma * rng.standard_normal((2, RO_PER_MUX))
+        self.rng = np.random.default_rng([zlib.crc32(str(name).encode()), seed, 1])
+        self._pairs = {}
+
+    def pairs(self, challenge):
+        """RO indices (bank 1, bank 2) compared for each response bit."""
+        seed = challenge_seed(challenge)
+        if seed not in self._pairs:
+            states = lfsr_states(seed)
+            self._pairs[seed] = (states & 0xF, states >> 4)
+        return self._pairs[seed]
+
+    def ideal_bits(self, challenge):
+        """(N_BITS,) noiseless response bits, bit i at position i (LSB first)."""
+        a, b = self.pairs(challenge)
+        return (self.freq[0, a] <= self.freq[1, b]).astype(np.uint8)
+
+    def flip_probability(self, challenge):
+        """(N_BITS,) probability that a measured bit differs from ideal_bits."""
+        a, b = self.pairs(challenge)
+        if self.noise == 0:
+            return np.zeros(N_BITS)
+        gap = np.abs(self.freq[0, a] - self.freq[1, b]) / (np.sqrt(2) * self.noise)
+        return ndtr(-gap)
+
+    def measure(self, challenge, n):
+        """(n, N_BITS // 8) uint8 packed noisy responses, MSB first as sent in hex."""
+        a, b = self.pairs(challenge)
+        f1 = self.freq[0, a] + self.noise * self.rng.standard_normal((n, N_BITS))
+        f2 = self.freq[1, b] + self.noise * self.rng.standard_normal((n, N_BITS))
+        bits = (f1 <= f2).astype(np.uint8)
+        return np.packbits(bits[:, ::-1], axis=1)
+
+    def ideal_response(self, challenge):
+        return np.packbits(self.ideal_bits(challenge)[::-1]).tobytes().hex().upper()
+
+# === SERIAL PORT ===
+class SimulatedSerial:
+    """
+    Stand-in for serial.Serial that streams a SimulatedChip's responses
+    the way a board does: `batch_size` responses per challenge for
+    `challenges` challenges, as hex lines (framing="line") or
+    serial_framing frames ("binary"), at `rate` responses/sec (default: what
+    baud_rate carries; 0 is unlimited). `garbage` is the probability of a
+    corrupted line/frame. Implements the readline / read / in_waiting /
+    close subset the acquisition readers use.
+    """
+
+    def __init__(self, name, seed=0, noise=NOISE_SIGMA, rate=None, batch_size=BATCH_SIZE,
+                 challenges=N_CHALLENGES, framing="line", garbage=0.0, baud_rate=BAUD_RATE,
+                 timeout=1, start_challenge=0):
+        self.chip = SimulatedChip(name, seed, noise)
+        self.framing = framing
+        self.record_bytes = 38 if framing == "binary" else 2 * N_BITS // 8 + 2
+        self.rate = baud_rate / 10 / self.record_bytes if rate is None else rate
+        self.batch_size = batch_size
+        self.challenges = challenges
+        self.garbage = garbage
+        self.timeout = timeout
+        self.is_open = True
+        self._next = start_challenge * batch_size
+        self._total = challenges * batch_size
+        self._buffer = bytearray()
+        self._start = time.time()
+        self._offset = self._next
+        self._rng = np.random.default_rng([zlib.crc32(str(name).encode()), seed, 2])
+
+    @classmethod
+    def from_url(cls, url, timeout=1, baud_rate=BAUD_RATE):
+        """sim://<name>?noise=0.0005&rate=0&seed=1&batch_size=128&challenges=256&framing=line&garbage=0"""
+        parts = urlsplit(url)
+        params = dict(parse_qsl(parts.query))
+        kwargs = {}
+        for key, cast in (("seed", int), ("noise", float), ("rate", float), ("batch_size", int),
+                          ("challenges", int), ("garbage", float), ("start_challenge", int)):
+            if key in params:
+                kwargs[key] = cast(params.pop(key))
+        if "framing" in params:
+            kwargs["framing"] = params.pop("framing")
+        if params:
+            raise ValueError(f"Unknown simulator parameter(s) in {url}: {', '.join(params)}")
+        return cls(parts.netloc or parts.path, timeout=timeout, baud_rate=baud_rate, **kwargs)
+
+    def _fill(self, want=None):
+        """
+        Generate the records that are due by now (rate-limited), or until
+        the buffer holds `want` bytes (unlimited rate), a challenge's
+        remaining responses at a time.
+        """
+        if self.rate:
+            due = min(self._total, self._offset + int((time.time() - self._start) * self.rate))
+        else:
+            due = self._total
+        while self._next < due and (self.rate or len(self._buffer) < want):
+            challenge, first = divmod(self._next, self.batch_size)
+            n = min(self.batch_size - first, due - self._next)
+            self._buffer += self._encode(challenge, self.chip.measure(challenge, n))
+            self._next += n
+
+    def _encode(self, challenge, packed):
+        if self.framing == "binary":
+            records = [encode_frame(challenge, row.tobytes()) for row in packed]
+        else:
+            hexed = binascii.hexlify(packed.tobytes()).upper()
+            width = packed.shape[1] * 2
+            records = [hexed[i:i + width] + b"\r\n" for i in range(0, len(hexed), width)]
+        if self.garbage:
+            for i in np.flatnonzero(self._rng.random(len(records)) < self.garbage):
+                records[i] = records[i][:len(records[i]) // 2] + b"\r\n"
+        return b"".join(records)
+
+    @property
+    def in_waiting(self):
+        self._fill(READ_AHEAD)
+        return len(self._buffer)
+
+    def _wait(self, deadline):
+        """Sleep a little; False once nothing more can arrive before the deadline (as a port timing out)."""
+        remaining = deadline - time.time()
+        if self._next >= self._total or remaining <= 0:
+            time.sleep(max(remaining, 0))
+            return False
+        time.sleep(min(0.01, remaining, 1 / self.rate if self.rate else 0.01))
+        return True
+
+    def read(self, size=1):
+        deadline = time.time() + (self.timeout or 0)
+        self._fill(size)
+        while len(self._buffer) < size and self._wait(deadline):
+            self._fill(size)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def readline(self):
+        deadline = time.time() + (self.timeout or 0)
+        self._fill(self.record_bytes)
+        end = self._buffer.find(b"\n")
+        while end < 0 and self._wait(deadline):
+            self._fill(self.record_bytes)
+            end = self._buffer.find(b"\n")
+        end = len(self._buffer) if end < 0 else end + 1
+        line = bytes(self._buffer[:end])
+        del self._buffer[:end]
+        return line
+
+    def close(self):
+        self.is_open = False
+
+def simulated_ports(devices, **params):
+    """{device: sim:// URL} for a set of device names, e.g. to feed AcquisitionEngine."""
+    query = "&".join(f"{k}={v}" for k, v in params.items())
+    return {device: f"{SIM_SCHEME}{device}" + (f"?{query}" if query else "") for device in devices}
+
+def expected_reliability(chip, challenge):
+    """Expected reliability (%) of a batch: 100 minus the mean bit flip probability."""
+    return 100.0 * (1 - chip.flip_probability(challenge).mean())
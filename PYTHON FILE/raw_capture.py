@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import zlib
+import struct
+import numpy as np
+from puf_metrics import pack_hex, batch_majority
+
+# === CONFIGURATION ===
+MAGIC = b"ROPUFRAW"
+VERSION = 2
+READ_VERSIONS = (1, 2)     # version 1 records carry no challenge index
+NO_CHALLENGE = -1
+CHUNK_RECORDS = 4096       # responses per compressed chunk and device
+COMPRESS_LEVEL = 6
+BATCH_SIZE = 128           # batch size of version 1 sessions that recorded none
+
+_FILE_HEADER = struct.Struct("<8sHI")     # magic, version, metadata length
+_CHUNK_HEADER = struct.Struct("<HIHI")    # device name length, records, response bytes, payload length
+
+# === WRITER ===
+class RawCaptureWriter:
+    """
+    Stores raw responses of a run as packed bytes plus a float64 receive
+    timestamp and the int32 index of the challenge they answer. Records
+    are buffered per device and written as zlib-compressed chunks of
+    CHUNK_RECORDS, so a crash loses at most the unflushed chunk of each
+    device.
+
+    An existing capture is appended to: each writer starts a new session
+    (a file header with its own metadata) after the last complete chunk,
+    so resumed and repeated runs keep every earlier response.
+    """
+
+    def __init__(self, path, n_hex=64, chunk_records=CHUNK_RECORDS, **metadata):
+        self.path = path
+        self.n_hex = n_hex
+        self.n_bytes = (n_hex + 1) // 2
+        self.chunk_records = chunk_records
+        self.records = 0
+        self._buffers = {}
+        sessions, end = _scan_sessions(path) if os.path.exists(path) else ([], 0)
+        if sessions and sessions[0]["n_hex"] != n_hex:
+            raise ValueError(f"{path} holds {sessions[0]['n_hex']}-digit responses, not {n_hex}")
+        self._file = open(path, "r+b" if sessions else "wb")
+        # drop a torn chunk left by a crashed session before appending
+        self._file.truncate(end)
+        self._file.seek(end)
+        meta = json.dumps(dict(metadata, n_hex=n_hex, session=len(sessions) + 1,
+                               created=time.strftime("%Y-%m-%d %H:%M:%S"))).encode()
+        self._file.write(_FILE_HEADER.pack(MAGIC, VERSION, len(meta)) + meta)
+        self._file.flush()
+
+    def append(self, device, line, timestamp=None, challenge=NO_CHALLENGE):
+        """Buffer one response: a hex line or n_bytes of packed response (a binary frame payload)."""
+        timestamps, challenges, lines = self._buffers.setdefault(device, ([], [], []))
+        timestamps.append(time.time() if timestamp is None else timestamp)
+        challenges.append(challenge)
+        lines.append(line)
+        self.records += 1
+        if len(lines) >= self.chunk_records:
+            self._flush_device(device)
+
+    def _flush_device(self, device):
+        timestamps, challenges, lines = self._buffers.get(device, ([], [], []))
+        if not lines:
+            return
+        if all(isinstance(line, bytes) for line in lines):
+            packed = np.frombuffer(b"".join(lines), dtype=np.uint8).reshape(len(lines), self.n_bytes)
+        else:
+            packed, _ = pack_hex([line.hex() if isinstance(line, bytes) else line for line in lines], self.n_hex)
+        payload = zlib.compress(
+            np.asarray(timestamps, dtype="<f8").tobytes() + np.asarray(challenges, dtype="<i4").tobytes()
+            + packed.tobytes(), COMPRESS_LEVEL
+        )
+        name = device.encode()
+        self._file.write(_CHUNK_HEADER.pack(len(name), len(lines), self.n_bytes, len(payload)) + name + payload)
+        self._file.flush()
+        timestamps.clear()
+        challenges.clear()
+        lines.clear()
+
+    def flush(self):
+        for device in list(self._buffers):
+            self._flush_device(device)
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+# === READER ===
+def read_capture_metadata(path):
+    """Metadata of the first session of a capture."""
+    sessions = read_sessions(path)
+    if not sessions:
+        raise ValueError("Not a raw capture file")
+    return sessions[0]
+
+def read_sessions(path):
+    """Metadata (plus its format "version") of every session of a capture, oldest first."""
+    return _scan_sessions(path)[0]
+
+def _scan_sessions(path):
+    """(session metadata list, offset after the last complete record)."""
+    sessions, end = [], 0
+    with open(path, "rb") as f:
+        for name, record, end in _scan(f, devices=()):
+            if record is None:
+                sessions.append(name)
+    return sessions, end
+
+def _read_header(f):
+    header = f.read(_FILE_HEADER.size)
+    if len(header) < _FILE_HEADER.size:
+        return None
+    magic, version, meta_len = _FILE_HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Not a raw capture file")
+    if version not in READ_VERSIONS:
+        raise ValueError(f"Unsupported raw capture version {version}")
+    meta = f.read(meta_len)
+    if len(meta) < meta_len:
+        return None
+    return dict(json.loads(meta), version=version)
+
+def _scan(f, devices=None):
+    """
+    Walk every session of a capture file. Yields (metadata, None, end) at
+    each session header and (device, (records, response bytes, payload),
+    end) per chunk, payload None for chunks of devices not in `devices`;
+    end is the file offset after the record. A torn last record ends the
+    walk. (A chunk header never starts with MAGIC: its first two bytes
+    would be a device name length of 20306.)
+    """
+    size = os.fstat(f.fileno()).st_size
+    first = True
+    while True:
+        start = f.tell()
+        if first or f.read(len(MAGIC)) == MAGIC:
+            f.seek(start)
+            meta = _read_header(f)
+            if meta is None:
+                if first:
+                    raise ValueError("Not a raw capture file")
+                return
+            first = False
+            yield meta, None, f.tell()
+            continue
+        f.seek(start)
+        header = f.read(_CHUNK_HEADER.size)
+        if len(header) < _CHUNK_HEADER.size:
+            return
+        name_len, n_records, n_bytes, payload_len = _CHUNK_HEADER.unpack(header)
+        name = f.read(name_len).decode(errors="replace")
+        if f.tell() + payload_len > size:
+            return
+        if devices is not None and name not in devices:
+            f.seek(payload_len, os.SEEK_CUR)
+            payload = None
+        else:
+            payload = f.read(payload_len)
+        yield name, (n_records, n_bytes, payload), f.tell()
+
+def _decode(record, version):
+    n_records, n_bytes, payload = record
+    data = np.frombuffer(zlib.decompress(payload), dtype=np.uint8)
+    timestamps = data[:n_records * 8].view("<f8")
+    offset = n_records * 8
+    if version >= 2:
+        challenges = data[offset:offset + n_records * 4].view("<i4")
+        offset += n_records * 4
+    else:
+        challenges = np.full(n_records, NO_CHALLENGE, dtype="<i4")
+    return timestamps, challenges, data[offset:].reshape(n_records, n_bytes)
+
+def iter_chunks(path, devices=None):
+    """
+    Yield (session, device, timestamps, challenge indices, packed
+    responses) per chunk, session being the 1-based session number,
+    optionally only for `devices`. Version 1 chunks have challenge index
+    NO_CHALLENGE. A torn last chunk is ignored.
+    """
+    session, version = 0, VERSION
+    with open(path, "rb") as f:
+        for name, record, _ in _scan(f, devices):
+            if record is None:
+                session, version = session + 1, name["version"]
+            elif record[2] is not None:
+                yield (session, name) + _decode(record, version)
+
+def read_capture(path, devices=None, session=None):
+    """
+    Records as {device: (timestamps, challenge indices, packed responses)}
+    in arrival order, of one session (1-based, see read_sessions) or, by
+    default, of every session one after the other.
+    """
+    parts = {}
+    for number, device, timestamps, challenges, packed in iter_chunks(path, devices):
+        if session is None or number == session:
+            parts.setdefault(device, []).append((timestamps, challenges, packed))
+    return {
+        device: tuple(np.concatenate(arrays) for arrays in zip(*chunks))
+        for device, chunks in parts.items()
+    }
+
+def list_devices(path):
+    devices = []
+    with open(path, "rb") as f:
+        for name, record, _ in _scan(f, devices=()):
+            if record is not None and name not in devices:
+                devices.append(name)
+    return devices
+
+def iter_records(path, speed=None, devices=None, session=None):
+    """
+    Yield (device, challenge index, packed response bytes, timestamp) in
+    recorded order across devices, session by session.
+    speed=None replays as fast as possible; speed=k sleeps to replay at k x real time.
+    """
+    records = []
+    for number in range(1, len(read_sessions(path)) + 1) if session is None else [session]:
+        part = []
+        for device, (timestamps, challenges, packed) in read_capture(path, devices, number).items():
+            part.extend(zip(timestamps.tolist(), [device] * len(packed), challenges.tolist(), packed))
+        part.sort(key=lambda r: r[0])
+        records += part
+
+    start_wall, start_rec = time.time(), records[0][0] if records else 0.0
+    for t, device, challenge, row in records:
+        if speed:
+            delay = (t - start_rec) / speed - (time.time() - start_wall)
+            if delay > 0:
+                time.sleep(delay)
+        yield device, challenge, row.tobytes(), t
+
+# === OFFLINE REPROCESSING ===
+def capture_batches(path, batch_size=None, max_rows=None, session=None):
+    """
+    The batches of every device as {device: [packed (n, n_bytes) batch,
+    ...]} in challenge order, from one session or from all of them.
+    Records are grouped by their challenge index and a challenge recorded
+    again in a later session (a restarted run) replaces the earlier batch;
+    batch_size keeps the first batch_size records of each. Version 1
+    records carry no index: each session is cut into batches of
+    batch_size (default: the recorded one) from its start and numbered on
+    from the previous session, as a resumed run. Rows end at max_rows or
+    at the first challenge that was never recorded.
+    """
+    sessions = read_sessions(path)
+    rows = {}
+    for number in range(1, len(sessions) + 1) if session is None else [session]:
+        meta = sessions[number - 1]
+        for device, (_, challenges, packed) in read_capture(path, session=number).items():
+            device_rows = rows.setdefault(device, {})
+            if meta["version"] < 2:
+                size = batch_size or meta.get("batch_size") or BATCH_SIZE
+                first = max(device_rows, default=-1) + 1
+                for i in range(len(packed) // size):
+                    device_rows[first + i] = packed[i * size:(i + 1) * size]
+                continue
+            starts = np.flatnonzero(np.r_[True, challenges[1:] != challenges[:-1]])
+            for start, end in zip(starts, np.r_[starts[1:], len(packed)]):
+                device_rows[int(challenges[start])] = packed[start:end][:batch_size]
+
+    batches = {}
+    for device, device_rows in rows.items():
+        batches[device] = []
+        while len(batches[device]) in device_rows and (max_rows is None or len(batches[device]) < max_rows):
+            batches[device].append(device_rows[len(batches[device])])
+    return batches
+
+def reprocess_capture(path, batch_size=None, max_rows=None, session=None):
+    """
+    Recompute majority responses and reliabilities from the batches of a
+    capture (see capture_batches), batches of equal size in one
+    vectorised pass, e.g. to try a smaller batch size.
+    Returns {device: (majority_hex list, reliability list)}.
+    """
+    n_bits = read_capture_metadata(path)["n_hex"] * 4
+    results = {}
+    for device, batches in capture_batches(path, batch_size, max_rows, session).items():
+        majority, reliability = [None] * len(batches), [None] * len(batches)
+        by_size = {}
+        for i, batch in enumerate(batches):
+            by_size.setdefault(len(batch), []).append(i)
+        for rows in by_size.values():
+            for i, m, r in zip(rows, *batch_majority(np.stack([batches[i] for i in rows]), n_bits)):
+                majority[i], reliability[i] = m, r
+        results[device] = (majority, reliability)
+    return results
@@ -0,0 +1,159 @@
+import os
+import json
+import hashlib
+import functools
+import numpy as np
+from puf_metrics import pack_hex
+from workbook_io import read_sheets, row_range, MAJORITY_SHEET, RELIABILITY_SHEET
+
+# === CONFIGURATION ===
+CACHE_DIR_NAME = ".response_cache"  # created next to each source workbook
+CACHE_VERSION = 1
+LRU_SIZE = 32                       # decoded designs kept in memory
+
+# === DECODED DESIGN ===
+class DesignResponses:
+    """
+    Decoded Majority HEX / Reliability sheets of one RESULTS workbook:
+      packed       (rows, columns, n_bytes) uint8, right-aligned hex
+      valid        (rows, columns) bool, cell holds a response
+      reliability  (rows, columns) float64, NaN where empty
+    Row 0 is start_row of the sheet. Arrays are read-only.
+    """
+
+    def __init__(self, header, reliability_header, packed, valid, reliability, n_bits, start_row):
+        self.header = header
+        self.reliability_header = reliability_header
+        self.packed = packed
+        self.valid = valid
+        self.reliability = reliability
+        self.n_bits = n_bits
+        self.start_row = start_row
+        for arr in (packed, valid, reliability):
+            arr.flags.writeable = False
+
+    @property
+    def n_bytes(self):
+        return self.packed.shape[2]
+
+    def left_aligned(self, n_bytes=None):
+        """(rows, k, n_bytes) responses moved to the left of each row plus mask, as pack_design_rows gives."""
+        n_bytes = n_bytes or self.n_bytes
+        order = np.argsort(~self.valid, axis=1, kind="stable")
+        k = int(self.valid.sum(axis=1).max(initial=0))
+        packed = np.take_along_axis(self.packed, order[:, :k, None], axis=1)
+        mask = np.take_along_axis(self.valid, order[:, :k], axis=1)
+        packed = np.where(mask[:, :, None], packed, 0).astype(np.uint8)
+        if n_bytes > self.n_bytes:
+            pad = np.zeros(packed.shape[:2] + (n_bytes - self.n_bytes,), dtype=np.uint8)
+            packed = np.concatenate([pad, packed], axis=2)
+        return packed, mask
+
+    def reliability_column(self, column=0):
+        """Non-empty values of one Reliability column, top to bottom."""
+        if column >= self.reliability.shape[1]:
+            return []
+        values = self.reliability[:, column]
+        return values[~np.isnan(values)].tolist()
+
+def decode_sheets(sheets, start_row=2, end_row=257):
+    """DesignResponses from read_sheets output."""
+    maj_header, maj_rows = sheets[MAJORITY_SHEET]
+    rel_header, rel_rows = sheets[RELIABILITY_SHEET]
+    maj_rows = row_range(maj_rows, start_row, end_row)
+    rel_rows = row_range(rel_rows, start_row, end_row)
+    n_rows = end_row - start_row + 1
+
+    cells = [(r, c, str(v).strip()) for r, row in enumerate(maj_rows) for c, v in enumerate(row) if v not in (None, "")]
+    n_cols = max([len(maj_header)] + [len(row) for row in maj_rows])
+    n_hex = max((len(v) for _, _, v in cells), default=0)
+    packed = np.zeros((n_rows, n_cols, (n_hex + 1) // 2), dtype=np.uint8)
+    valid = np.zeros((n_rows, n_cols), dtype=bool)
+    n_bits = 0
+    if cells:
+        block, n_bits = pack_hex([v for _, _, v in cells], n_hex)
+        r_idx, c_idx = np.array([r for r, _, _ in cells]), np.array([c for _, c, _ in cells])
+        packed[r_idx, c_idx] = block
+        valid[r_idx, c_idx] = True
+
+    rel_cols = max([len(rel_header)] + [len(row) for row in rel_rows])
+    reliability = np.full((n_rows, rel_cols), np.nan)
+    for r, row in enumerate(rel_rows):
+        for c, v in enumerate(row):
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                reliability[r, c] = v
+
+    return DesignResponses(list(maj_header), list(rel_header), packed, valid, reliability, n_bits, start_row)
+
+# === DISK CACHE ===
+def cache_path_for(path):
+    source = os.path.abspath(path)
+    digest = hashlib.sha1(source.encode()).hexdigest()[:16]
+    return os.path.join(os.path.dirname(source), CACHE_DIR_NAME, f"{digest}.npz")
+
+def _read_entry(entry_path, key):
+    try:
+        with np.load(entry_path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("key") != key or meta.get("version") != CACHE_VERSION:
+                return None
+            return DesignResponses(
+                meta["header"], meta["reliability_header"], data["packed"], data["valid"],
+                data["reliability"], meta["n_bits"], meta["start_row"],
+            )
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _write_entry(entry_path, key, design):
+    meta = {
+        "version": CACHE_VERSION, "key": key, "header": design.header,
+        "reliability_header": design.reliability_header, "n_bits": design.n_bits,
+        "start_row": design.start_row,
+    }
+    try:
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        tmp_path = entry_path + ".tmp.npz"
+        np.savez(tmp_path, meta=np.array(json.dumps(meta, default=str)), packed=design.packed,
+                 valid=design.valid, reliability=design.reliability)
+        os.replace(tmp_path, entry_path)
+    except OSError as e:
+        print(f"Warning: could not write response cache {entry_path}: {e}")
+
+@functools.lru_cache(maxsize=LRU_SIZE)
+def _load(source, mtime_ns, size, start_row, end_row, use_disk):
+    key = [source, mtime_ns, size, start_row, end_row]
+    entry_path = cache_path_for(source)
+    if use_disk:
+        design = _read_entry(entry_path, key)
+        if design is not None:
+            return design
+
+    sheets = read_sheets(source)
+    if sheets is None:
+        return None
+    design = decode_sheets(sheets, start_row, end_row)
+    if use_disk:
+        _write_entry(entry_path, key, design)
+    return design
+
+def load_design(path, start_row=2, end_row=257, use_disk=True):
+    """
+    Decoded responses of one RESULTS workbook, or None if it or a sheet is
+    missing. Served from memory, then from the on-disk cache, then parsed;
+    entries are keyed by path, mtime and size, so a workbook that gained a
+    device column (or changed in any way) is parsed again.
+    """
+    if not os.path.exists(path):
+        print(f"Warning: {path} not found. Skipping...")
+        return None
+    stat = os.stat(path)
+    return _load(os.path.abspath(path), stat.st_mtime_ns, stat.st_size, start_row, end_row, use_disk)
+
+def invalidate(path):
+    """Drop the on-disk entry of a workbook (memory entries expire with its mtime)."""
+    entry_path = cache_path_for(path)
+    if os.path.exists(entry_path):
+        os.remove(entry_path)
+
+def clear_memory():
+    _load.cache_clear()
@@ -0,0 +1,151 @@
+import os
+import json
+import numbers
+import numpy as np
+from openpyxl import Workbook
+from puf_metrics import pack_hex
+from workbook_io import read_sheets, MAJORITY_SHEET, RELIABILITY_SHEET
+
+# === CONFIGURATION ===
+META_FILE = "meta.json"
+MAJORITY_FILE = "majority.npy"          # uint8 (designs, devices, challenges, n_bytes)
+RELIABILITY_FILE = "reliability.npy"    # float64 (designs, devices, challenges), NaN = missing
+VALID_FILE = "valid.npy"                # bool (designs, devices, challenges)
+
+# === STORE ===
+class ResponseStore:
+    """
+    Columnar response store: one .npy file per field, indexed by design,
+    device (result-file column) and challenge. Arrays are opened with
+    np.load(mmap_mode=...), so reads are zero-copy views of the files.
+    """
+
+    def __init__(self, path, mmap_mode='r'):
+        self.path = path
+        with open(os.path.join(path, META_FILE), "r") as f:
+            meta = json.load(f)
+        self.designs = meta["designs"]
+        self.devices = meta["devices"]
+        self.n_bits = meta["n_bits"]
+        self.start_row = meta["start_row"]
+        self.majority = np.load(os.path.join(path, MAJORITY_FILE), mmap_mode=mmap_mode)
+        self.reliability = np.load(os.path.join(path, RELIABILITY_FILE), mmap_mode=mmap_mode)
+        self.valid = np.load(os.path.join(path, VALID_FILE), mmap_mode=mmap_mode)
+
+    @property
+    def n_challenges(self):
+        return self.majority.shape[2]
+
+    def design_index(self, design):
+        return int(design) if isinstance(design, numbers.Integral) else self.designs.index(design)
+
+    def hex(self, design, device, challenge):
+        """Majority response as it appears in the Majority HEX sheet, or None."""
+        d = self.design_index(design)
+        if not self.valid[d, device, challenge]:
+            return None
+        return self.majority[d, device, challenge].tobytes().hex().upper()[-(self.n_bits // 4):]
+
+    def sheets(self, design):
+        """(majority_rows, reliability_rows) in the workbook layout, header excluded."""
+        d = self.design_index(design)
+        n_devices = len(self.devices[d])
+        majority_rows, reliability_rows = [], []
+        for c in range(self.n_challenges):
+            majority_rows.append(tuple(self.hex(d, m, c) for m in range(n_devices)))
+            reliability_rows.append(tuple(
+                float(self.reliability[d, m, c]) if not np.isnan(self.reliability[d, m, c]) else None
+                for m in range(n_devices)
+            ))
+        return majority_rows, reliability_rows
+
+def write_store(path, designs, devices, majority, reliability, valid, n_bits, start_row=2):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, MAJORITY_FILE), np.ascontiguousarray(majority, dtype=np.uint8))
+    np.save(os.path.join(path, RELIABILITY_FILE), np.ascontiguousarray(reliability, dtype=np.float64))
+    np.save(os.path.join(path, VALID_FILE), np.ascontiguousarray(valid, dtype=bool))
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump({"designs": designs, "devices": devices, "n_bits": n_bits, "start_row": start_row}, f, indent=2)
+
+def open_store(path, mmap_mode='r'):
+    return ResponseStore(path, mmap_mode=mmap_mode)
+
+# === XLSX CONVERTERS ===
+def _read_workbook(path, start_row, end_row):
+    sheets = read_sheets(path, (MAJORITY_SHEET, RELIABILITY_SHEET))
+    if sheets is None:
+        return None
+    return [(header, rows[start_row - 2:end_row - 1]) for header, rows in (sheets[MAJORITY_SHEET], sheets[RELIABILITY_SHEET])]
+
+def import_xlsx(paths, store_path, designs=None, start_row=2, end_row=257):
+    """Convert RESULTS workbooks (one per design) into a response store."""
+    designs = designs or [os.path.splitext(os.path.basename(p))[0] for p in paths]
+    loaded = []
+    for path, design in zip(paths, designs):
+        if not os.path.exists(path):
+            print(f"Warning: {path} not found. Skipping...")
+            continue
+        sheets = _read_workbook(path, start_row, end_row)
+        if sheets is not None:
+            loaded.append((design, sheets))
+
+    n_challenges = end_row - start_row + 1
+    cells = [
+        str(v).strip() for _, ((_, rows), _) in loaded for row in rows for v in row if v not in (None, "")
+    ]
+    n_hex = max((len(v) for v in cells), default=0)
+    n_bits = len(cells[0]) * 4 if cells else 0
+    n_bytes = (n_hex + 1) // 2
+
+    devices = []
+    for _, ((maj_header, maj_rows), (rel_header, rel_rows)) in loaded:
+        n_devices = max([len(maj_header), len(rel_header)] + [len(r) for r in maj_rows + rel_rows])
+        devices.append([
+            (maj_header[m] if m < len(maj_header) and maj_header[m] else None)
+            or (rel_header[m] if m < len(rel_header) and rel_header[m] else None)
+            or f"Column {m + 1}"
+            for m in range(n_devices)
+        ])
+    max_devices = max((len(d) for d in devices), default=0)
+
+    shape = (len(loaded), max_devices, n_challenges)
+    majority = np.zeros(shape + (n_bytes,), dtype=np.uint8)
+    reliability = np.full(shape, np.nan)
+    valid = np.zeros(shape, dtype=bool)
+
+    for d, (_, ((_, maj_rows), (_, rel_rows))) in enumerate(loaded):
+        for c, row in enumerate(maj_rows):
+            present = [(m, v) for m, v in enumerate(row) if v not in (None, "")]
+            if present:
+                idx = [m for m, _ in present]
+                majority[d, idx, c] = pack_hex([v for _, v in present], n_hex)[0]
+                valid[d, idx, c] = True
+        for c, row in enumerate(rel_rows):
+            for m, v in enumerate(row):
+                if v is not None:
+                    reliability[d, m, c] = v
+
+    write_store(store_path, [design for design, _ in loaded], devices, majority, reliability, valid, n_bits, start_row)
+    return open_store(store_path)
+
+def export_xlsx(store, output_dir, filename="RESULTS {design}.xlsx"):
+    """Write one workbook per design in the Majority HEX / Reliability layout."""
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for d, design in enumerate(store.designs):
+        wb = Workbook(write_only=True)
+        majority_ws = wb.create_sheet(MAJORITY_SHEET)
+        reliability_ws = wb.create_sheet(RELIABILITY_SHEET)
+        majority_ws.append(store.devices[d])
+        reliability_ws.append(store.devices[d])
+        for _ in range(store.start_row - 2):
+            majority_ws.append([])
+            reliability_ws.append([])
+        majority_rows, reliability_rows = store.sheets(d)
+        for maj_row, rel_row in zip(majority_rows, reliability_rows):
+            majority_ws.append(list(maj_row))
+            reliability_ws.append(list(rel_row))
+        path = os.path.join(output_dir, filename.format(design=design))
+        wb.save(path)
+        written.append(path)
+    return written
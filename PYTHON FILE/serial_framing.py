@@ -0,0 +1,106 @@
+import binascii
+
+# === CONFIGURATION ===
+# Frame: SYNC (2) | challenge index (2, big-endian) | payload (32) | CRC-16/CCITT (2, big-endian)
+# The CRC covers index and payload. 38 bytes per 256-bit response instead of 66 for a hex line.
+SYNC = b"\xa5\x5a"
+INDEX_BYTES = 2
+PAYLOAD_BYTES = 32
+CRC_BYTES = 2
+FRAME_BYTES = len(SYNC) + INDEX_BYTES + PAYLOAD_BYTES + CRC_BYTES
+CRC_INIT = 0xFFFF
+READ_CHUNK = 4096      # max bytes per ser.read()
+BAD_FRAME = b"#"       # queued for a corrupt frame, counted as a malformed line downstream
+
+FRAMINGS = ("line", "binary", "auto")
+
+# === ENCODING ===
+def frame_crc(data):
+    return binascii.crc_hqx(data, CRC_INIT)
+
+def encode_frame(index, payload):
+    """One frame for a challenge index and PAYLOAD_BYTES response bytes (or a 64-char hex string)."""
+    if isinstance(payload, str):
+        payload = bytes.fromhex(payload)
+    if len(payload) != PAYLOAD_BYTES:
+        raise ValueError(f"Payload must be {PAYLOAD_BYTES} bytes, got {len(payload)}")
+    body = (index & 0xFFFF).to_bytes(INDEX_BYTES, "big") + bytes(payload)
+    return SYNC + body + frame_crc(body).to_bytes(CRC_BYTES, "big")
+
+# === DECODING ===
+class FrameDecoder:
+    """
+    Incremental frame parser. feed() appends a chunk to an internal buffer,
+    scans it through a memoryview (no per-frame copies until the payload is
+    handed out) and returns [(index, payload)] of every complete frame; a
+    frame failing its CRC is returned as (None, None) and the scan resyncs
+    one byte later. Bytes between frames are counted in skipped_bytes.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+
+    def feed(self, data):
+        buf = self.buffer
+        buf += data
+        n = len(buf)
+        frames = []
+        pos = 0
+        view = memoryview(buf)
+        body = None
+        try:
+            while True:
+                start = buf.find(SYNC, pos)
+                if start < 0:
+                    # keep a trailing first sync byte, it may start the next frame
+                    keep = n - 1 if n > pos and buf[-1] == SYNC[0] else n
+                    self.skipped_bytes += keep - pos
+                    pos = keep
+                    break
+                self.skipped_bytes += start - pos
+                if start + FRAME_BYTES > n:
+                    pos = start
+                    break
+                body = view[start + len(SYNC):start + FRAME_BYTES - CRC_BYTES]
+                crc = int.from_bytes(view[start + FRAME_BYTES - CRC_BYTES:start + FRAME_BYTES], "big")
+                if frame_crc(body) != crc:
+                    self.crc_errors += 1
+                    frames.append((None, None))
+                    pos = start + 1
+                    continue
+                frames.append((int.from_bytes(body[:INDEX_BYTES], "big"), body[INDEX_BYTES:].tobytes()))
+                pos = start + FRAME_BYTES
+        finally:
+            body = None  # drop the slice so the buffer can be trimmed
+            view.release()
+        del buf[:pos]
+        self.frames += len(frames) - sum(1 for index, _ in frames if index is None)
+        return frames
+
+class LineSplitter:
+    """Splits chunks into newline-terminated lines, keeping the unterminated tail."""
+
+    def __init__(self):
+        self.pending = b""
+
+    def feed(self, data):
+        lines = (self.pending + data).split(b"\n")
+        self.pending = lines.pop()
+        return lines
+
+def detect_framing(lines, frames):
+    """'binary' once a frame passed its CRC, 'line' once a line holds a full hex response, else None."""
+    if any(index is not None for index, _ in frames):
+        return "binary"
+    for line in lines:
+        text = line.strip()
+        if len(text) == 2 * PAYLOAD_BYTES:
+            try:
+                bytes.fromhex(text.decode("ascii"))
+            except ValueError:
+                continue
+            return "line"
+    return None
@@ -0,0 +1,106 @@
+import os
+from openpyxl import load_workbook, Workbook
+
+# === CONFIGURATION ===
+MAJORITY_SHEET = "Majority HEX"
+RELIABILITY_SHEET = "Reliability"
+RESULT_SHEETS = (MAJORITY_SHEET, RELIABILITY_SHEET)
+
+# (path, sheets) -> (mtime, size, parsed sheets) of every source read so far
+_SHEET_CACHE = {}
+
+# === READING ===
+def read_sheets(path, sheet_names=RESULT_SHEETS, cache=True):
+    """
+    Stream the given sheets of a workbook in read-only mode.
+    Returns {sheet: (header tuple, list of row tuples from row 2)}, or None
+    if the file or a sheet is missing. Parsed sheets are kept per source and
+    reused until the file changes; treat them as read-only.
+    """
+    if not os.path.exists(path):
+        print(f"Warning: {path} not found. Skipping...")
+        return None
+    stat = os.stat(path)
+    key = (os.path.abspath(path), tuple(sheet_names))
+    cached = _SHEET_CACHE.get(key)
+    if cache and cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if any(name not in wb.sheetnames for name in sheet_names):
+            print(f"Warning: {path} missing required sheets. Skipping...")
+            return None
+        sheets = {}
+        for name in sheet_names:
+            rows = wb[name].iter_rows(values_only=True)
+            header = next(rows, ())
+            sheets[name] = (header, list(rows))
+    finally:
+        wb.close()
+
+    if cache:
+        _SHEET_CACHE[key] = (stat.st_mtime_ns, stat.st_size, sheets)
+    return sheets
+
+def row_range(rows, start_row=2, end_row=None):
+    """Rows start_row..end_row (sheet numbering) of a read_sheets row list, padded with empty rows."""
+    selected = rows[start_row - 2:None if end_row is None else end_row - 1]
+    if end_row is not None:
+        selected = selected + [()] * (end_row - start_row + 1 - len(selected))
+    return selected
+
+def clear_cache():
+    _SHEET_CACHE.clear()
+
+# === COMBINING ===
+def sheet_columns(header, rows, max_row=None):
+    """
+    Column labels and data rows of one source sheet: a missing header becomes
+    'Column N', blank cells become None and rows stop at max_row.
+    """
+    data = rows if max_row is None else rows[:max_row - 1]
+    width = max([len(header)] + [len(r) for r in data])
+    labels = [header[c] if c < len(header) and header[c] else f"Column {c + 1}" for c in range(width)]
+    cleaned = [
+        [v if v is not None and str(v).strip() != "" else None for v in row] + [None] * (width - len(row))
+        for row in data
+    ]
+    return labels, cleaned
+
+def combine_sheets(paths, output_path, sheet_names=RESULT_SHEETS, max_row=None):
+    """
+    Place every column of each source side by side, in source order, in a
+    new write-only workbook (one sheet per name). Returns the sources used.
+    """
+    blocks = {name: [] for name in sheet_names}
+    used = []
+    for path in paths:
+        sheets = read_sheets(path, sheet_names)
+        if sheets is None:
+            continue
+        used.append(path)
+        for name in sheet_names:
+            blocks[name].append(sheet_columns(*sheets[name], max_row=max_row))
+
+    wb = Workbook(write_only=True)
+    for name in sheet_names:
+        ws = wb.create_sheet(name)
+        parts = blocks[name]
+        ws.append([label for labels, _ in parts for label in labels])
+        n_rows = max((len(data) for _, data in parts), default=0)
+        rows = []
+        for r in range(n_rows):
+            row = []
+            for labels, data in parts:
+                row.extend(data[r] if r < len(data) else [None] * len(labels))
+            rows.append(row)
+        while rows and all(v is None for v in rows[-1]):
+            rows.pop()
+        for row in rows:
+            ws.append(row)
+
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    wb.save(output_path)
+    return used